@@ -5,42 +5,70 @@ Extract DDR Binary from USB Capture
 This script extracts the 324-byte DDR binary (FIDB + RDD format) from a
 tcpdump/tshark USB capture of the vendor's cloner tool.
 
+Bulk OUT payloads are streamed from tshark and scanned once; only a window
+of at most one DDR binary is kept across transfer boundaries, so captures of
+any size are processed in a single linear pass with constant memory.
+
 Usage:
     python3 extract_ddr_from_pcap.py <capture.pcap> [output.bin]
 """
 
+import os
 import sys
 import subprocess
 import struct
+from typing import Iterator, List, Optional, Tuple
 
-def extract_usb_data(pcap_file):
-    """Extract USB bulk OUT data from pcap file using tshark"""
-    print(f"Analyzing {pcap_file}...")
-    
-    # Use tshark to extract USB bulk OUT data
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'references'))
+
+# FIDB + RDD field offsets (RDD header is always at offset 0xC0)
+from ddr_layout import BINARY_SIZES, DDR_TYPE_NAMES, RDD_OFFSET, layout_for, rdd_mapped
+
+FIDB_MAGIC = b'FIDB'
+FIDB_DATA_SIZE = 0xB8           # FIDB size field (184 bytes after the header)
+RDD_MAGIC = b'\x00RDD'
+
+# RDD size field -> total DDR binary size (ddr_layout.BINARY_SIZES)
+# 324 bytes: classic XBurst1 and the T20 vendor blob, 384 bytes: XBurst2/T41N
+DDR_BINARY_SIZES = BINARY_SIZES
+MAX_DDR_BINARY_SIZE = max(DDR_BINARY_SIZES.values())
+
+def iter_bulk_out_payloads(pcap_file) -> Iterator[bytes]:
+    """Yield USB bulk OUT payloads one at a time as tshark decodes them"""
     cmd = [
         'tshark', '-r', pcap_file,
         '-Y', 'usb.transfer_type == 0x03 && usb.endpoint_address.direction == 0',
         '-T', 'fields',
         '-e', 'usb.capdata'
     ]
-    
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        
-        # Combine all hex strings into one binary blob
-        all_data = b''
-        for line in result.stdout.strip().split('\n'):
-            if line:
-                # Remove colons and convert hex to bytes
-                hex_str = line.replace(':', '')
-                try:
-                    all_data += bytes.fromhex(hex_str)
-                except ValueError:
-                    continue
-        
-        return all_data
-    
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            # Remove colons and convert hex to bytes
+            try:
+                yield bytes.fromhex(line.replace(':', ''))
+            except ValueError:
+                continue
+    except GeneratorExit:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+def extract_usb_data(pcap_file):
+    """Extract USB bulk OUT data from pcap file using tshark"""
+    print(f"Analyzing {pcap_file}...")
+
+    try:
+        return b''.join(iter_bulk_out_payloads(pcap_file))
     except subprocess.CalledProcessError as e:
         print(f"ERROR: tshark failed: {e}")
         return None
@@ -48,150 +76,176 @@ def extract_usb_data(pcap_file):
         print("ERROR: tshark not found. Install with: sudo apt-get install tshark")
         return None
 
-def find_ddr_binary(data):
-    """Find DDR binary in USB data by looking for FIDB marker.
+def check_ddr_candidate(buf, pos) -> Optional[int]:
+    """Validate a FIDB marker at buf[pos] in place.
 
-    Supports both classic 324-byte (XBurst1) and extended 384-byte (XBurst2/T41N)
-    FIDB+RDD layouts.
+    Returns the DDR binary size (324 or 384), 0 if the candidate is invalid,
+    or None if buf ends before the candidate can be decided.
     """
-    print(f"Searching for DDR binary in {len(data)} bytes of USB data...")
+    if len(buf) - pos < RDD_OFFSET + 8:
+        return None
 
-    fidb_marker = b'FIDB'
-    pos = 0
-    candidates = []
+    fidb_size = struct.unpack_from('<I', buf, pos + 4)[0]
+    if fidb_size != FIDB_DATA_SIZE:
+        return 0
 
-    while True:
-        pos = data.find(fidb_marker, pos)
-        if pos == -1:
-            break
+    if buf[pos + RDD_OFFSET:pos + RDD_OFFSET + 4] != RDD_MAGIC:
+        return 0
 
-        # Try known DDR binary sizes: 324 bytes (classic) and 384 bytes (extended)
-        for size in (324, 384):
-            end = pos + size
-            if end > len(data):
-                continue
+    rdd_size = struct.unpack_from('<I', buf, pos + RDD_OFFSET + 4)[0]
+    size = DDR_BINARY_SIZES.get(rdd_size)
+    if size is None:
+        return 0
+    if len(buf) - pos < size:
+        return None
+    return size
 
-            candidate = data[pos:end]
+class DDRBinaryScanner:
+    """Single-pass FIDB/RDD scanner over a stream of USB payloads.
 
-            # Basic header sanity checks
-            if candidate[0:4] != fidb_marker:
-                continue
+    Only a window of at most one DDR binary is carried across payload
+    boundaries, so memory use does not grow with the capture size.
+    """
 
+    def __init__(self, verbose: bool = True):
+        self.verbose = verbose
+        self.candidates: List[Tuple[int, bytes]] = []
+        self.total_bytes = 0
+        self._window = b''          # Undecided tail of the stream
+        self._window_offset = 0     # Stream offset of _window[0]
+
+    def feed(self, payload: bytes):
+        """Scan the next payload (payloads must be fed in stream order)"""
+        self.total_bytes += len(payload)
+        buf = self._window + payload if self._window else payload
+
+        # Keep the last bytes in case a marker is split across payloads
+        keep = max(len(buf) - (len(FIDB_MAGIC) - 1), 0)
+        pos = buf.find(FIDB_MAGIC)
+        while pos != -1:
+            size = check_ddr_candidate(buf, pos)
+            if size is None:
+                # Candidate runs past the data seen so far; decide it later
+                keep = pos
+                break
+            if size:
+                self._report(self._window_offset + pos, bytes(buf[pos:pos + size]))
+            pos = buf.find(FIDB_MAGIC, pos + 1)
+
+        self._window = bytes(buf[keep:])
+        self._window_offset += keep
+
+    def _report(self, offset: int, candidate: bytes):
+        if self.verbose:
             fidb_size = struct.unpack('<I', candidate[4:8])[0]
+            rdd_size = struct.unpack('<I', candidate[RDD_OFFSET + 4:RDD_OFFSET + 8])[0]
+            print(
+                f"Found potential DDR binary at offset {offset} "
+                f"(size={len(candidate)} bytes, FIDB={fidb_size}, RDD={rdd_size})"
+            )
+        self.candidates.append((offset, candidate))
 
-            # RDD header is always at offset 0xC0 (192)
-            rdd_offset = 192
-            if len(candidate) < rdd_offset + 8:
-                continue
-
-            rdd_magic = candidate[rdd_offset:rdd_offset+4]
-            rdd_size = struct.unpack('<I', candidate[rdd_offset+4:rdd_offset+8])[0]
+def scan_capture(pcap_file) -> Optional[DDRBinaryScanner]:
+    """Stream a capture's bulk OUT payloads through a DDRBinaryScanner"""
+    print(f"Analyzing {pcap_file}...")
 
-            # Expect RDD magic "\x00RDD"
-            if rdd_magic != b"\x00RDD":
-                continue
+    scanner = DDRBinaryScanner()
+    try:
+        for payload in iter_bulk_out_payloads(pcap_file):
+            scanner.feed(payload)
+    except subprocess.CalledProcessError as e:
+        print(f"ERROR: tshark failed: {e}")
+        return None
+    except FileNotFoundError:
+        print("ERROR: tshark not found. Install with: sudo apt-get install tshark")
+        return None
 
-            # Heuristic validation based on expected RDD sizes
-            if size == 324 and rdd_size not in (0x7C, 124):
-                continue
-            if size == 384 and rdd_size not in (0xB8, 184):
-                continue
+    return scanner
 
-            print(
-                f"Found potential DDR binary at offset {pos} "
-                f"(size={size} bytes, FIDB={fidb_size}, RDD={rdd_size})"
-            )
-            candidates.append((pos, candidate))
-            # Once we've accepted one size at this position, don't try the others
-            break
+def find_ddr_binary(data):
+    """Find DDR binary in USB data by looking for FIDB marker.
 
-        pos += 1
+    Supports both classic 324-byte (XBurst1) and extended 384-byte (XBurst2/T41N)
+    FIDB+RDD layouts.
+    """
+    print(f"Searching for DDR binary in {len(data)} bytes of USB data...")
 
-    return candidates
+    scanner = DDRBinaryScanner()
+    scanner.feed(data)
+    return scanner.candidates
 
 def analyze_ddr_binary(data):
     """Analyze and display DDR binary structure (324- or 384-byte)."""
     length = len(data)
-    if length not in (324, 384):
+    layout = layout_for(data)
+    if layout is None:
         print(f"WARNING: DDR binary is {length} bytes, expected 324 or 384")
 
     print("\n=== DDR Binary Analysis ===\n")
+    if layout is None:
+        print_hex_head(data)
+        return
+
+    fields = layout.decode(data)
 
     # FIDB section (0x00-0xBF, 192 bytes)
     print("FIDB Section (Platform Config):")
-    fidb_magic = data[0:4]
-    fidb_size = struct.unpack('<I', data[4:8])[0]
-    crystal_freq = struct.unpack('<I', data[8:12])[0]
-    cpu_freq = struct.unpack('<I', data[12:16])[0]
-    ddr_freq = struct.unpack('<I', data[16:20])[0]
-    uart_baud = struct.unpack('<I', data[28:32])[0]
-    mem_size = struct.unpack('<I', data[40:44])[0]
-
-    print(f"  Magic: {fidb_magic}")
-    print(f"  Size: {fidb_size} bytes")
-    print(f"  Crystal: {crystal_freq} Hz ({crystal_freq/1000000:.1f} MHz)")
-    print(f"  CPU: {cpu_freq} Hz ({cpu_freq/1000000:.1f} MHz)")
-    print(f"  DDR: {ddr_freq} Hz ({ddr_freq/1000000:.1f} MHz)")
-    print(f"  UART: {uart_baud} baud")
-    print(f"  Memory: {mem_size} bytes ({mem_size/1024/1024:.1f} MB)")
+    print(f"  Magic: {fields['fidb_magic']}")
+    print(f"  Size: {fields['fidb_size']} bytes")
+    print(f"  Crystal: {fields['crystal_freq']} Hz ({fields['crystal_freq']/1000000:.1f} MHz)")
+    print(f"  CPU: {fields['cpu_freq']} Hz ({fields['cpu_freq']/1000000:.1f} MHz)")
+    print(f"  DDR: {fields['ddr_freq']} Hz ({fields['ddr_freq']/1000000:.1f} MHz)")
+    print(f"  UART: {fields['uart_baud']} baud")
+    print(f"  Memory: {fields['mem_size']} bytes ({fields['mem_size']/1024/1024:.1f} MB)")
 
     # RDD header (starts at 0xC0)
     print("\nRDD Section (DDR PHY Params):")
-    rdd_offset = 192
-    if length < rdd_offset + 8:
-        print("  RDD header not present (binary too short)")
-    else:
-        rdd_magic = data[rdd_offset:rdd_offset+4]
-        rdd_size = struct.unpack('<I', data[rdd_offset+4:rdd_offset+8])[0]
-        rdd_crc = struct.unpack('<I', data[rdd_offset+8:rdd_offset+12])[0]
-        ddr_type = struct.unpack('<I', data[rdd_offset+12:rdd_offset+16])[0]
+    ddr_type = fields['ddr_type']
+    ddr_type_name = DDR_TYPE_NAMES.get(ddr_type, f"Unknown/raw ({ddr_type})")
 
-        ddr_type_names = {0: "DDR3", 1: "DDR2", 2: "LPDDR2/LPDDR", 4: "LPDDR3"}
-        ddr_type_name = ddr_type_names.get(ddr_type, f"Unknown/raw ({ddr_type})")
+    print(f"  Magic: {fields['rdd_magic']}")
+    print(f"  Size: {fields['rdd_size']} bytes")
 
-        print(f"  Magic: {rdd_magic}")
-        print(f"  Size: {rdd_size} bytes")
-        print(f"  CRC32: 0x{rdd_crc:08x}")
+    if not rdd_mapped(fields):
+        # T20 vendor blob: 324 bytes, RDD data in an unmapped layout
+        print("  RDD data: T20 vendor layout, fields not mapped")
+        print_hex_head(data)
+        return
+
+    if length == 324:
+        # Classic XBurst1-style 324-byte format - use detailed decode
+        print(f"  CRC32: 0x{fields['rdd_crc']:08x}")
         print(f"  DDR Type (raw): {ddr_type} -> {ddr_type_name}")
 
-        if length == 324:
-            # Classic XBurst1-style 324-byte format - use detailed decode
-            cl = data[228]
-            bl = data[229]
-            row_bits = data[230]
-            col_bits = data[231] + 6  # Stored as col_bits - 6
-
-            tRAS = data[232]
-            tRC = data[233]
-            tRCD = data[234]
-            tRP = data[235]
-            tRFC = data[236]
-            tRTP = data[238]
-            tFAW = data[240]
-            tRRD = data[242]
-            tWTR = data[243]
-
-            print(f"\nMemory Geometry:")
-            print(f"  CL: {cl}")
-            print(f"  BL: {bl}")
-            print(f"  Row bits: {row_bits}")
-            print(f"  Col bits: {col_bits}")
-
-            print(f"\nTiming Parameters (cycles):")
-            print(f"  tRAS: {tRAS}")
-            print(f"  tRC: {tRC}")
-            print(f"  tRCD: {tRCD}")
-            print(f"  tRP: {tRP}")
-            print(f"  tRFC: {tRFC}")
-            print(f"  tRTP: {tRTP}")
-            print(f"  tFAW: {tFAW}")
-            print(f"  tRRD: {tRRD}")
-            print(f"  tWTR: {tWTR}")
-        elif length == 384:
-            print("\nNOTE: Detected extended 384-byte DDR binary (likely XBurst2/T41N).")
-            print("      Detailed geometry/timing layout differs from the 324-byte format.")
-            print("      See t41n_ddr_analysis.md for a full breakdown of this variant.")
+        print(f"\nMemory Geometry:")
+        print(f"  CL: {fields['cl']}")
+        print(f"  BL: {fields['bl']}")
+        print(f"  Row bits: {fields['row_bits']}")
+        print(f"  Col bits: {fields['col_bits_minus6'] + 6}")  # Stored as col_bits - 6
+
+        print(f"\nTiming Parameters (cycles):")
+        for name in ('tRAS', 'tRC', 'tRCD', 'tRP', 'tRFC', 'tRTP', 'tFAW', 'tRRD', 'tWTR'):
+            print(f"  {name}: {fields[name]}")
+    else:
+        # Extended XBurst2/T41N format: chip name and DDRC register values
+        chip_name = fields['chip_name'].split(b'\x00')[0].decode('ascii', 'replace')
+        print(f"  Chip: {chip_name}")
+        print(f"  DDR Type (raw): 0x{ddr_type:02x}")
+        print(f"  DDR: {fields['ddr_freq_hz']} Hz ({fields['ddr_freq_hz']/1000000:.1f} MHz)")
+
+        print(f"\nDDR Controller:")
+        for name in ('ddrc_cfg', 'ddrc_ctrl', 'ddrc_dlmr', 'ddrc_ddlp', 'ddrc_mmap0'):
+            print(f"  {name[5:].upper()}: 0x{fields[name]:08x}")
 
+        print(f"\nTiming bytes: {fields['timing'].hex(' ')}")
+        print("  See t41n_ddr_analysis.md for a full breakdown of this variant.")
+
+    print(f"\nDQ mapping: {fields['dq_map'].hex(' ')}")
+
+    print_hex_head(data)
+
+def print_hex_head(data):
+    """Print the first 64 bytes as hex"""
     print("\nFirst 64 bytes (hex):")
     for i in range(0, 64, 16):
         hex_str = ' '.join(f'{b:02x}' for b in data[i:i+16])
@@ -205,16 +259,14 @@ def main():
     pcap_file = sys.argv[1]
     output_file = sys.argv[2] if len(sys.argv) > 2 else "vendor_ddr_extracted.bin"
     
-    # Extract USB data
-    usb_data = extract_usb_data(pcap_file)
-    if not usb_data:
+    # Scan USB bulk OUT data in a single streaming pass
+    scanner = scan_capture(pcap_file)
+    if scanner is None or scanner.total_bytes == 0:
         print("ERROR: Failed to extract USB data")
         sys.exit(1)
     
-    print(f"Extracted {len(usb_data)} bytes of USB bulk OUT data")
-    
-    # Find DDR binary
-    candidates = find_ddr_binary(usb_data)
+    print(f"Scanned {scanner.total_bytes} bytes of USB bulk OUT data")
+    candidates = scanner.candidates
     
     if not candidates:
         print("\nERROR: No DDR binary found in capture")
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Harvest DDR Binaries from a Corpus of USB Captures
+
+Scans every capture under one or more directories in parallel, extracts each
+valid FIDB+RDD candidate (324- or 384-byte layout) with the streaming scanner
+from extract_ddr_from_pcap.py, and stores the results in a single SQLite
+catalog:
+
+- blobs:     one row per distinct DDR binary, keyed by SHA-256, with the
+             decoded platform, crystal/CPU/DDR frequencies and memory size
+- sightings: which capture (and stream offset) each blob was seen in
+- captures:  every scanned file with its size/mtime, so unchanged captures
+             are skipped on the next run
+
+Captures (.pcap/.pcapng) are decoded with tshark. Loose DDR dumps and other
+files (.bin) are scanned as raw bytes, as are captures when --raw is given
+(works for usbmon captures, where each transfer is one record).
+
+Usage:
+    python3 harvest_ddr_from_captures.py <dir|file>... [--catalog ddr_catalog.db] [--jobs N]
+    python3 harvest_ddr_from_captures.py --lookup <hash-prefix>
+    python3 harvest_ddr_from_captures.py --list
+    python3 harvest_ddr_from_captures.py --export <dir>
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import subprocess
+import multiprocessing
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'references'))
+
+from extract_ddr_from_pcap import DDRBinaryScanner, iter_bulk_out_payloads
+import ddr_layout
+
+DEFAULT_CATALOG = "ddr_catalog.db"
+
+CAPTURE_EXTENSIONS = ('.pcap', '.pcapng')
+RAW_EXTENSIONS = ('.bin',)
+
+# Raw files are scanned in pieces of this size
+RAW_READ_SIZE = 1024 * 1024
+
+# Platform hints in capture paths (checked in order)
+PLATFORM_PATTERN = re.compile(r'(?<![a-z0-9])t(10|20|21|23|30|31|40|41)', re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash        TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    platform    TEXT,
+    crystal_hz  INTEGER,
+    cpu_hz      INTEGER,
+    ddr_hz      INTEGER,
+    mem_size    INTEGER,
+    ddr_type    INTEGER,
+    first_seen  REAL,
+    data        BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sightings (
+    hash        TEXT NOT NULL REFERENCES blobs(hash),
+    capture     TEXT NOT NULL,
+    offset      INTEGER NOT NULL,
+    PRIMARY KEY (hash, capture, offset)
+);
+CREATE INDEX IF NOT EXISTS sightings_capture ON sightings(capture);
+CREATE TABLE IF NOT EXISTS captures (
+    path        TEXT PRIMARY KEY,
+    size        INTEGER,
+    mtime       REAL,
+    scanned_at  REAL,
+    candidates  INTEGER,
+    error       TEXT
+);
+"""
+
+def find_captures(paths: List[str]) -> List[str]:
+    """Expand directories into the capture and raw files beneath them"""
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for root, _, names in os.walk(path):
+            for name in sorted(names):
+                if name.lower().endswith(CAPTURE_EXTENSIONS + RAW_EXTENSIONS):
+                    files.append(os.path.join(root, name))
+    return files
+
+def scan_file(job: Tuple[str, bool]) -> Tuple[str, List[Tuple[int, bytes]], Optional[str]]:
+    """Worker: return (path, [(offset, blob)], error) for one file"""
+    path, raw = job
+    scanner = DDRBinaryScanner(verbose=False)
+
+    try:
+        if raw or not path.lower().endswith(CAPTURE_EXTENSIONS):
+            with open(path, 'rb') as f:
+                for piece in iter(lambda: f.read(RAW_READ_SIZE), b''):
+                    scanner.feed(piece)
+        else:
+            for payload in iter_bulk_out_payloads(path):
+                scanner.feed(payload)
+    except subprocess.CalledProcessError as e:
+        return path, scanner.candidates, f"tshark failed: {e}"
+    except FileNotFoundError:
+        return path, scanner.candidates, "tshark not found"
+    except OSError as e:
+        return path, scanner.candidates, str(e)
+
+    return path, scanner.candidates, None
+
+def guess_platform(path: str, blob: bytes) -> Optional[str]:
+    """Platform from the capture path, or from the layout (384 bytes = T41)"""
+    match = PLATFORM_PATTERN.search(os.path.basename(path)) or PLATFORM_PATTERN.search(path)
+    if match:
+        return f"t{match.group(1)}"
+    if len(blob) == 384:
+        return "t41"
+    return None
+
+def decode_blob(blob: bytes) -> dict:
+    """Decode the catalogued FIDB/RDD fields
+
+    ddr_type is only stored for the classic 324-byte layout (RDD size 0x7C);
+    the 384-byte layout and the T20 vendor variant (RDD size 0xC4) keep
+    something else in that word.
+    """
+    fields = ddr_layout.decode(blob)
+    classic = len(blob) == ddr_layout.LAYOUT_324.size and fields['rdd_size'] == ddr_layout.RDD_SIZE_324
+    return {
+        'crystal_hz': fields['crystal_freq'],
+        'cpu_hz': fields['cpu_freq'],
+        'ddr_hz': fields['ddr_freq'],
+        'mem_size': fields['mem_size'],
+        'ddr_type': fields['ddr_type'] if classic else None,
+    }
+
+def ddr_type_name(size: int, ddr_type: Optional[int]) -> str:
+    """Display name of a catalogued ddr_type (only set for classic 324-byte blobs)"""
+    if size != ddr_layout.LAYOUT_324.size or ddr_type is None:
+        return "n/a"
+    return ddr_layout.DDR_TYPE_NAMES.get(ddr_type, f"Unknown/raw ({ddr_type})")
+
+class DDRCatalog:
+    """SQLite catalog of DDR binaries keyed by SHA-256"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def is_current(self, path: str) -> bool:
+        """True if path was already scanned at its current size and mtime"""
+        st = os.stat(path)
+        row = self.db.execute(
+            "SELECT size, mtime, error FROM captures WHERE path = ?", (path,)).fetchone()
+        return row is not None and row[0] == st.st_size and row[1] == st.st_mtime and row[2] is None
+
+    def add_scan(self, path: str, candidates: List[Tuple[int, bytes]],
+                 error: Optional[str]) -> int:
+        """Record one scanned file; returns the number of new distinct blobs"""
+        st = os.stat(path)
+        new_blobs = 0
+
+        # Forget previous sightings so a rescan replaces them
+        self.db.execute("DELETE FROM sightings WHERE capture = ?", (path,))
+
+        for offset, blob in candidates:
+            digest = hashlib.sha256(blob).hexdigest()
+            fields = decode_blob(blob)
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO blobs (hash, size, platform, crystal_hz, cpu_hz, ddr_hz,"
+                " mem_size, ddr_type, first_seen, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, len(blob), guess_platform(path, blob), fields['crystal_hz'],
+                 fields['cpu_hz'], fields['ddr_hz'], fields['mem_size'], fields['ddr_type'],
+                 time.time(), blob))
+            new_blobs += cursor.rowcount
+            self.db.execute(
+                "INSERT OR IGNORE INTO sightings (hash, capture, offset) VALUES (?, ?, ?)",
+                (digest, path, offset))
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO captures (path, size, mtime, scanned_at, candidates, error)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime, time.time(), len(candidates), error))
+        self.db.commit()
+        return new_blobs
+
+    def resolve(self, prefix: str) -> List[str]:
+        """Full hashes starting with prefix"""
+        rows = self.db.execute(
+            "SELECT hash FROM blobs WHERE hash >= ? AND hash < ? ORDER BY hash",
+            (prefix.lower(), prefix.lower() + 'g'))
+        return [row[0] for row in rows]
+
+    def blob(self, digest: str) -> sqlite3.Row:
+        self.db.row_factory = sqlite3.Row
+        try:
+            return self.db.execute("SELECT * FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        finally:
+            self.db.row_factory = None
+
+    def sightings(self, digest: str) -> List[Tuple[str, int]]:
+        return self.db.execute(
+            "SELECT capture, offset FROM sightings WHERE hash = ? ORDER BY capture, offset",
+            (digest,)).fetchall()
+
+    def summary(self) -> List[tuple]:
+        """(hash, size, platform, ddr_hz, ddr_type, captures) for every blob"""
+        return self.db.execute(
+            "SELECT b.hash, b.size, b.platform, b.ddr_hz, b.ddr_type,"
+            " COUNT(DISTINCT s.capture) FROM blobs b LEFT JOIN sightings s ON s.hash = b.hash"
+            " GROUP BY b.hash ORDER BY b.platform, b.ddr_hz, b.hash").fetchall()
+
+def harvest(catalog: DDRCatalog, paths: List[str], jobs: int, raw: bool, force: bool):
+    """Scan files in parallel and merge the results into the catalog"""
+    files = find_captures(paths)
+    pending = [f for f in files if force or not catalog.is_current(f)]
+
+    print(f"Found {len(files)} files, {len(files) - len(pending)} unchanged since last scan")
+    if not pending:
+        return
+
+    print(f"Scanning {len(pending)} files with {jobs} worker processes...")
+    start = time.time()
+    total_candidates = 0
+    total_new = 0
+
+    with multiprocessing.Pool(jobs) as pool:
+        for path, candidates, error in pool.imap_unordered(scan_file, [(f, raw) for f in pending]):
+            new_blobs = catalog.add_scan(path, candidates, error)
+            total_candidates += len(candidates)
+            total_new += new_blobs
+            if error:
+                print(f"  ✗ {path}: {error}")
+            elif candidates:
+                print(f"  ✓ {path}: {len(candidates)} candidate(s), {new_blobs} new")
+
+    print(f"\nScanned {len(pending)} files in {time.time() - start:.1f}s: "
+          f"{total_candidates} candidates, {total_new} new distinct DDR binaries")
+
+def print_blob(catalog: DDRCatalog, digest: str):
+    """Print one blob's decoded fields and every capture it was seen in"""
+    row = catalog.blob(digest)
+    ddr_type = ddr_type_name(row['size'], row['ddr_type'])
+
+    print(f"\n{digest}")
+    print(f"  Size: {row['size']} bytes")
+    print(f"  Platform: {row['platform'] or 'unknown'}")
+    print(f"  Crystal: {row['crystal_hz'] / 1000000:.1f} MHz")
+    print(f"  CPU: {row['cpu_hz'] / 1000000:.1f} MHz")
+    print(f"  DDR: {row['ddr_hz'] / 1000000:.1f} MHz ({ddr_type})")
+    print(f"  Memory: {row['mem_size'] / 1024 / 1024:.1f} MB")
+    print(f"  Seen in:")
+    for capture, offset in catalog.sightings(digest):
+        print(f"    {capture} @ {offset}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Harvest DDR binaries from USB captures into a hash-keyed catalog'
+    )
+    parser.add_argument('paths', nargs='*', help='Capture directories or files to scan')
+    parser.add_argument('-c', '--catalog', default=DEFAULT_CATALOG,
+                        help=f'SQLite catalog path (default: {DEFAULT_CATALOG})')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--raw', action='store_true',
+                        help='Scan captures as raw bytes instead of decoding with tshark')
+    parser.add_argument('--force', action='store_true',
+                        help='Rescan files even if unchanged since the last scan')
+    parser.add_argument('--lookup', metavar='HASH',
+                        help='Show a DDR binary (hash prefix) and the captures that used it')
+    parser.add_argument('--list', action='store_true', help='List all catalogued DDR binaries')
+    parser.add_argument('--export', metavar='DIR', help='Write every catalogued blob to DIR/<hash>.bin')
+
+    args = parser.parse_args()
+
+    if not (args.paths or args.lookup or args.list or args.export):
+        parser.print_help()
+        sys.exit(1)
+
+    catalog = DDRCatalog(args.catalog)
+    try:
+        if args.paths:
+            harvest(catalog, args.paths, max(1, args.jobs), args.raw, args.force)
+
+        if args.lookup:
+            matches = catalog.resolve(args.lookup)
+            if not matches:
+                print(f"ERROR: No DDR binary with hash {args.lookup}")
+                sys.exit(1)
+            for digest in matches:
+                print_blob(catalog, digest)
+
+        if args.list:
+            print(f"\n{'Hash':16s} {'Size':>5s} {'Platform':8s} {'DDR MHz':>8s} {'Type':12s} Captures")
+            for digest, size, platform, ddr_hz, ddr_type, captures in catalog.summary():
+                print(f"{digest[:16]} {size:5d} {platform or '?':8s} {ddr_hz / 1000000:8.1f} "
+                      f"{ddr_type_name(size, ddr_type):12s} {captures}")
+
+        if args.export:
+            os.makedirs(args.export, exist_ok=True)
+            count = 0
+            for digest, *_ in catalog.summary():
+                with open(os.path.join(args.export, f"{digest}.bin"), 'wb') as f:
+                    f.write(catalog.blob(digest)['data'])
+                count += 1
+            print(f"Exported {count} DDR binaries to {args.export}")
+    finally:
+        catalog.close()
+
+if __name__ == '__main__':
+    main()
@@ -211,6 +211,9 @@ typedef struct {
     const char* config_file;  // Custom DDR config file path (NULL = use default)
     const char* spl_file;     // Custom SPL file path (NULL = use default)
     const char* uboot_file;   // Custom U-Boot file path (NULL = use default)
+    const char* ddr_chip;     // DDR chip for the precompiled DDR table (NULL = reference binary)
+    uint32_t ddr_freq;        // DDR frequency in Hz for ddr_chip (0 = processor default)
+    const char* firmware_pack; // Firmware pack with SPL/U-Boot (NULL = embedded/default)
 } bootstrap_config_t;
 
 // Bootstrap progress
@@ -287,6 +290,8 @@ thingino_error_t firmware_load_t31x(firmware_files_t* firmware);
 thingino_error_t firmware_load_a1(firmware_files_t* firmware);
 thingino_error_t load_file(const char* filename, uint8_t** data, size_t* size);
 thingino_error_t firmware_load_from_files(processor_variant_t variant, const char* config_file, const char* spl_file, const char* uboot_file, firmware_files_t* firmware);
+thingino_error_t firmware_select_ddr_config(processor_variant_t variant, const char* ddr_chip, uint32_t ddr_freq, firmware_files_t* firmware);
+thingino_error_t firmware_select_pack_binaries(processor_variant_t variant, const char* pack_path, firmware_files_t* firmware);
 thingino_error_t firmware_validate(const firmware_files_t* firmware);
 
 // DDR functions
@@ -2,24 +2,78 @@
 """
 DDR Binary Compiler - Final Version
 Combines U-Boot timing logic + reverse-engineered binary format
+
+Batch mode (--batch) compiles every .cfg under a directory for each
+platform and DDR frequency in one process pool and writes a manifest:
+
+    python3 ddr_compiler_final.py --batch ddrs/ out/ --freqs 400000000,500000000
+
+Sweep mode (--sweep) evaluates every timing parameter over a frequency range
+at once and reports where each cycle count steps and which distinct RDD
+timing encodings result, without building a binary per frequency:
+
+    python3 ddr_compiler_final.py ddrs/DDR3/W631GU6NG.cfg - --sweep 200e6:600e6:1e6
+
+Parsed .cfg files are cached in process and on disk, in $DDR_CFG_CACHE or
+else $XDG_CACHE_HOME/thingino-cloner/ddr_cfg_cache.json (XDG_CACHE_HOME
+defaults to ~/.cache); entries are reused while the file's mtime/size or
+content hash is unchanged. Use --no-cache to bypass.
 """
 
-import struct
+import os
 import sys
+import csv
+import json
+import atexit
+import hashlib
 import argparse
+import multiprocessing
 from pathlib import Path
+from typing import NamedTuple, Optional, Union
 import configparser
-import zlib
+
+from ddr_layout import LAYOUT_324, RDD_OFFSET
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PLATFORMS = ['t31', 't30', 't41']
+
+# FIDB/RDD data sizes after the 8-byte section headers (324-byte format)
+FIDB_DATA_SIZE = 0xB8
+RDD_DATA_SIZE = 0x7C
+
+# RDD timing bytes: (offset in RDD data, timing parameter, default cycles)
+RDD_TIMING_FIELDS = (
+    (0x20, 'tRAS', 18),
+    (0x21, 'tRC', 24),
+    (0x22, 'tRCD', 6),
+    (0x23, 'tRP', 6),
+    (0x24, 'tRFC', 21),
+    (0x26, 'tRTP', 4),
+    (0x28, 'tFAW', 18),
+    (0x2a, 'tRRD', 4),
+    (0x2b, 'tWTR', 3),
+)
+RDD_TIMING_NAMES = {name for _, name, _ in RDD_TIMING_FIELDS}
+
+# Parsed .cfg cache (bump the version when the record format changes)
+CFG_CACHE_VERSION = 1
+CACHE_DIR_NAME = 'thingino-cloner'
+CFG_CACHE_NAME = 'ddr_cfg_cache.json'
 
 # U-Boot timing converter classes (copied from ddr_compiler_uboot.py)
 class DDRParamConverter:
     """Convert DDR timing parameters based on U-Boot logic"""
 
-    def __init__(self, freq_hz):
+    def __init__(self, freq_hz, verbose=True):
         self.ps_per_tck = 1000000000 // (freq_hz // 1000)
         self.freq_hz = freq_hz
-        print(f"[*] DDR Frequency: {freq_hz / 1e6:.1f} MHz")
-        print(f"[*] Clock period: {self.ps_per_tck} ps")
+        if verbose:
+            print(f"[*] DDR Frequency: {freq_hz / 1e6:.1f} MHz")
+            print(f"[*] Clock period: {self.ps_per_tck} ps")
 
     def ps2cycle_ceil(self, ps, div_tck=1):
         if ps == -1:
@@ -37,63 +91,217 @@ class DDRParamConverter:
     def tck2ps(self, tck):
         return tck * self.ps_per_tck
 
+class SweepConverter:
+    """DDRParamConverter over an array of frequencies (integer-exact NumPy)
+
+    Drop-in for DDRParamConverter in the encoders: every conversion returns
+    an int64 array with one entry per frequency.
+    """
+
+    def __init__(self, freqs_hz):
+        self.freq_hz = np.asarray(freqs_hz, dtype=np.int64)
+        self.ps_per_tck = 1000000000 // (self.freq_hz // 1000)
+
+    def ps2cycle_ceil(self, ps, div_tck=1):
+        if np.isscalar(ps) and ps == -1:
+            return np.zeros_like(self.ps_per_tck)
+        return (ps + div_tck * self.ps_per_tck - 1) // self.ps_per_tck
+
+    def ps2cycle_floor(self, ps):
+        if np.isscalar(ps) and ps == -1:
+            return np.zeros_like(self.ps_per_tck)
+        return ps // self.ps_per_tck
+
+    def ns2ps(self, ns):
+        return ns * 1000
+
+    def tck2ps(self, tck):
+        return tck * self.ps_per_tck
+
+class DDRParam(NamedTuple):
+    """One .cfg value; ps is pre-resolved unless it depends on the clock (tck)"""
+    value: Union[int, str]
+    unit: Optional[str]
+    ps: Optional[Union[int, str]]
+
+def parse_cfg_text(text, source):
+    """Parse the [ddr] section of a .cfg file into {KEY: DDRParam}"""
+    config = configparser.ConfigParser()
+    config.read_string(text, source=str(source))
+
+    if 'ddr' not in config:
+        raise ValueError(f"No [ddr] section in {source}")
+
+    params = {}
+    for key, value in config['ddr'].items():
+        value = value.strip('"')
+        parts = value.split(',')
+
+        if len(parts) == 2:
+            val_str, unit = parts
+            try:
+                val = int(val_str) if val_str != '-1' else -1
+            except ValueError:
+                val = val_str
+            unit = unit.strip()
+        else:
+            val, unit = value, None
+
+        # Resolve to picoseconds now unless the clock period is needed
+        if val == -1:
+            ps = -1
+        elif unit == 'tck' or (unit in ('ns', 'ps') and not isinstance(val, int)):
+            ps = None
+        elif unit == 'ns':
+            ps = val * 1000
+        else:
+            ps = val
+
+        params[key.upper()] = DDRParam(val, unit, ps)
+    return params
+
+def detect_ddr_type(path):
+    """Detect DDR type from the .cfg path"""
+    path_str = str(path).lower()
+    if 'lpddr3' in path_str:
+        return 'LPDDR3'
+    elif 'lpddr2' in path_str:
+        return 'LPDDR2'
+    elif 'lpddr' in path_str:
+        return 'LPDDR'
+    elif 'ddr3' in path_str:
+        return 'DDR3'
+    elif 'ddr2' in path_str:
+        return 'DDR2'
+    return 'DDR2'
+
+def cache_dir():
+    """thingino-cloner cache directory under $XDG_CACHE_HOME, or ~/.cache when it is unset"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / CACHE_DIR_NAME
+
+def default_cache_path():
+    """Parsed .cfg cache file in the cache directory"""
+    return cache_dir() / CFG_CACHE_NAME
+
+def write_cache_file(path, write):
+    """Atomically replace path with the file write(tmp_path) creates
+
+    Returns False if the cache location is not writable; a read-only cache
+    only costs recomputing its contents next time.
+    """
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+        write(tmp)
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        return False
+
+class DDRConfigCache:
+    """Parsed .cfg records, memoized in process and persisted as JSON"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.environ.get('DDR_CFG_CACHE') or default_cache_path())
+        self._memo = {}        # resolved path -> (mtime_ns, size, ddr_type, params)
+        self._entries = None   # on-disk entries, loaded on first use
+        self._dirty = False
+
+    def _load(self):
+        self._entries = {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('version') == CFG_CACHE_VERSION:
+                self._entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        """Write the on-disk cache if anything changed (atomic replace)"""
+        if not self._dirty:
+            return
+
+        def write(tmp):
+            with open(tmp, 'w') as f:
+                json.dump({'version': CFG_CACHE_VERSION, 'entries': self._entries}, f)
+
+        if write_cache_file(self.path, write):
+            self._dirty = False
+
+    def load(self, cfg_path):
+        """Return (ddr_type, params) for cfg_path, parsing only if it changed"""
+        key = os.path.abspath(cfg_path)
+        st = os.stat(key)
+
+        memo = self._memo.get(key)
+        if memo is not None and memo[0] == st.st_mtime_ns and memo[1] == st.st_size:
+            return memo[2], memo[3]
+
+        if self._entries is None:
+            self._load()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+            params = {k: DDRParam(*v) for k, v in entry['params'].items()}
+            self._memo[key] = (st.st_mtime_ns, st.st_size, entry['ddr_type'], params)
+            return entry['ddr_type'], params
+
+        data = Path(key).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        if entry is not None and entry['sha256'] == digest:
+            # Touched but unchanged: refresh the stat fields only
+            params = {k: DDRParam(*v) for k, v in entry['params'].items()}
+            ddr_type = entry['ddr_type']
+        else:
+            params = parse_cfg_text(data.decode('utf-8', errors='replace'), cfg_path)
+            ddr_type = detect_ddr_type(cfg_path)
+
+        self._entries[key] = {
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'sha256': digest,
+            'ddr_type': ddr_type,
+            'params': {k: list(v) for k, v in params.items()},
+        }
+        if not self._dirty:
+            self._dirty = True
+            atexit.register(self.save)
+        self._memo[key] = (st.st_mtime_ns, st.st_size, ddr_type, params)
+        return ddr_type, params
+
+CFG_CACHE = DDRConfigCache()
+
 class DDRConfig:
     """Parse and hold DDR configuration from .cfg file"""
 
-    def __init__(self, cfg_path):
+    def __init__(self, cfg_path, verbose=True, cache=True):
         self.path = Path(cfg_path)
         self.params = {}
         self.ddr_type = None
+        self.verbose = verbose
+        self.cache = cache
         self._parse()
 
     def _parse(self):
-        config = configparser.ConfigParser()
-        config.read(self.path)
-
-        if 'ddr' not in config:
-            raise ValueError(f"No [ddr] section in {self.path}")
-
-        for key, value in config['ddr'].items():
-            value = value.strip('"')
-            parts = value.split(',')
-
-            if len(parts) == 2:
-                val_str, unit = parts
-                try:
-                    val = int(val_str) if val_str != '-1' else -1
-                except ValueError:
-                    val = val_str
-
-                self.params[key.upper()] = {
-                    'value': val,
-                    'unit': unit.strip()
-                }
-            else:
-                self.params[key.upper()] = {
-                    'value': value,
-                    'unit': None
-                }
-
-        # Detect DDR type from path
-        path_str = str(self.path).lower()
-        if 'lpddr3' in path_str:
-            self.ddr_type = 'LPDDR3'
-        elif 'lpddr2' in path_str:
-            self.ddr_type = 'LPDDR2'
-        elif 'lpddr' in path_str:
-            self.ddr_type = 'LPDDR'
-        elif 'ddr3' in path_str:
-            self.ddr_type = 'DDR3'
-        elif 'ddr2' in path_str:
-            self.ddr_type = 'DDR2'
+        if not self.path.is_file():
+            raise FileNotFoundError(f"Config file not found: {self.path}")
+
+        if self.cache:
+            self.ddr_type, self.params = CFG_CACHE.load(self.path)
         else:
-            self.ddr_type = 'DDR2'
+            self.params = parse_cfg_text(self.path.read_text(), self.path)
+            self.ddr_type = detect_ddr_type(self.path)
 
-        print(f"[*] Detected DDR type: {self.ddr_type}")
+        if self.verbose:
+            print(f"[*] Detected DDR type: {self.ddr_type}")
 
     def get(self, key, default=None):
         if key.upper() in self.params:
-            return self.params[key.upper()]['value']
+            return self.params[key.upper()].value
         return default
 
     def get_ps(self, key, converter, default=0):
@@ -101,20 +309,13 @@ class DDRConfig:
             return default
 
         param = self.params[key.upper()]
-        value = param['value']
-        unit = param['unit']
-
-        if value == -1:
-            return -1
-
-        if unit == 'ns':
-            return value * 1000
-        elif unit == 'ps':
-            return value
-        elif unit == 'tck':
-            return converter.tck2ps(value)
-        else:
-            return value
+        if param.ps is not None:
+            return param.ps
+
+        # Clock-dependent (tck) value
+        if param.unit == 'tck':
+            return converter.tck2ps(param.value)
+        return param.value * 1000 if param.unit == 'ns' else param.value
 
 class DDR2Encoder:
     """Encode DDR2 parameters"""
@@ -276,8 +477,8 @@ class LPDDR2Encoder:
         return timing
 
 class BinaryBuilder:
-    """Build the final 324-byte DDR binary"""
-    
+    """Build the final 324-byte DDR binary (field offsets: ddr_layout.LAYOUT_324)"""
+
     def __init__(self, platform='t31'):
         self.platform_config = {
             't31': {
@@ -310,41 +511,36 @@ class BinaryBuilder:
 
         self.config = self.platform_config[platform]
     
-    def build_fidb(self, ddr_freq=None):
+    def fidb_fields(self, ddr_freq=None):
         """
-        Build FIDB section (192 bytes total: 8 header + 184 data)
+        FIDB section fields (192 bytes total: 8 header + 184 data)
         Based on reverse engineering of ddr_extracted.bin
         """
-        fidb_data = bytearray(184)
-
         # Use passed frequency if available, otherwise use platform default
         freq_hz = ddr_freq if ddr_freq is not None else self.config['ddr_freq']
 
-        # Fill in known fields from reverse engineering
-        struct.pack_into('<I', fidb_data, 0x00, self.config['crystal_freq'])
-        struct.pack_into('<I', fidb_data, 0x04, self.config['cpu_freq'])
-        struct.pack_into('<I', fidb_data, 0x08, freq_hz)
-        struct.pack_into('<I', fidb_data, 0x0c, 0x00000000)  # Reserved
-        struct.pack_into('<I', fidb_data, 0x10, 0x00000001)  # Enable flag
-        struct.pack_into('<I', fidb_data, 0x14, self.config['uart_baud'])
-        struct.pack_into('<I', fidb_data, 0x18, 0x00000001)  # Flag
-        struct.pack_into('<I', fidb_data, 0x20, self.config['mem_size'])
-        struct.pack_into('<I', fidb_data, 0x24, 0x00000001)
-        struct.pack_into('<I', fidb_data, 0x2c, 0x00000011)
-        struct.pack_into('<I', fidb_data, 0x30, 0x19800000)  # Platform ID
-
-        # Build header
-        header = b'FIDB' + struct.pack('<I', len(fidb_data))
-
-        return header + bytes(fidb_data)
-    
-    def build_rdd(self, ddr_config, timing_params, ddr_freq=None):
+        return {
+            'fidb_magic': b'FIDB',
+            'fidb_size': FIDB_DATA_SIZE,
+            'crystal_freq': self.config['crystal_freq'],
+            'cpu_freq': self.config['cpu_freq'],
+            'ddr_freq': freq_hz,
+            'fidb_enable': 0x00000001,
+            'uart_baud': self.config['uart_baud'],
+            'fidb_flag': 0x00000001,
+            'mem_size': self.config['mem_size'],
+            'fidb_0x2c': 0x00000001,
+            'fidb_0x34': 0x00000011,
+            'platform_id': 0x19800000,
+        }
+
+    def rdd_fields(self, ddr_config, timing_params, ddr_freq=None):
         """
-        Build RDD section (132 bytes total: 8 header + 124 data)
+        RDD section fields (132 bytes total: 8 header + 124 data)
         Uses U-Boot calculated timing + reverse-engineered structure
-        """
-        rdd_data = bytearray(124)
 
+        ddr_freq and the timing values may be NumPy arrays (see build_many).
+        """
         # DDR type mapping (discovered from reverse engineering)
         # Reference binary has type=2 for LPDDR2
         # Vendor mapping observed from stock logs: DDR3 reports as type 0
@@ -356,32 +552,27 @@ class BinaryBuilder:
             'LPDDR3': 4,
         }
 
-        # Offset 0x00: CRC (fill in later)
-        # Offset 0x04: DDR type
-        ddr_type = ddr_type_map.get(ddr_config.ddr_type, 0)
-        struct.pack_into('<I', rdd_data, 0x04, ddr_type)
-
-        # Offset 0x08-0x0f: Reserved
-
-        # Offset 0x10: Frequency-related value
         # Use passed frequency if available, otherwise use platform default
         freq_hz = ddr_freq if ddr_freq is not None else self.config['ddr_freq']
-        freq_val = freq_hz // 100000  # Divide by 100k
-        struct.pack_into('<I', rdd_data, 0x10, freq_val)
-        
-        # Offset 0x14: Another frequency value
-        struct.pack_into('<I', rdd_data, 0x14, 0x00002800)
-        
-        # Offset 0x18+: Timing parameters (byte-level encoding)
-        # Based on analysis of ddr_extracted.bin and U-Boot source
-        
-        # These are educated guesses based on reverse engineering
-        # Will need refinement based on testing
-        rdd_data[0x18] = 0x01
-        rdd_data[0x19] = 0x00
-        rdd_data[0x1a] = 0xc2
-        rdd_data[0x1b] = 0x00
-        
+
+        fields = {
+            # Header: padding + "RDD" + size (matches vendor layout)
+            'rdd_magic': b'\x00RDD',
+            'rdd_size': RDD_DATA_SIZE,
+            'ddr_type': ddr_type_map.get(ddr_config.ddr_type, 0),
+            'freq_val': freq_hz // 100000,     # Divide by 100k
+            'freq_aux': 0x00002800,            # Another frequency value
+            # These are educated guesses based on reverse engineering
+            # Will need refinement based on testing
+            'rdd_0x18': b'\x01\x00\xc2\x00',
+            'rdd_0x25': 0x04,
+            'rdd_0x27': 0x20,
+            'rdd_0x29': 0x00,
+            # DQ mapping table (last 20 bytes)
+            # Default sequential mapping with some swaps
+            'dq_map': bytes([12, 13, 14, 3, 4, 5, 6, 7, 8, 9, 10, 11, 0, 1, 2, 15, 16, 17, 18, 19]),
+        }
+
         # Memory geometry
         row = ddr_config.get('ROW', 13)
         col = ddr_config.get('COL', 10)
@@ -409,79 +600,259 @@ class BinaryBuilder:
             }
             rl_wl_encoded = encoding_table.get(combined, 1)
 
-            # Both 0x1c and 0x1d use the same RL/WL encoding
-            rdd_data[0x1c] = rl_wl_encoded & 0xFF
-            rdd_data[0x1d] = rl_wl_encoded & 0xFF
+            # Both CL and BL bytes use the same RL/WL encoding
+            fields['cl'] = rl_wl_encoded & 0xFF
+            fields['bl'] = rl_wl_encoded & 0xFF
         else:
             # DDR2/DDR3 use CL/BL
-            bl = ddr_config.get('BL', 8)
-            cl = ddr_config.get('CL', 6)
-            rdd_data[0x1c] = cl & 0xFF
-            rdd_data[0x1d] = bl & 0xFF
-
-        rdd_data[0x1e] = row & 0xFF
-        rdd_data[0x1f] = (col - 6) & 0xFF  # COL encoding: subtract 6
-        
+            fields['cl'] = ddr_config.get('CL', 6) & 0xFF
+            fields['bl'] = ddr_config.get('BL', 8) & 0xFF
+
+        fields['row_bits'] = row & 0xFF
+        fields['col_bits_minus6'] = (col - 6) & 0xFF  # COL encoding: subtract 6
+
         # Timing parameters from U-Boot calculations
-        rdd_data[0x20] = timing_params.get('tRAS', 18) & 0xFF
-        rdd_data[0x21] = timing_params.get('tRC', 24) & 0xFF
-        rdd_data[0x22] = timing_params.get('tRCD', 6) & 0xFF
-        rdd_data[0x23] = timing_params.get('tRP', 6) & 0xFF
-        
-        rdd_data[0x24] = timing_params.get('tRFC', 21) & 0xFF
-        rdd_data[0x25] = 0x04
-        rdd_data[0x26] = timing_params.get('tRTP', 4) & 0xFF
-        rdd_data[0x27] = 0x20
-        
-        rdd_data[0x28] = timing_params.get('tFAW', 18) & 0xFF
-        rdd_data[0x29] = 0x00
-        rdd_data[0x2a] = timing_params.get('tRRD', 4) & 0xFF
-        rdd_data[0x2b] = timing_params.get('tWTR', 3) & 0xFF
-        
-        # DQ mapping table (last 20 bytes)
-        # Default sequential mapping with some swaps
-        dq_mapping = [12, 13, 14, 3, 4, 5, 6, 7, 8, 9, 10, 11, 0, 1, 2, 15, 16, 17, 18, 19]
-        dq_start = len(rdd_data) - 20
-        for i, val in enumerate(dq_mapping):
-            rdd_data[dq_start + i] = val
-        
-        # Calculate CRC32 checksum
-        crc = zlib.crc32(bytes(rdd_data[4:])) & 0xFFFFFFFF
-        struct.pack_into('<I', rdd_data, 0x00, crc)
-        
-        # Build header: padding + "RDD" + size (matches vendor layout)
-        header = b'\x00' + b'RDD' + struct.pack('<I', len(rdd_data))
-
-        return header + bytes(rdd_data)
+        for _, name, default in RDD_TIMING_FIELDS:
+            fields[name] = timing_params.get(name, default) & 0xFF
+
+        # CRC32 over RDD data[4:] is filled in by the layout
+        return fields
+
+    def build_fidb(self, ddr_freq=None):
+        """Build FIDB section (192 bytes)"""
+        return LAYOUT_324.encode(self.fidb_fields(ddr_freq))[:RDD_OFFSET]
+
+    def build_rdd(self, ddr_config, timing_params, ddr_freq=None):
+        """Build RDD section (132 bytes)"""
+        return LAYOUT_324.encode(self.rdd_fields(ddr_config, timing_params, ddr_freq))[RDD_OFFSET:]
 
     def build(self, ddr_config, timing_params, ddr_freq=None):
         """Build complete 324-byte binary"""
-        fidb = self.build_fidb(ddr_freq)
-        rdd = self.build_rdd(ddr_config, timing_params, ddr_freq)
+        fields = self.fidb_fields(ddr_freq)
+        fields.update(self.rdd_fields(ddr_config, timing_params, ddr_freq))
+        return LAYOUT_324.encode(fields)
+
+    def build_many(self, ddr_config, timing_arrays, freqs_hz):
+        """
+        Build one 324-byte binary per frequency in a single layout pass.
+
+        timing_arrays maps parameter -> cycle counts per frequency (as returned
+        by sweep_timings); returns the binaries in frequency order.
+        """
+        freqs_hz = np.asarray(freqs_hz, dtype=np.int64)
+        fields = self.fidb_fields(freqs_hz)
+        fields.update(self.rdd_fields(ddr_config, timing_arrays, freqs_hz))
+
+        records = LAYOUT_324.empty(len(freqs_hz))
+        for name, value in fields.items():
+            records[name] = value
+        return LAYOUT_324.split(LAYOUT_324.encode_many(records))
 
-        binary = fidb + rdd
+def select_encoder(config, converter, verbose=True):
+    """Pick the timing encoder for the config's DDR type"""
+    if config.ddr_type == 'DDR2':
+        return DDR2Encoder(config, converter)
+    elif config.ddr_type == 'DDR3':
+        return DDR3Encoder(config, converter)
+    elif config.ddr_type in ['LPDDR2', 'LPDDR']:
+        return LPDDR2Encoder(config, converter)
+
+    if verbose:
+        print(f"[!] DDR type {config.ddr_type} not fully implemented")
+        print("[!] Using DDR2 encoder as fallback")
+    return DDR2Encoder(config, converter)
+
+# Parameters stepping more often than this are summarized in sweep output
+MAX_LISTED_BREAKPOINTS = 32
+
+def parse_freq_range(spec):
+    """Parse START:STOP[:STEP] in Hz (STOP inclusive, STEP default 1 MHz)"""
+    parts = [int(float(p)) for p in spec.split(':')]
+    if len(parts) == 2:
+        parts.append(1000000)
+    if len(parts) != 3 or parts[2] <= 0 or parts[0] < 1000 or parts[1] < parts[0]:
+        raise ValueError(f"Invalid frequency range: {spec}")
+    start, stop, step = parts
+    return np.arange(start, stop + 1, step, dtype=np.int64)
+
+def sweep_timings(config, freqs_hz):
+    """Timing cycle counts for every frequency; {param: int64 array}"""
+    converter = SweepConverter(freqs_hz)
+    timing = select_encoder(config, converter, verbose=False).encode_timing_params()
+    return {name: np.broadcast_to(np.asarray(values, dtype=np.int64), converter.freq_hz.shape)
+            for name, values in timing.items()}
+
+def print_sweep(config, freqs_hz, timing):
+    """Print per-parameter breakpoints and the distinct RDD timing encodings"""
+    freqs_hz = np.asarray(freqs_hz, dtype=np.int64)
+    print(f"[*] Sweep: {config.path.name} ({config.ddr_type}), "
+          f"{freqs_hz[0] / 1e6:.1f}-{freqs_hz[-1] / 1e6:.1f} MHz, {len(freqs_hz)} points")
+
+    print("\nBreakpoints (first frequency with the new cycle count):")
+    for name in sorted(timing):
+        values = timing[name]
+        steps = np.flatnonzero(values[1:] != values[:-1]) + 1
+        if len(steps) > MAX_LISTED_BREAKPOINTS:
+            changes = (f"{len(steps)} steps, {values[-1]} at {freqs_hz[-1] / 1e6:.1f} MHz")
+        else:
+            changes = ', '.join(f"{freqs_hz[i] / 1e6:.1f} MHz->{values[i]}" for i in steps)
+        print(f"  {name:6s} {values[0]:5d} at {freqs_hz[0] / 1e6:.1f} MHz"
+              f"{'; ' + changes if changes else ''}")
+        if values.max() > 0xFF and name in RDD_TIMING_NAMES:
+            print(f"         [!] exceeds 255 cycles, RDD byte is truncated")
+
+    # RDD timing bytes per frequency, grouped into runs of equal encoding
+    encoded = np.stack([timing[name] & 0xFF if name in timing else np.full(len(freqs_hz), default)
+                        for _, name, default in RDD_TIMING_FIELDS], axis=1)
+    changes = np.flatnonzero(np.any(encoded[1:] != encoded[:-1], axis=1)) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes, [len(freqs_hz)])) - 1
+    distinct = {bytes(row.astype(np.uint8)) for row in encoded[starts]}
+
+    names = ' '.join(f"{name:>4s}" for _, name, _ in RDD_TIMING_FIELDS)
+    print(f"\nRDD timing encodings ({len(distinct)} distinct, {len(starts)} ranges):")
+    print(f"  {'Frequency range (MHz)':23s} {names}")
+    for start, end in zip(starts, ends):
+        row = ' '.join(f"{v:4d}" for v in encoded[start])
+        print(f"  {freqs_hz[start] / 1e6:9.1f} - {freqs_hz[end] / 1e6:9.1f}   {row}")
+
+def batch_build(job):
+    """
+    Build one config for several (platform, freq) pairs (process pool worker).
+
+    job is (config, cfg_name, [(platform, freq)], output_dir); returns manifest
+    rows (cfg, platform, freq_hz, ddr_type, output, sha256).
+    """
+    config, cfg_name, targets, output_dir = job
+    rows = []
+
+    # Every frequency of a platform in one sweep + layout pass when NumPy is available
+    platforms = {}
+    for platform, freq in targets:
+        builder = platforms.setdefault(platform, (BinaryBuilder(platform), []))[0]
+        platforms[platform][1].append(freq if freq else builder.config['ddr_freq'])
+
+    built = []
+    for platform, (builder, freqs) in platforms.items():
+        if np is not None:
+            binaries = builder.build_many(config, sweep_timings(config, freqs), freqs)
+        else:
+            binaries = []
+            for ddr_freq in freqs:
+                converter = DDRParamConverter(ddr_freq, verbose=False)
+                timing = select_encoder(config, converter, verbose=False).encode_timing_params()
+                binaries.append(builder.build(config, timing, ddr_freq))
+        built.extend(zip([platform] * len(freqs), freqs, binaries))
+
+    for platform, ddr_freq, binary in built:
+        output = Path(output_dir) / config.ddr_type / f"{config.path.stem}_{platform}_{ddr_freq // 1000000}mhz.bin"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_bytes(binary)
+
+        rows.append((cfg_name, platform, ddr_freq, config.ddr_type,
+                     str(output), hashlib.sha256(binary).hexdigest()))
+
+    return rows
+
+def run_batch(args):
+    """Compile every .cfg under args.config for each platform and frequency"""
+    cfg_root = Path(args.config)
+    if not cfg_root.exists():
+        print(f"ERROR: Config file or directory not found: {cfg_root}")
+        return False
+    cfg_files = [cfg_root] if cfg_root.is_file() else sorted(cfg_root.rglob('*.cfg'))
+    platforms = args.platforms.split(',')
+    freqs = [int(f) for f in args.freqs.split(',')] if args.freqs else [args.freq]
+    targets = [(platform, freq) for platform in platforms for freq in freqs]
+
+    for platform in platforms:
+        if platform not in PLATFORMS:
+            print(f"ERROR: Unknown platform: {platform}")
+            return False
+
+    # Parse every config once; workers receive the parsed objects
+    jobs = []
+    for cfg_file in cfg_files:
+        try:
+            config = DDRConfig(cfg_file, verbose=args.verbose, cache=not args.no_cache)
+        except (ValueError, configparser.Error) as e:
+            if args.verbose:
+                print(f"[!] Skipping {cfg_file}: {e}")
+            continue
+        cfg_name = str(cfg_file.relative_to(cfg_root)) if cfg_root.is_dir() else cfg_file.name
+        jobs.append((config, cfg_name, targets, args.output))
+
+    if args.jobs > 1:
+        with multiprocessing.Pool(args.jobs) as pool:
+            results = pool.map(batch_build, jobs)
+    else:
+        results = [batch_build(job) for job in jobs]
 
-        # Verify size
-        if len(binary) != 324:
-            print(f"[!] Warning: Binary size is {len(binary)}, expected 324")
+    rows = [row for result in results for row in result]
 
-        return binary
+    manifest = Path(args.output) / 'manifest.csv'
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['cfg', 'platform', 'freq_hz', 'ddr_type', 'output', 'sha256'])
+        writer.writerows(rows)
+
+    if args.verbose:
+        for row in rows:
+            print(f"[+] {row[4]}  {row[5]}")
+
+    skipped = len(cfg_files) - len(jobs)
+    print(f"[+] Built {len(rows)} binaries from {len(jobs)} configs"
+          f"{f' ({skipped} skipped)' if skipped else ''} -> {manifest}")
+    return True
 
 def main():
     parser = argparse.ArgumentParser(
         description='DDR Binary Compiler - Final Version'
     )
-    parser.add_argument('config', help='Input .cfg file')
-    parser.add_argument('output', help='Output .bin file')
+    parser.add_argument('config', help='Input .cfg file (--batch: directory of .cfg files)')
+    parser.add_argument('output', help='Output .bin file (--batch: output directory)')
     parser.add_argument('--platform', '-p', default='t31',
-                       choices=['t31', 't30', 't41'],
+                       choices=PLATFORMS,
                        help='Target platform (default: t31)')
     parser.add_argument('--freq', type=int, default=None,
                        help='DDR frequency in Hz (default: from platform config)')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Verbose output')
+    parser.add_argument('--batch', action='store_true',
+                       help='Compile every .cfg under config for all platforms/frequencies')
+    parser.add_argument('--platforms', default=','.join(PLATFORMS),
+                       help='Batch: comma-separated platforms (default: all)')
+    parser.add_argument('--freqs', default=None,
+                       help='Batch: comma-separated DDR frequencies in Hz (default: --freq or platform config)')
+    parser.add_argument('--jobs', '-j', type=int, default=multiprocessing.cpu_count(),
+                       help='Batch: worker processes (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Parse .cfg files without the parsed-config cache')
+    parser.add_argument('--sweep', metavar='START:STOP[:STEP]',
+                       help='Report timing breakpoints over a DDR frequency range in Hz (no output written)')
     
     args = parser.parse_args()
+
+    if args.batch:
+        sys.exit(0 if run_batch(args) else 1)
+
+    if not Path(args.config).is_file():
+        print(f"ERROR: Config file not found: {args.config}")
+        sys.exit(1)
+
+    if args.sweep:
+        if np is None:
+            print("ERROR: numpy not found. Install with: pip install numpy")
+            sys.exit(1)
+        try:
+            freqs = parse_freq_range(args.sweep)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        config = DDRConfig(args.config, verbose=False, cache=not args.no_cache)
+        print_sweep(config, freqs, sweep_timings(config, freqs))
+        sys.exit(0)
     
     print("=" * 70)
     print("DDR Binary Compiler - Final Version")
@@ -490,7 +861,7 @@ def main():
     
     # Load config
     print(f"[*] Loading config: {args.config}")
-    config = DDRConfig(args.config)
+    config = DDRConfig(args.config, cache=not args.no_cache)
 
     # Build binary builder to get platform config
     builder = BinaryBuilder(args.platform)
@@ -503,16 +874,7 @@ def main():
     print()
 
     # Select encoder based on DDR type
-    if config.ddr_type == 'DDR2':
-        encoder = DDR2Encoder(config, converter)
-    elif config.ddr_type == 'DDR3':
-        encoder = DDR3Encoder(config, converter)
-    elif config.ddr_type in ['LPDDR2', 'LPDDR']:
-        encoder = LPDDR2Encoder(config, converter)
-    else:
-        print(f"[!] DDR type {config.ddr_type} not fully implemented")
-        print("[!] Using DDR2 encoder as fallback")
-        encoder = DDR2Encoder(config, converter)
+    encoder = select_encoder(config, converter)
 
     # Encode parameters
     print("[*] Encoding parameters...")
@@ -535,7 +897,6 @@ def main():
     print(f"[+] Generated: {args.output} ({len(binary)} bytes)")
     
     # Calculate SHA256
-    import hashlib
     sha256 = hashlib.sha256(binary).hexdigest()
     print(f"[+] SHA256: {sha256}")
     
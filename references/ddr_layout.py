@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+DDR Binary Layouts - FIDB + RDD field map for the 324- and 384-byte formats
+
+One declarative field table per format, shared by the compiler
+(ddr_compiler_final.py) and the capture analyzers. Each layout is compiled
+once into a struct.Struct (one pack/unpack call per binary) and, when NumPy
+is installed, a structured dtype (one frombuffer/tobytes call for any number
+of binaries).
+
+Offsets are absolute within the binary:
+
+    0x00  FIDB header ("FIDB" + size 0xB8) + 184 bytes platform config
+    0xC0  RDD header ("\\x00RDD" + size) + RDD data
+          324-byte format: size 0x7C, CRC32 of RDD data[4:] at 0xC8
+          384-byte format: size 0xB8, chip name at 0xC8, no CRC located yet
+          T20 vendor blob: 324 bytes but size 0xC4, RDD data not mapped
+
+Only fields whose position has been confirmed against reference binaries are
+named; everything else stays zero on encode and is ignored on decode.
+
+Usage:
+    python3 ddr_layout.py <ddr.bin> [...]
+"""
+
+import sys
+import struct
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FIDB_OFFSET = 0x00
+RDD_OFFSET = 0xC0
+
+# Field tables: (name, absolute offset, struct format without byte order)
+FIDB_FIELDS = (
+    ('fidb_magic', 0x00, '4s'),
+    ('fidb_size', 0x04, 'I'),
+    ('crystal_freq', 0x08, 'I'),
+    ('cpu_freq', 0x0C, 'I'),
+    ('ddr_freq', 0x10, 'I'),
+    ('fidb_enable', 0x18, 'I'),
+    ('uart_baud', 0x1C, 'I'),
+    ('fidb_flag', 0x20, 'I'),
+    ('mem_size', 0x28, 'I'),
+    ('fidb_0x2c', 0x2C, 'I'),
+    ('fidb_0x34', 0x34, 'I'),
+    ('platform_id', 0x38, 'I'),
+)
+
+RDD_HEADER_FIELDS = (
+    ('rdd_magic', 0xC0, '4s'),
+    ('rdd_size', 0xC4, 'I'),
+)
+
+# 324-byte format (XBurst1): RDD data at 0xC8, offsets below are data + 0xC8
+RDD324_FIELDS = (
+    ('rdd_crc', 0xC8, 'I'),
+    ('ddr_type', 0xCC, 'I'),
+    ('freq_val', 0xD8, 'I'),          # DDR frequency / 100 kHz
+    ('freq_aux', 0xDC, 'I'),
+    ('rdd_0x18', 0xE0, '4s'),
+    ('cl', 0xE4, 'B'),                # RL/WL code on LPDDR/LPDDR2
+    ('bl', 0xE5, 'B'),
+    ('row_bits', 0xE6, 'B'),
+    ('col_bits_minus6', 0xE7, 'B'),
+    ('tRAS', 0xE8, 'B'),
+    ('tRC', 0xE9, 'B'),
+    ('tRCD', 0xEA, 'B'),
+    ('tRP', 0xEB, 'B'),
+    ('tRFC', 0xEC, 'B'),
+    ('rdd_0x25', 0xED, 'B'),
+    ('tRTP', 0xEE, 'B'),
+    ('rdd_0x27', 0xEF, 'B'),
+    ('tFAW', 0xF0, 'B'),
+    ('rdd_0x29', 0xF1, 'B'),
+    ('tRRD', 0xF2, 'B'),
+    ('tWTR', 0xF3, 'B'),
+    ('dq_map', 0x130, '20s'),
+)
+
+# 384-byte format (XBurst2, e.g. T41N)
+RDD384_FIELDS = (
+    ('chip_name', 0xC8, '32s'),
+    ('ddr_type', 0xE8, 'I'),
+    ('ddr_freq_hz', 0xF0, 'I'),
+    ('ddrc_cfg', 0xF4, 'I'),
+    ('ddrc_ctrl', 0xF8, 'I'),
+    ('ddrc_dlmr', 0x104, 'I'),
+    ('ddrc_ddlp', 0x108, 'I'),
+    ('ddrc_mmap0', 0x10C, 'I'),
+    ('timing', 0x110, '16s'),
+    ('dq_map', 0x16C, '20s'),
+)
+
+# RDD size field -> binary size. The T20 vendor blob (vendor_ddr_t20.bin)
+# declares 0xC4 but is 324 bytes long; its RDD data does not follow
+# RDD324_FIELDS (no CRC at 0xC8, no ddr_type at 0xCC), so only its FIDB and
+# RDD header decode meaningfully.
+RDD_SIZE_324 = 0x7C
+RDD_SIZE_384 = 0xB8
+RDD_SIZE_T20_VENDOR = 0xC4
+BINARY_SIZES = {RDD_SIZE_324: 324, RDD_SIZE_384: 384, RDD_SIZE_T20_VENDOR: 324}
+
+# RDD ddr_type values in the 324-byte format
+DDR_TYPE_NAMES = {0: "DDR3", 1: "DDR2", 2: "LPDDR2/LPDDR", 4: "LPDDR3"}
+
+_NUMPY_FORMATS = {'B': 'u1', 'H': '<u2', 'I': '<u4'}
+
+class DDRLayout:
+    """A fixed-size binary layout compiled to a struct.Struct and NumPy dtype"""
+
+    def __init__(self, name: str, size: int, fields: Iterable[Tuple[str, int, str]],
+                 crc_field: Optional[str] = None):
+        self.name = name
+        self.size = size
+        self.fields = tuple(sorted(fields, key=lambda f: f[1]))
+        self.names = tuple(field[0] for field in self.fields)
+        self.offsets = {field[0]: field[1] for field in self.fields}
+        self.crc_field = crc_field
+
+        # Struct format with explicit padding between fields
+        fmt = '<'
+        position = 0
+        for field_name, offset, code in self.fields:
+            if offset < position:
+                raise ValueError(f"{name}: field {field_name} overlaps the previous field")
+            if offset > position:
+                fmt += f'{offset - position}x'
+            fmt += code
+            position = offset + struct.calcsize('<' + code)
+        if position > size:
+            raise ValueError(f"{name}: fields extend past {size} bytes")
+        if position < size:
+            fmt += f'{size - position}x'
+        self.struct = struct.Struct(fmt)
+
+        self._defaults = tuple(b'' if code.endswith('s') else 0 for _, _, code in self.fields)
+
+        self.dtype = None
+        if np is not None:
+            self.dtype = np.dtype({
+                'names': list(self.names),
+                'formats': [f'S{code[:-1]}' if code.endswith('s') else _NUMPY_FORMATS[code]
+                            for _, _, code in self.fields],
+                'offsets': [offset for _, offset, _ in self.fields],
+                'itemsize': size,
+            })
+
+    def __repr__(self):
+        return f"DDRLayout({self.name!r}, {self.size} bytes, {len(self.fields)} fields)"
+
+    def _values(self, values: Dict) -> tuple:
+        unknown = set(values) - set(self.offsets)
+        if unknown:
+            raise KeyError(f"{self.name}: unknown fields {sorted(unknown)}")
+        return tuple(values.get(name, default) for name, default in zip(self.names, self._defaults))
+
+    def encode(self, values: Dict) -> bytes:
+        """Pack a field dict into a binary (unset fields are zero, CRC filled in)"""
+        buf = bytearray(self.struct.pack(*self._values(values)))
+        if self.crc_field is not None and self.crc_field not in values:
+            struct.pack_into('<I', buf, self.offsets[self.crc_field], rdd_crc(buf))
+        return bytes(buf)
+
+    def decode(self, data) -> Dict:
+        """Unpack a binary into a field dict"""
+        return dict(zip(self.names, self.struct.unpack_from(data)))
+
+    def empty(self, count: int):
+        """Zeroed structured array of count binaries, to fill column-wise"""
+        return np.zeros(count, dtype=self.dtype)
+
+    def decode_many(self, buf):
+        """View a buffer of concatenated binaries as a structured array (no copy)"""
+        if len(buf) % self.size:
+            raise ValueError(f"{self.name}: buffer is not a multiple of {self.size} bytes")
+        return np.frombuffer(buf, dtype=self.dtype)
+
+    def encode_many(self, records) -> bytes:
+        """Concatenated binaries from a structured array, with CRCs filled in"""
+        buf = bytearray(np.ascontiguousarray(records, dtype=self.dtype).tobytes())
+        if self.crc_field is not None:
+            offset = self.offsets[self.crc_field]
+            for start in range(0, len(buf), self.size):
+                struct.pack_into('<I', buf, start + offset,
+                                 rdd_crc(memoryview(buf)[start:start + self.size]))
+        return bytes(buf)
+
+    def split(self, data: bytes) -> List[bytes]:
+        """Split concatenated binaries into a list"""
+        return [data[i:i + self.size] for i in range(0, len(data), self.size)]
+
+def rdd_crc(binary) -> int:
+    """CRC32 of the 324-byte format's RDD data after the CRC word"""
+    return zlib.crc32(binary[RDD_OFFSET + 12:]) & 0xFFFFFFFF
+
+LAYOUT_324 = DDRLayout('ddr324', 324, FIDB_FIELDS + RDD_HEADER_FIELDS + RDD324_FIELDS,
+                       crc_field='rdd_crc')
+LAYOUT_384 = DDRLayout('ddr384', 384, FIDB_FIELDS + RDD_HEADER_FIELDS + RDD384_FIELDS)
+
+LAYOUTS = {LAYOUT_324.size: LAYOUT_324, LAYOUT_384.size: LAYOUT_384}
+
+def binary_size(rdd_size: int) -> Optional[int]:
+    """Total binary size for an RDD size field, or None if unknown"""
+    return BINARY_SIZES.get(rdd_size)
+
+def rdd_mapped(fields: Dict) -> bool:
+    """True if the decoded RDD data follows the layout's field map
+
+    False for the T20 vendor blob, whose RDD data past the header is unmapped.
+    """
+    return fields['rdd_size'] != RDD_SIZE_T20_VENDOR
+
+def layout_for(data) -> Optional[DDRLayout]:
+    """Layout matching a binary's length, or None"""
+    return LAYOUTS.get(len(data))
+
+def decode(data) -> Optional[Dict]:
+    """Decode a 324- or 384-byte binary, or None for any other length"""
+    layout = layout_for(data)
+    return layout.decode(data) if layout is not None else None
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <ddr.bin> [...]")
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        with open(path, 'rb') as f:
+            data = f.read()
+        fields = decode(data)
+        if fields is None:
+            print(f"{path}: {len(data)} bytes, not a known DDR binary layout")
+            continue
+        print(f"{path}: {layout_for(data).name}")
+        if not rdd_mapped(fields):
+            print(f"  (RDD size 0x{fields['rdd_size']:X}: T20 vendor layout, RDD fields below are not mapped)")
+        for name, value in fields.items():
+            if name == 'chip_name':
+                shown = value.split(b'\x00')[0].decode('ascii', 'replace')
+            elif isinstance(value, bytes):
+                shown = value.hex()
+            else:
+                shown = f"0x{value:08X} ({value})"
+            print(f"  {name:16s} {shown}")
+        if layout_for(data).crc_field and rdd_mapped(fields):
+            ok = fields['rdd_crc'] == rdd_crc(data)
+            print(f"  CRC32(RDD[4:]) {'✓ matches' if ok else '✗ differs'}")
+
+if __name__ == '__main__':
+    main()
@@ -84,6 +84,27 @@ thingino_error_t bootstrap_device(usb_device_t* device, const bootstrap_config_t
         return result;
     }
 
+    // SPL/U-Boot from a firmware pack replace the embedded/default ones
+    if (config->firmware_pack) {
+        result = firmware_select_pack_binaries(device->info.variant, config->firmware_pack, &fw);
+        if (result != THINGINO_SUCCESS) {
+            firmware_cleanup(&fw);
+            return result;
+        }
+        printf("Using SPL/U-Boot from firmware pack %s\n", config->firmware_pack);
+    }
+
+    // Precompiled DDR binary for the selected chip replaces the reference one
+    if (config->ddr_chip && !config->config_file) {
+        result = firmware_select_ddr_config(device->info.variant,
+            config->ddr_chip, config->ddr_freq, &fw);
+        if (result != THINGINO_SUCCESS) {
+            firmware_cleanup(&fw);
+            return result;
+        }
+        printf("Using DDR table binary for %s\n", config->ddr_chip);
+    }
+
     printf("Firmware loaded - Config: %zu bytes, SPL: %zu bytes, U-Boot: %zu bytes\n",
         fw.config_size, fw.spl_size, fw.uboot_size);
 
@@ -249,3 +249,89 @@ size_t ddr_build_binary(const platform_config_t *platform, const ddr_phy_params_
     return fidb_size + rdd_size;
 }
 
+
+/**
+ * Convert picoseconds to clock cycles, rounding up
+ * (ps2cycle_ceil in references/ddr_compiler_final.py)
+ */
+static uint32_t ps_to_cycles_ceil(uint32_t ps, uint32_t ps_per_tck, uint32_t div_tck) {
+    return (uint32_t)(((uint64_t)ps + (uint64_t)div_tck * ps_per_tck - 1) / ps_per_tck);
+}
+
+/**
+ * Encode LPDDR2 RL/WL (ingenic-tools/lpddr2_params.c lines 100-127)
+ */
+static uint8_t encode_lpddr2_rl_wl(uint8_t rl, uint8_t wl) {
+    switch (wl | (rl << 4)) {
+        case 0x31: return 1;  // RL=3, WL=1
+        case 0x42: return 2;  // RL=4, WL=2
+        case 0x52: return 3;  // RL=5, WL=2
+        case 0x63: return 4;  // RL=6, WL=3
+        case 0x74: return 5;  // RL=7, WL=4
+        case 0x84: return 6;  // RL=8, WL=4
+        default:   return 1;
+    }
+}
+
+/**
+ * Compute DDR PHY parameters for a chip at a DDR frequency
+ */
+int ddr_params_from_chip(const ddr_chip_config_t *chip, uint32_t ddr_freq, ddr_phy_params_t *params) {
+    if (!chip || !params || ddr_freq < 1000) return -1;
+
+    // Same integer period as DDRParamConverter: ps_per_tck = 1e9 / (freq / 1000)
+    uint32_t ps_per_tck = 1000000000u / (ddr_freq / 1000);
+
+    memset(params, 0, sizeof(*params));
+    params->ddr_type = chip->ddr_type;
+    params->row_bits = chip->row_bits;
+    params->col_bits = chip->col_bits;
+
+    if (chip->ddr_type == 2) {
+        // LPDDR2/LPDDR: both CL and BL bytes carry the RL/WL encoding
+        params->cl = encode_lpddr2_rl_wl(chip->rl, chip->wl);
+        params->bl = params->cl;
+        params->tRFC = (uint8_t)ps_to_cycles_ceil(chip->tRFC, ps_per_tck, 1);
+    } else {
+        // DDR2/DDR3 (and LPDDR3, which the Python compiler encodes as DDR2)
+        params->cl = chip->cl;
+        params->bl = chip->bl;
+        params->tRFC = (uint8_t)(ps_to_cycles_ceil(chip->tRFC, ps_per_tck, 2) / 2);
+    }
+
+    params->tRAS = (uint8_t)ps_to_cycles_ceil(chip->tRAS, ps_per_tck, 1);
+    params->tRC = (uint8_t)ps_to_cycles_ceil(chip->tRC, ps_per_tck, 1);
+    params->tRCD = (uint8_t)ps_to_cycles_ceil(chip->tRCD, ps_per_tck, 1);
+    params->tRP = (uint8_t)ps_to_cycles_ceil(chip->tRP, ps_per_tck, 1);
+    params->tRTP = (uint8_t)ps_to_cycles_ceil(chip->tRTP, ps_per_tck, 1);
+    params->tFAW = (uint8_t)ps_to_cycles_ceil(chip->tFAW, ps_per_tck, 1);
+    params->tRRD = (uint8_t)ps_to_cycles_ceil(chip->tRRD, ps_per_tck, 1);
+    params->tWTR = (uint8_t)ps_to_cycles_ceil(chip->tWTR, ps_per_tck, 1);
+
+    return 0;
+}
+
+/**
+ * Build a DDR binary from the embedded processor and chip databases
+ */
+size_t ddr_build_chip_binary(const char *platform_name, const char *chip_name,
+    uint32_t ddr_freq, uint8_t *output) {
+    if (!platform_name || !chip_name || !output) return 0;
+
+    const processor_config_t *proc_cfg = processor_config_get(platform_name);
+    const ddr_chip_config_t *chip = ddr_chip_config_get(chip_name);
+    if (!proc_cfg || !chip) return 0;
+
+    platform_config_t platform = {
+        .crystal_freq = proc_cfg->crystal_freq,
+        .cpu_freq = proc_cfg->cpu_freq,
+        .ddr_freq = ddr_freq ? ddr_freq : proc_cfg->ddr_freq,
+        .uart_baud = proc_cfg->uart_baud,
+        .mem_size = proc_cfg->mem_size,
+    };
+
+    ddr_phy_params_t params;
+    if (ddr_params_from_chip(chip, platform.ddr_freq, &params) != 0) return 0;
+
+    return ddr_build_binary(&platform, &params, output);
+}
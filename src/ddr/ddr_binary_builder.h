@@ -20,6 +20,7 @@
 
 #include <stdint.h>
 #include <stddef.h>
+#include "ddr_config_database.h"
 
 // Binary format constants
 #define DDR_BINARY_SIZE 324  // Total size: FIDB (192 bytes) + RDD (132 bytes)
@@ -233,5 +234,33 @@ int ddr_get_platform_config(const char *platform_name, platform_config_t *config
  */
 int ddr_get_platform_config_by_variant(int variant, platform_config_t *config);
 
+/**
+ * Compute DDR PHY parameters for a chip at a DDR frequency
+ *
+ * Converts the chip's picosecond timings to clock cycles the same way as
+ * references/ddr_compiler_final.py: ps2cycle_ceil() with
+ * ps_per_tck = 1000000000 / (ddr_freq / 1000). tRFC uses div_tck=2 and is
+ * halved, except on LPDDR2 (ddr_type 2), whose CL and BL bytes also carry
+ * the RL/WL encoding instead of CL/BL.
+ *
+ * @param chip DDR chip configuration (ddr_config_database.h)
+ * @param ddr_freq DDR frequency in Hz
+ * @param params Output DDR PHY parameters
+ * @return 0 on success, -1 on error (NULL pointer or frequency below 1 kHz)
+ */
+int ddr_params_from_chip(const ddr_chip_config_t *chip, uint32_t ddr_freq, ddr_phy_params_t *params);
+
+/**
+ * Build a complete DDR binary from the embedded processor and chip databases
+ *
+ * @param platform_name Processor name (e.g., "t31x"), see processor_config_get()
+ * @param chip_name DDR chip name (e.g., "M14D1G1664A_DDR2"), see ddr_chip_config_get()
+ * @param ddr_freq DDR frequency in Hz, or 0 for the processor's default
+ * @param output Output buffer (must be at least DDR_BINARY_SIZE bytes)
+ * @return Number of bytes written (DDR_BINARY_SIZE), or 0 for an unknown processor or chip
+ */
+size_t ddr_build_chip_binary(const char *platform_name, const char *chip_name,
+    uint32_t ddr_freq, uint8_t *output);
+
 #endif // DDR_BINARY_BUILDER_H
 
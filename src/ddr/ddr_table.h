@@ -0,0 +1,45 @@
+/**
+ * Precompiled DDR Binary Table - Auto-generated by tools/generate_ddr_table.py
+ * DO NOT EDIT
+ *
+ * FIDB+RDD binaries built by ddr_build_chip_binary() for every (processor,
+ * DDR chip, frequency) combination of ddr_config_database.c, sorted for
+ * binary search. T40/T41 (384-byte DDR format) are not included.
+ */
+
+#ifndef DDR_TABLE_H
+#define DDR_TABLE_H
+
+#include <stdint.h>
+#include <stddef.h>
+
+#define DDR_TABLE_BINARY_SIZE 324
+
+typedef struct {
+    const char *platform;       // Processor name (e.g., "t31x")
+    const char *chip;           // DDR chip (e.g., "M14D1G1664A_DDR2")
+    uint32_t freq_hz;           // DDR frequency (Hz)
+    uint16_t binary;            // Index into the deduplicated binary table
+} ddr_table_entry_t;
+
+/**
+ * Look up a precompiled DDR binary (case-insensitive names, exact frequency)
+ *
+ * @param platform Processor name (e.g., "t31x")
+ * @param chip DDR chip name (e.g., "W631GU6NG_DDR3")
+ * @param freq_hz DDR frequency in Hz
+ * @param size Output parameter for binary size
+ * @return Pointer to DDR binary, or NULL if not found
+ */
+const uint8_t* ddr_table_lookup(const char *platform, const char *chip,
+    uint32_t freq_hz, size_t *size);
+
+/**
+ * List all table entries (sorted by platform, chip, frequency)
+ *
+ * @param count Output parameter for number of entries
+ * @return Array of table entries
+ */
+const ddr_table_entry_t* ddr_table_list(size_t *count);
+
+#endif // DDR_TABLE_H
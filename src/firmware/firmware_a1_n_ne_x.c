@@ -7,7 +7,7 @@
 #include <stddef.h>
 
 // a1_n_ne_x SPL (8704 bytes)
-static const uint8_t spl_a1_n_ne_x[] = {
+const uint8_t firmware_spl_a1_n_ne_x[] = {
     0x40, 0x00, 0x08, 0x3c, 0x04, 0xfc, 0x08, 0x35, 0x00, 0x60, 0x88, 0x40,
     0x00, 0x68, 0x08, 0x40, 0x80, 0x00, 0x09, 0x3c, 0x25, 0x40, 0x09, 0x01,
     0x00, 0x68, 0x88, 0x40, 0x09, 0x06, 0x00, 0x08, 0x00, 0x00, 0x00, 0x00,
@@ -737,7 +737,7 @@ static const uint8_t spl_a1_n_ne_x[] = {
 };
 
 // a1_n_ne_x U-Boot (396480 bytes)
-static const uint8_t uboot_a1_n_ne_x[] = {
+const uint8_t firmware_uboot_a1_n_ne_x[] = {
     0x02, 0x00, 0x11, 0x04, 0x00, 0x00, 0x00, 0x00, 0xa0, 0x5a, 0x16, 0x80,
     0x00, 0x00, 0xfc, 0x8f, 0x40, 0x80, 0x1d, 0x3c, 0x18, 0x80, 0x99, 0x8f,
     0x08, 0x00, 0x20, 0x03, 0x00, 0x00, 0x00, 0x00, 0x25, 0xe8, 0x80, 0x00,
@@ -33781,11 +33781,11 @@ static const uint8_t uboot_a1_n_ne_x[] = {
 };
 
 const uint8_t* firmware_a1_n_ne_x_get_spl(size_t *size) {
-    if (size) *size = sizeof(spl_a1_n_ne_x);
-    return spl_a1_n_ne_x;
+    if (size) *size = sizeof(firmware_spl_a1_n_ne_x);
+    return firmware_spl_a1_n_ne_x;
 }
 
 const uint8_t* firmware_a1_n_ne_x_get_uboot(size_t *size) {
-    if (size) *size = sizeof(uboot_a1_n_ne_x);
-    return uboot_a1_n_ne_x;
+    if (size) *size = sizeof(firmware_uboot_a1_n_ne_x);
+    return firmware_uboot_a1_n_ne_x;
 }
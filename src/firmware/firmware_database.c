@@ -7,71 +7,71 @@
 #include "firmware_registry.h"
 #include <string.h>
 #include <strings.h>
-#include <stdlib.h>
 
-// Firmware registry table
-typedef struct {
-    const char *processor;
-    const uint8_t* (*get_spl)(size_t *size);
-    const uint8_t* (*get_uboot)(size_t *size);
-} firmware_registry_entry_t;
+#define FIRMWARE_COUNT 15
 
-static const firmware_registry_entry_t firmware_registry[] = {
-    {"a1_n_ne_x", firmware_a1_n_ne_x_get_spl, firmware_a1_n_ne_x_get_uboot},
-    {"a1_nt_a", firmware_a1_nt_a_get_spl, firmware_a1_nt_a_get_uboot},
-    {"t20", firmware_t20_get_spl, firmware_t20_get_uboot},
-    {"t21", firmware_t21_get_spl, firmware_t21_get_uboot},
-    {"t23", firmware_t23_get_spl, firmware_t23_get_uboot},
-    {"t30", firmware_t30_get_spl, firmware_t30_get_uboot},
-    {"t30a", firmware_t30a_get_spl, firmware_t30a_get_uboot},
-    {"t30nl", firmware_t30nl_get_spl, firmware_t30nl_get_uboot},
-    {"t30x", firmware_t30x_get_spl, firmware_t30x_get_uboot},
-    {"t31", firmware_t31_get_spl, firmware_t31_get_uboot},
-    {"t31a", firmware_t31a_get_spl, firmware_t31a_get_uboot},
-    {"t31nl", firmware_t31nl_get_spl, firmware_t31nl_get_uboot},
-    {"t31x", firmware_t31x_get_spl, firmware_t31x_get_uboot},
-    {"t40", firmware_t40_get_spl, firmware_t40_get_uboot},
-    {"t41", firmware_t41_get_spl, firmware_t41_get_uboot},
+// One record per processor, sorted by name
+static const firmware_binary_t firmware_records[FIRMWARE_COUNT] = {
+    {"a1_n_ne_x", firmware_spl_a1_n_ne_x, 8704, firmware_uboot_a1_n_ne_x, 396480},
+    {"a1_nt_a", firmware_spl_a1_nt_a, 8704, firmware_uboot_a1_nt_a, 395504},
+    {"t20", firmware_spl_t20, 10176, firmware_uboot_t20, 390480},
+    {"t21", firmware_spl_t21, 8796, firmware_uboot_t21, 390484},
+    {"t23", firmware_spl_t23, 10092, firmware_uboot_t23, 389000},
+    {"t30", firmware_shared_spl_t30, 9884, firmware_shared_uboot_t30, 390532},
+    {"t30a", firmware_shared_spl_t30, 9884, firmware_shared_uboot_t30, 390532},
+    {"t30nl", firmware_shared_spl_t30, 9884, firmware_shared_uboot_t30, 390532},
+    {"t30x", firmware_shared_spl_t30, 9884, firmware_shared_uboot_t30, 390532},
+    {"t31", firmware_shared_spl_t31, 10092, firmware_shared_uboot_t31, 390532},
+    {"t31a", firmware_shared_spl_t31, 10092, firmware_shared_uboot_t31, 390532},
+    {"t31nl", firmware_shared_spl_t31, 10092, firmware_shared_uboot_t31, 390532},
+    {"t31x", firmware_shared_spl_t31, 10092, firmware_shared_uboot_t31, 390532},
+    {"t40", firmware_spl_t40, 12032, firmware_uboot_t40, 422540},
+    {"t41", firmware_spl_t41, 9856, firmware_uboot_t41, 404688},
 };
 
-const firmware_binary_t* firmware_get(const char *processor) {
-    if (!processor) return NULL;
+// Minimal perfect hash of the lowercased names (hash-and-displace):
+// record = firmware_hash_slot[firmware_hash(name, firmware_hash_seed[firmware_hash(name, 0) % N]) % N]
+static const uint8_t firmware_hash_seed[FIRMWARE_COUNT] = {
+    1, 0, 0, 1, 0, 1, 7, 0, 5, 0, 0, 9,
+    2, 0, 2,
+};
 
-    static firmware_binary_t result;
+static const uint8_t firmware_hash_slot[FIRMWARE_COUNT] = {
+    6, 14, 11, 13, 8, 1, 12, 7, 3, 5, 0, 2,
+    10, 9, 4,
+};
 
-    for (size_t i = 0; i < sizeof(firmware_registry) / sizeof(firmware_registry[0]); i++) {
-        if (strcasecmp(firmware_registry[i].processor, processor) == 0) {
-            result.processor = firmware_registry[i].processor;
-            result.spl_data = firmware_registry[i].get_spl(&result.spl_size);
-            result.uboot_data = firmware_registry[i].get_uboot(&result.uboot_size);
-            return &result;
-        }
+static uint32_t firmware_hash(const char *name, uint32_t seed) {
+    uint32_t h = 2166136261u ^ seed;
+    for (; *name; name++) {
+        unsigned char c = (unsigned char)*name;
+        if (c >= 'A' && c <= 'Z') c += 'a' - 'A';
+        h = (h ^ c) * 16777619u;
     }
-
-    return NULL;
+    h ^= h >> 16;
+    h *= 0x85ebca6bu;
+    h ^= h >> 13;
+    h *= 0xc2b2ae35u;
+    h ^= h >> 16;
+    return h;
 }
 
-const firmware_binary_t* firmware_list(size_t *count) {
-    if (count) {
-        *count = sizeof(firmware_registry) / sizeof(firmware_registry[0]);
-    }
-
-    // Build array of firmware_binary_t on first call
-    static firmware_binary_t *list = NULL;
-    static size_t list_size = 0;
+static int firmware_index(const char *processor) {
+    if (!processor) return -1;
 
-    if (!list) {
-        list_size = sizeof(firmware_registry) / sizeof(firmware_registry[0]);
-        list = malloc(list_size * sizeof(firmware_binary_t));
+    uint32_t seed = firmware_hash_seed[firmware_hash(processor, 0) % FIRMWARE_COUNT];
+    int index = firmware_hash_slot[firmware_hash(processor, seed) % FIRMWARE_COUNT];
+    return strcasecmp(firmware_records[index].processor, processor) == 0 ? index : -1;
+}
 
-        for (size_t i = 0; i < list_size; i++) {
-            list[i].processor = firmware_registry[i].processor;
-            list[i].spl_data = firmware_registry[i].get_spl(&list[i].spl_size);
-            list[i].uboot_data = firmware_registry[i].get_uboot(&list[i].uboot_size);
-        }
-    }
+const firmware_binary_t* firmware_get(const char *processor) {
+    int index = firmware_index(processor);
+    return index < 0 ? NULL : &firmware_records[index];
+}
 
-    return list;
+const firmware_binary_t* firmware_list(size_t *count) {
+    if (count) *count = FIRMWARE_COUNT;
+    return firmware_records;
 }
 
 int firmware_available(const char *processor) {
@@ -0,0 +1,220 @@
+#include "firmware_pack.h"
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <zlib.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+// ============================================================================
+// FIRMWARE PACK LOADER
+// ============================================================================
+// Layout (little-endian, written by tools/generate_firmware_database.py):
+//   0x00  header: "TFWPACK\0", version, entry count, entry size, index CRC32,
+//         blob alignment, reserved
+//   0x20  index: entry count x 48-byte entries sorted by (processor, kind):
+//         name[32] (lowercase, NUL-padded), kind, offset, size, blob CRC32
+//   ...   blobs, each aligned to the pack's blob alignment
+
+#define FIRMWARE_PACK_MAGIC "TFWPACK"
+#define FIRMWARE_PACK_VERSION 1
+#define FIRMWARE_PACK_HEADER_SIZE 32
+#define FIRMWARE_PACK_ENTRY_SIZE 48
+#define FIRMWARE_PACK_NAME_SIZE 32
+
+struct firmware_pack {
+    const uint8_t *data;
+    size_t size;
+    const uint8_t *index;
+    size_t count;
+#ifdef _WIN32
+    HANDLE file;
+    HANDLE mapping;
+#endif
+};
+
+static uint32_t read_le32(const uint8_t *p) {
+    return (uint32_t)p[0] | ((uint32_t)p[1] << 8) | ((uint32_t)p[2] << 16) | ((uint32_t)p[3] << 24);
+}
+
+static const uint8_t* entry_at(const firmware_pack_t *pack, size_t i) {
+    return pack->index + i * FIRMWARE_PACK_ENTRY_SIZE;
+}
+
+static void unmap_pack(firmware_pack_t *pack) {
+#ifdef _WIN32
+    if (pack->data) UnmapViewOfFile(pack->data);
+    if (pack->mapping) CloseHandle(pack->mapping);
+    if (pack->file && pack->file != INVALID_HANDLE_VALUE) CloseHandle(pack->file);
+#else
+    if (pack->data) munmap((void *)pack->data, pack->size);
+#endif
+}
+
+static int map_pack(firmware_pack_t *pack, const char *path) {
+#ifdef _WIN32
+    LARGE_INTEGER size;
+    pack->file = CreateFileA(path, GENERIC_READ, FILE_SHARE_READ | FILE_SHARE_DELETE, NULL,
+                             OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, NULL);
+    if (pack->file == INVALID_HANDLE_VALUE || !GetFileSizeEx(pack->file, &size) || size.QuadPart == 0) {
+        return -1;
+    }
+    pack->size = (size_t)size.QuadPart;
+    pack->mapping = CreateFileMappingA(pack->file, NULL, PAGE_READONLY, 0, 0, NULL);
+    if (!pack->mapping) return -1;
+    pack->data = MapViewOfFile(pack->mapping, FILE_MAP_READ, 0, 0, 0);
+    return pack->data ? 0 : -1;
+#else
+    struct stat st;
+    int fd = open(path, O_RDONLY);
+    if (fd < 0) return -1;
+    if (fstat(fd, &st) != 0 || st.st_size <= 0) {
+        close(fd);
+        return -1;
+    }
+    pack->size = (size_t)st.st_size;
+    void *data = mmap(NULL, pack->size, PROT_READ, MAP_PRIVATE, fd, 0);
+    close(fd);  // The mapping keeps the file referenced
+    if (data == MAP_FAILED) return -1;
+    pack->data = data;
+    return 0;
+#endif
+}
+
+firmware_pack_t* firmware_pack_open(const char *path) {
+    if (!path) return NULL;
+
+    firmware_pack_t *pack = calloc(1, sizeof(*pack));
+    if (!pack) return NULL;
+
+    if (map_pack(pack, path) != 0) {
+        fprintf(stderr, "ERROR: Failed to map firmware pack: %s\n", path);
+        firmware_pack_close(pack);
+        return NULL;
+    }
+
+    const uint8_t *header = pack->data;
+    if (pack->size < FIRMWARE_PACK_HEADER_SIZE ||
+        memcmp(header, FIRMWARE_PACK_MAGIC, sizeof(FIRMWARE_PACK_MAGIC)) != 0) {
+        fprintf(stderr, "ERROR: Not a firmware pack: %s\n", path);
+        firmware_pack_close(pack);
+        return NULL;
+    }
+    if (read_le32(header + 8) != FIRMWARE_PACK_VERSION ||
+        read_le32(header + 16) != FIRMWARE_PACK_ENTRY_SIZE) {
+        fprintf(stderr, "ERROR: Unsupported firmware pack version %u: %s\n", read_le32(header + 8), path);
+        firmware_pack_close(pack);
+        return NULL;
+    }
+
+    pack->count = read_le32(header + 12);
+    pack->index = header + FIRMWARE_PACK_HEADER_SIZE;
+    size_t index_size = pack->count * FIRMWARE_PACK_ENTRY_SIZE;
+    if (pack->count > (pack->size - FIRMWARE_PACK_HEADER_SIZE) / FIRMWARE_PACK_ENTRY_SIZE ||
+        (crc32(0L, pack->index, (uInt)index_size) & 0xFFFFFFFFu) != read_le32(header + 20)) {
+        fprintf(stderr, "ERROR: Corrupt firmware pack index: %s\n", path);
+        firmware_pack_close(pack);
+        return NULL;
+    }
+
+    for (size_t i = 0; i < pack->count; i++) {
+        const uint8_t *entry = entry_at(pack, i);
+        uint64_t end = (uint64_t)read_le32(entry + 36) + read_le32(entry + 40);
+        if (entry[FIRMWARE_PACK_NAME_SIZE - 1] != '\0' || end > pack->size) {
+            fprintf(stderr, "ERROR: Firmware pack entry %zu out of range: %s\n", i, path);
+            firmware_pack_close(pack);
+            return NULL;
+        }
+    }
+
+    return pack;
+}
+
+void firmware_pack_close(firmware_pack_t *pack) {
+    if (!pack) return;
+    unmap_pack(pack);
+    free(pack);
+}
+
+// Index entry for (processor, kind) by binary search, or NULL
+static const uint8_t* find_entry(const firmware_pack_t *pack, const char *processor,
+                                 firmware_pack_kind_t kind) {
+    if (!pack || !processor) return NULL;
+
+    // Names are stored lowercase
+    char name[FIRMWARE_PACK_NAME_SIZE] = {0};
+    size_t length = strlen(processor);
+    if (length >= FIRMWARE_PACK_NAME_SIZE) return NULL;
+    for (size_t i = 0; i < length; i++) {
+        char c = processor[i];
+        name[i] = (c >= 'A' && c <= 'Z') ? (char)(c + 'a' - 'A') : c;
+    }
+
+    size_t low = 0, high = pack->count;
+    while (low < high) {
+        size_t mid = low + (high - low) / 2;
+        const uint8_t *entry = entry_at(pack, mid);
+        int cmp = strncmp(name, (const char *)entry, FIRMWARE_PACK_NAME_SIZE);
+        if (cmp == 0) cmp = (int)kind - (int)read_le32(entry + 32);
+
+        if (cmp < 0) {
+            high = mid;
+        } else if (cmp > 0) {
+            low = mid + 1;
+        } else {
+            return entry;
+        }
+    }
+    return NULL;
+}
+
+const uint8_t* firmware_pack_find(const firmware_pack_t *pack, const char *processor,
+                                  firmware_pack_kind_t kind, size_t *size) {
+    const uint8_t *entry = find_entry(pack, processor, kind);
+    if (!entry) return NULL;
+
+    if (size) *size = read_le32(entry + 40);
+    return pack->data + read_le32(entry + 36);
+}
+
+int firmware_pack_get(const firmware_pack_t *pack, const char *processor,
+                      firmware_binary_t *firmware) {
+    if (!firmware) return -1;
+
+    const uint8_t *spl = find_entry(pack, processor, FIRMWARE_PACK_SPL);
+    const uint8_t *uboot = find_entry(pack, processor, FIRMWARE_PACK_UBOOT);
+    if (!spl || !uboot) return -1;
+
+    // Index names are NUL-terminated (checked on open) and live as long as the mapping
+    firmware->processor = (const char *)spl;
+    firmware->spl_data = pack->data + read_le32(spl + 36);
+    firmware->spl_size = read_le32(spl + 40);
+    firmware->uboot_data = pack->data + read_le32(uboot + 36);
+    firmware->uboot_size = read_le32(uboot + 40);
+    return 0;
+}
+
+size_t firmware_pack_count(const firmware_pack_t *pack) {
+    return pack ? pack->count : 0;
+}
+
+size_t firmware_pack_verify(const firmware_pack_t *pack) {
+    if (!pack) return 0;
+
+    size_t bad = 0;
+    for (size_t i = 0; i < pack->count; i++) {
+        const uint8_t *entry = entry_at(pack, i);
+        const uint8_t *blob = pack->data + read_le32(entry + 36);
+        uLong crc = crc32(0L, blob, (uInt)read_le32(entry + 40));
+        if ((crc & 0xFFFFFFFFu) != read_le32(entry + 44)) bad++;
+    }
+    return bad;
+}
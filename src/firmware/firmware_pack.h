@@ -0,0 +1,82 @@
+/**
+ * Firmware Pack Loader
+ *
+ * Loads SPL and U-Boot binaries from a firmware pack file instead of the
+ * compiled-in database, so processors can be added or updated without
+ * rebuilding the cloner. The pack is memory-mapped; lookups return pointers
+ * straight into the mapping and stay valid until firmware_pack_close().
+ *
+ * Packs are written by tools/generate_firmware_database.py --pack, which
+ * documents the file layout.
+ */
+
+#ifndef FIRMWARE_PACK_H
+#define FIRMWARE_PACK_H
+
+#include <stddef.h>
+#include <stdint.h>
+#include "firmware_database.h"
+
+typedef struct firmware_pack firmware_pack_t;
+
+typedef enum {
+    FIRMWARE_PACK_SPL = 0,
+    FIRMWARE_PACK_UBOOT = 1
+} firmware_pack_kind_t;
+
+/**
+ * Map a firmware pack and validate its header and index
+ *
+ * Only the header and index are checked (their CRC and that every entry lies
+ * inside the file), so opening costs the same for any number of processors.
+ * Use firmware_pack_verify() to check the blob CRCs.
+ *
+ * @param path Pack file path
+ * @return Pack handle, or NULL if the file cannot be mapped or is not a valid pack
+ */
+firmware_pack_t* firmware_pack_open(const char *path);
+
+/**
+ * Unmap a firmware pack; pointers returned by lookups become invalid
+ *
+ * @param pack Pack handle (NULL is ignored)
+ */
+void firmware_pack_close(firmware_pack_t *pack);
+
+/**
+ * Find one binary in the pack (binary search of the sorted index)
+ *
+ * @param pack Pack handle
+ * @param processor Processor name, case-insensitive (e.g., "t31x")
+ * @param kind FIRMWARE_PACK_SPL or FIRMWARE_PACK_UBOOT
+ * @param size Output parameter for the binary size
+ * @return Pointer into the mapped pack, or NULL if not found
+ */
+const uint8_t* firmware_pack_find(const firmware_pack_t *pack, const char *processor,
+                                  firmware_pack_kind_t kind, size_t *size);
+
+/**
+ * Get both binaries for a processor, like firmware_get()
+ *
+ * @param pack Pack handle
+ * @param processor Processor name, case-insensitive
+ * @param firmware Output; processor and data pointers point into the pack
+ * @return 0 on success, -1 if the pack has no SPL and U-Boot for the processor
+ */
+int firmware_pack_get(const firmware_pack_t *pack, const char *processor,
+                      firmware_binary_t *firmware);
+
+/**
+ * Number of entries (processor, kind) in the pack
+ */
+size_t firmware_pack_count(const firmware_pack_t *pack);
+
+/**
+ * Check every blob against its stored CRC32
+ *
+ * @param pack Pack handle
+ * @return Number of entries whose CRC does not match (0 if the pack is intact)
+ */
+size_t firmware_pack_verify(const firmware_pack_t *pack);
+
+#endif // FIRMWARE_PACK_H
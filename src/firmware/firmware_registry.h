@@ -40,4 +40,23 @@ const uint8_t* firmware_t40_get_uboot(size_t *size);
 const uint8_t* firmware_t41_get_spl(size_t *size);
 const uint8_t* firmware_t41_get_uboot(size_t *size);
 
+extern const uint8_t firmware_spl_a1_n_ne_x[];
+extern const uint8_t firmware_uboot_a1_n_ne_x[];
+extern const uint8_t firmware_spl_a1_nt_a[];
+extern const uint8_t firmware_uboot_a1_nt_a[];
+extern const uint8_t firmware_spl_t20[];
+extern const uint8_t firmware_uboot_t20[];
+extern const uint8_t firmware_spl_t21[];
+extern const uint8_t firmware_uboot_t21[];
+extern const uint8_t firmware_spl_t23[];
+extern const uint8_t firmware_uboot_t23[];
+extern const uint8_t firmware_shared_spl_t30[];
+extern const uint8_t firmware_shared_uboot_t30[];
+extern const uint8_t firmware_shared_spl_t31[];
+extern const uint8_t firmware_shared_uboot_t31[];
+extern const uint8_t firmware_spl_t40[];
+extern const uint8_t firmware_uboot_t40[];
+extern const uint8_t firmware_spl_t41[];
+extern const uint8_t firmware_uboot_t41[];
+
 #endif // FIRMWARE_REGISTRY_H
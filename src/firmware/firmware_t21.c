@@ -7,7 +7,7 @@
 #include <stddef.h>
 
 // t21 SPL (8796 bytes)
-static const uint8_t spl_t21[] = {
+const uint8_t firmware_spl_t21[] = {
     0x07, 0x80, 0x02, 0x40, 0x00, 0x00, 0x00, 0x00, 0x02, 0x00, 0x42, 0x34,
     0x07, 0x80, 0x82, 0x40, 0x00, 0x00, 0x00, 0x00, 0x02, 0x60, 0x02, 0x40,
     0x00, 0x00, 0x00, 0x00, 0xff, 0x7f, 0x03, 0x3c, 0xff, 0xff, 0x63, 0x34,
@@ -744,7 +744,7 @@ static const uint8_t spl_t21[] = {
 };
 
 // t21 U-Boot (390484 bytes)
-static const uint8_t uboot_t21[] = {
+const uint8_t firmware_uboot_t21[] = {
     0x02, 0x00, 0x11, 0x04, 0x00, 0x00, 0x00, 0x00, 0x20, 0x46, 0x16, 0x80,
     0x00, 0x00, 0xfc, 0x8f, 0x40, 0x80, 0x1d, 0x3c, 0x18, 0x80, 0x99, 0x8f,
     0x08, 0x00, 0x20, 0x03, 0x00, 0x00, 0x00, 0x00, 0x21, 0xe8, 0x80, 0x00,
@@ -33289,11 +33289,11 @@ static const uint8_t uboot_t21[] = {
 };
 
 const uint8_t* firmware_t21_get_spl(size_t *size) {
-    if (size) *size = sizeof(spl_t21);
-    return spl_t21;
+    if (size) *size = sizeof(firmware_spl_t21);
+    return firmware_spl_t21;
 }
 
 const uint8_t* firmware_t21_get_uboot(size_t *size) {
-    if (size) *size = sizeof(uboot_t21);
-    return uboot_t21;
+    if (size) *size = sizeof(firmware_uboot_t21);
+    return firmware_uboot_t21;
 }
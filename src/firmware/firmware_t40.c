@@ -7,7 +7,7 @@
 #include <stddef.h>
 
 // t40 SPL (12032 bytes)
-static const uint8_t spl_t40[] = {
+const uint8_t firmware_spl_t40[] = {
     0x20, 0xb2, 0x08, 0x3c, 0xe0, 0x0f, 0x08, 0x35, 0x00, 0x00, 0x09, 0x8d,
     0x18, 0x00, 0x29, 0x35, 0x00, 0x00, 0x09, 0xad, 0x40, 0x00, 0x08, 0x3c,
     0x04, 0xfc, 0x08, 0x35, 0x00, 0x60, 0x88, 0x40, 0x00, 0x68, 0x08, 0x40,
@@ -1014,7 +1014,7 @@ static const uint8_t spl_t40[] = {
 };
 
 // t40 U-Boot (422540 bytes)
-static const uint8_t uboot_t40[] = {
+const uint8_t firmware_uboot_t40[] = {
     0x02, 0x00, 0x11, 0x04, 0x00, 0x00, 0x00, 0x00, 0x20, 0xbf, 0x16, 0x80,
     0x00, 0x00, 0xfc, 0x8f, 0x40, 0x80, 0x1d, 0x3c, 0x18, 0x80, 0x99, 0x8f,
     0x08, 0x00, 0x20, 0x03, 0x00, 0x00, 0x00, 0x00, 0x21, 0xe8, 0x80, 0x00,
@@ -36230,11 +36230,11 @@ static const uint8_t uboot_t40[] = {
 };
 
 const uint8_t* firmware_t40_get_spl(size_t *size) {
-    if (size) *size = sizeof(spl_t40);
-    return spl_t40;
+    if (size) *size = sizeof(firmware_spl_t40);
+    return firmware_spl_t40;
 }
 
 const uint8_t* firmware_t40_get_uboot(size_t *size) {
-    if (size) *size = sizeof(uboot_t40);
-    return uboot_t40;
+    if (size) *size = sizeof(firmware_uboot_t40);
+    return firmware_uboot_t40;
 }
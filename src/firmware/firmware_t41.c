@@ -7,7 +7,7 @@
 #include <stddef.h>
 
 // t41 SPL (9856 bytes)
-static const uint8_t spl_t41[] = {
+const uint8_t firmware_spl_t41[] = {
     0x20, 0xb2, 0x18, 0x3c, 0xe0, 0x0f, 0x18, 0x37, 0x00, 0x00, 0x08, 0x8f,
     0x00, 0x80, 0x09, 0x3c, 0x25, 0x40, 0x09, 0x01, 0x00, 0x00, 0x08, 0xaf,
     0x20, 0xb2, 0x08, 0x3c, 0xe0, 0x0f, 0x08, 0x35, 0x00, 0x00, 0x09, 0x8d,
@@ -833,7 +833,7 @@ static const uint8_t spl_t41[] = {
 };
 
 // t41 U-Boot (404688 bytes)
-static const uint8_t uboot_t41[] = {
+const uint8_t firmware_uboot_t41[] = {
     0x02, 0x00, 0x11, 0x04, 0x00, 0x00, 0x00, 0x00, 0x40, 0x7a, 0x16, 0x80,
     0x00, 0x00, 0xfc, 0x8f, 0x40, 0x80, 0x1d, 0x3c, 0x18, 0x80, 0x99, 0x8f,
     0x08, 0x00, 0x20, 0x03, 0x00, 0x00, 0x00, 0x00, 0x21, 0xe8, 0x80, 0x00,
@@ -34561,11 +34561,11 @@ static const uint8_t uboot_t41[] = {
 };
 
 const uint8_t* firmware_t41_get_spl(size_t *size) {
-    if (size) *size = sizeof(spl_t41);
-    return spl_t41;
+    if (size) *size = sizeof(firmware_spl_t41);
+    return firmware_spl_t41;
 }
 
 const uint8_t* firmware_t41_get_uboot(size_t *size) {
-    if (size) *size = sizeof(uboot_t41);
-    return uboot_t41;
+    if (size) *size = sizeof(firmware_uboot_t41);
+    return firmware_uboot_t41;
 }
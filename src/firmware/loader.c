@@ -2,6 +2,8 @@
 #include "ddr_binary_builder.h"
 #include "ddr_config_database.h"
 #include "firmware_database.h"
+#include "ddr_table.h"
+#include "firmware_pack.h"
 #include "t20_reference_ddr.h"
 #include "t31zx_reference_ddr.h"
 #include "a1_reference_ddr.h"
@@ -388,6 +390,102 @@ thingino_error_t firmware_load_t20(firmware_files_t* firmware) {
     return THINGINO_SUCCESS;
 }
 
+thingino_error_t firmware_select_ddr_config(processor_variant_t variant,
+    const char* ddr_chip, uint32_t ddr_freq, firmware_files_t* firmware) {
+
+    if (!ddr_chip || !firmware) {
+        return THINGINO_ERROR_INVALID_PARAMETER;
+    }
+
+    const char* platform = processor_variant_to_string(variant);
+
+    // Default to the processor's DDR frequency from the config database
+    if (ddr_freq == 0) {
+        const processor_config_t *proc_cfg = processor_config_get(platform);
+        if (!proc_cfg) {
+            fprintf(stderr, "ERROR: No DDR defaults for processor %s\n", platform);
+            return THINGINO_ERROR_INVALID_PARAMETER;
+        }
+        ddr_freq = proc_cfg->ddr_freq;
+    }
+
+    size_t size = 0;
+    const uint8_t *binary = ddr_table_lookup(platform, ddr_chip, ddr_freq, &size);
+    if (!binary) {
+        fprintf(stderr, "ERROR: No precompiled DDR binary for %s / %s at %u MHz\n",
+            platform, ddr_chip, ddr_freq / 1000000);
+        return THINGINO_ERROR_INVALID_PARAMETER;
+    }
+
+    uint8_t *config = (uint8_t*)malloc(size);
+    if (!config) {
+        fprintf(stderr, "ERROR: Failed to allocate DDR buffer\n");
+        return THINGINO_ERROR_MEMORY;
+    }
+    memcpy(config, binary, size);
+
+    free(firmware->config);
+    firmware->config = config;
+    firmware->config_size = size;
+
+    DEBUG_PRINT("Selected DDR binary from table: %s / %s at %u Hz (%zu bytes)\n",
+        platform, ddr_chip, ddr_freq, size);
+    return THINGINO_SUCCESS;
+}
+
+thingino_error_t firmware_select_pack_binaries(processor_variant_t variant,
+    const char* pack_path, firmware_files_t* firmware) {
+
+    if (!pack_path || !firmware) {
+        return THINGINO_ERROR_INVALID_PARAMETER;
+    }
+
+    firmware_pack_t *pack = firmware_pack_open(pack_path);
+    if (!pack) {
+        return THINGINO_ERROR_FILE_IO;
+    }
+
+    // Blob CRCs are not checked on open; a corrupt SPL/U-Boot must not reach the device
+    size_t bad = firmware_pack_verify(pack);
+    if (bad) {
+        fprintf(stderr, "ERROR: Firmware pack %s has %zu corrupt binaries\n", pack_path, bad);
+        firmware_pack_close(pack);
+        return THINGINO_ERROR_FILE_IO;
+    }
+
+    const char* processor = processor_variant_to_string(variant);
+    firmware_binary_t fw;
+    if (firmware_pack_get(pack, processor, &fw) != 0) {
+        fprintf(stderr, "ERROR: Firmware pack %s has no SPL/U-Boot for %s\n", pack_path, processor);
+        firmware_pack_close(pack);
+        return THINGINO_ERROR_INVALID_PARAMETER;
+    }
+
+    // Copy out of the mapping: firmware_cleanup() frees these buffers
+    uint8_t *spl = (uint8_t*)malloc(fw.spl_size);
+    uint8_t *uboot = (uint8_t*)malloc(fw.uboot_size);
+    if (!spl || !uboot) {
+        free(spl);
+        free(uboot);
+        firmware_pack_close(pack);
+        return THINGINO_ERROR_MEMORY;
+    }
+    memcpy(spl, fw.spl_data, fw.spl_size);
+    memcpy(uboot, fw.uboot_data, fw.uboot_size);
+    firmware_pack_close(pack);
+
+    free(firmware->spl);
+    free(firmware->uboot);
+    firmware->spl = spl;
+    firmware->spl_size = fw.spl_size;
+    firmware->uboot = uboot;
+    firmware->uboot_size = fw.uboot_size;
+
+    DEBUG_PRINT("Loaded %s SPL (%zu bytes) and U-Boot (%zu bytes) from pack %s\n",
+        processor, firmware->spl_size, firmware->uboot_size, pack_path);
+    return THINGINO_SUCCESS;
+}
+
 void firmware_cleanup(firmware_files_t* firmware) {
     if (!firmware) {
         return;
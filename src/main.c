@@ -27,6 +27,9 @@ typedef struct {
     char* input_file;
     bool force_erase;
     bool skip_ddr;
+    char* ddr_chip;   // DDR chip for the precompiled DDR table (e.g., "M14D1G1664A_DDR2")
+    uint32_t ddr_freq;  // DDR frequency in Hz for ddr_chip (0 = processor default)
+    char* firmware_pack;  // Firmware pack file with SPL/U-Boot per processor
     char* force_cpu;  // Force specific CPU variant (e.g., "a1", "t31x", "t31zx")
 } cli_options_t;
 
@@ -48,6 +51,9 @@ void print_usage(const char* program_name) {
     printf("  --spl <file>            Custom SPL file\n");
     printf("  --uboot <file>          Custom U-Boot file\n");
     printf("  --skip-ddr              Skip DDR configuration during bootstrap\n");
+    printf("  --ddr-chip <name>       DDR chip from the precompiled DDR table (e.g., M14D1G1664A_DDR2)\n");
+    printf("  --ddr-freq <MHz>        DDR frequency for --ddr-chip (default: processor default)\n");
+    printf("  --firmware-pack <file>  SPL/U-Boot from a firmware pack (generate_firmware_database.py --pack)\n");
     printf("\nExamples:\n");
     printf("  %s -l                           # List devices\n", program_name);
     printf("  %s -i 0 -b                      # Bootstrap device 0\n", program_name);
@@ -110,6 +116,29 @@ thingino_error_t parse_arguments(int argc, char* argv[], cli_options_t* options)
             options->uboot_file = argv[++i];
         } else if (strcmp(argv[i], "--skip-ddr") == 0) {
             options->skip_ddr = true;
+        } else if (strcmp(argv[i], "--firmware-pack") == 0) {
+            if (i + 1 >= argc) {
+                printf("Error: %s requires a filename\n", argv[i]);
+                return THINGINO_ERROR_INVALID_PARAMETER;
+            }
+            options->firmware_pack = argv[++i];
+        } else if (strcmp(argv[i], "--ddr-chip") == 0) {
+            if (i + 1 >= argc) {
+                printf("Error: %s requires a DDR chip name\n", argv[i]);
+                return THINGINO_ERROR_INVALID_PARAMETER;
+            }
+            options->ddr_chip = argv[++i];
+        } else if (strcmp(argv[i], "--ddr-freq") == 0) {
+            if (i + 1 >= argc) {
+                printf("Error: %s requires a frequency in MHz\n", argv[i]);
+                return THINGINO_ERROR_INVALID_PARAMETER;
+            }
+            int mhz = atoi(argv[++i]);
+            if (mhz <= 0 || mhz > 4000) {
+                printf("Error: DDR frequency must be 1-4000 MHz\n");
+                return THINGINO_ERROR_INVALID_PARAMETER;
+            }
+            options->ddr_freq = (uint32_t)mhz * 1000000u;
         } else if (strcmp(argv[i], "--erase") == 0) {
             options->force_erase = true;
         } else if (strcmp(argv[i], "--cpu") == 0) {
@@ -134,6 +163,19 @@ thingino_error_t parse_arguments(int argc, char* argv[], cli_options_t* options)
             return THINGINO_ERROR_INVALID_PARAMETER;
         }
     }
+
+    if (options->ddr_chip && options->config_file) {
+        printf("Error: --ddr-chip and --config are mutually exclusive\n");
+        return THINGINO_ERROR_INVALID_PARAMETER;
+    }
+    if (options->firmware_pack && (options->spl_file || options->uboot_file)) {
+        printf("Error: --firmware-pack and --spl/--uboot are mutually exclusive\n");
+        return THINGINO_ERROR_INVALID_PARAMETER;
+    }
+    if (options->ddr_freq && !options->ddr_chip) {
+        printf("Error: --ddr-freq requires --ddr-chip\n");
+        return THINGINO_ERROR_INVALID_PARAMETER;
+    }
     
     return THINGINO_SUCCESS;
 }
@@ -235,7 +277,10 @@ thingino_error_t bootstrap_device_by_index(usb_manager_t* manager, int index, co
         .skip_ddr = options->skip_ddr,
         .config_file = options->config_file,
         .spl_file = options->spl_file,
-        .uboot_file = options->uboot_file
+        .uboot_file = options->uboot_file,
+        .ddr_chip = options->ddr_chip,
+        .ddr_freq = options->ddr_freq,
+        .firmware_pack = options->firmware_pack
     };
     
     // Run bootstrap
@@ -704,6 +749,9 @@ thingino_error_t write_firmware_from_file(usb_manager_t* manager, int device_ind
             .config_file = options->config_file,
             .spl_file = options->spl_file,
             .uboot_file = options->uboot_file,
+            .ddr_chip = options->ddr_chip,
+            .ddr_freq = options->ddr_freq,
+            .firmware_pack = options->firmware_pack,
             .sdram_address = 0x80000000,  // Default SDRAM address
             .timeout = 5000,
             .verbose = options->verbose
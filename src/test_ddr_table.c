@@ -0,0 +1,90 @@
+/**
+ * Test DDR Table - Verify the precompiled DDR binary table
+ *
+ * Checks that the entries are in bsearch order, that every entry matches
+ * what ddr_build_chip_binary() generates today (i.e. the table is not stale),
+ * and that lookups hit and miss as expected.
+ */
+
+#include "ddr_table.h"
+#include "ddr_binary_builder.h"
+#include <stdio.h>
+#include <string.h>
+#include <strings.h>
+
+static int failures = 0;
+
+static void check(int condition, const char *description) {
+    printf("  [%s] %s\n", condition ? "OK" : "FAIL", description);
+    if (!condition) failures++;
+}
+
+static int entry_compare(const ddr_table_entry_t *a, const ddr_table_entry_t *b) {
+    int result = strcasecmp(a->platform, b->platform);
+    if (result != 0) return result;
+
+    result = strcasecmp(a->chip, b->chip);
+    if (result != 0) return result;
+
+    return (a->freq_hz > b->freq_hz) - (a->freq_hz < b->freq_hz);
+}
+
+int main(void) {
+    printf("=== DDR Table Test ===\n\n");
+
+    size_t count;
+    const ddr_table_entry_t *entries = ddr_table_list(&count);
+    printf("Table entries: %zu\n\n", count);
+    check(count > 0, "table is not empty");
+
+    // Sorted and unique, as ddr_table_lookup() bsearches it
+    size_t unsorted = 0;
+    for (size_t i = 1; i < count; i++) {
+        if (entry_compare(&entries[i - 1], &entries[i]) >= 0) {
+            printf("    out of order: %s/%s/%u\n", entries[i].platform, entries[i].chip, entries[i].freq_hz);
+            unsorted++;
+        }
+    }
+    check(unsorted == 0, "entries sorted by platform, chip, frequency");
+
+    // Every entry matches the C generator and is found by lookup
+    size_t stale = 0, missing = 0;
+    uint8_t generated[DDR_BINARY_SIZE];
+    for (size_t i = 0; i < count; i++) {
+        size_t size = 0;
+        const uint8_t *binary = ddr_table_lookup(entries[i].platform, entries[i].chip,
+            entries[i].freq_hz, &size);
+        if (!binary || size != DDR_TABLE_BINARY_SIZE) {
+            missing++;
+            continue;
+        }
+        size_t built = ddr_build_chip_binary(entries[i].platform, entries[i].chip,
+            entries[i].freq_hz, generated);
+        if (built != size || memcmp(binary, generated, size) != 0) {
+            printf("    stale: %s/%s/%u\n", entries[i].platform, entries[i].chip, entries[i].freq_hz);
+            stale++;
+        }
+    }
+    check(missing == 0, "every entry is found by ddr_table_lookup()");
+    check(stale == 0, "every entry matches ddr_build_chip_binary()");
+
+    // Hits and misses
+    size_t size = 0;
+    check(ddr_table_lookup("T31X", "m14d1g1664a_ddr2", 400000000, &size) != NULL &&
+          size == DDR_TABLE_BINARY_SIZE, "case-insensitive lookup hits");
+    check(ddr_table_lookup("t31x", "M14D1G1664A_DDR2", 401000000, NULL) == NULL,
+          "unlisted frequency misses");
+    check(ddr_table_lookup("t31x", "NOT_A_CHIP", 400000000, NULL) == NULL,
+          "unknown chip misses");
+    check(ddr_table_lookup("t41", "H5TQ2G83CFR_DDR3", 400000000, NULL) == NULL,
+          "T41 (384-byte format) is not in the table");
+    check(ddr_table_lookup(NULL, "M14D1G1664A_DDR2", 400000000, NULL) == NULL,
+          "NULL platform misses");
+
+    if (failures) {
+        printf("\n[FAIL] %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("\n[SUCCESS] DDR table test passed!\n");
+    return 0;
+}
@@ -0,0 +1,159 @@
+/**
+ * Test Firmware Pack - Verify the firmware pack loader
+ *
+ * Writes small packs in the layout produced by
+ * tools/generate_firmware_database.py --pack and checks that an intact pack
+ * opens, verifies and serves its binaries, and that corrupt packs are
+ * rejected at open (header, index) or reported by verify (blobs).
+ */
+
+#include "firmware_pack.h"
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <zlib.h>
+
+#define PACK_PATH "test_firmware_pack.tmp"
+#define HEADER_SIZE 32
+#define ENTRY_SIZE 48
+#define BLOB_ALIGN 64
+
+static int failures = 0;
+
+static void check(int condition, const char *description) {
+    printf("  [%s] %s\n", condition ? "OK" : "FAIL", description);
+    if (!condition) failures++;
+}
+
+static void write_le32(uint8_t *p, uint32_t value) {
+    p[0] = value & 0xFF;
+    p[1] = (value >> 8) & 0xFF;
+    p[2] = (value >> 16) & 0xFF;
+    p[3] = (value >> 24) & 0xFF;
+}
+
+static const uint8_t spl_blob[] = "SPL test payload";
+static const uint8_t uboot_blob[] = "U-Boot test payload, a little longer";
+
+/**
+ * Build a pack with SPL and U-Boot entries for "t31x"
+ *
+ * @return Pack size in bytes (buffer must hold at least 256 bytes)
+ */
+static size_t build_pack(uint8_t *pack) {
+    const size_t count = 2;
+    const uint32_t spl_offset = 2 * BLOB_ALIGN;
+    const uint32_t uboot_offset = 3 * BLOB_ALIGN;
+    size_t size = uboot_offset + sizeof(uboot_blob);
+
+    memset(pack, 0, 4 * BLOB_ALIGN);
+    memcpy(pack, "TFWPACK", 8);
+    write_le32(pack + 8, 1);
+    write_le32(pack + 12, count);
+    write_le32(pack + 16, ENTRY_SIZE);
+    write_le32(pack + 24, BLOB_ALIGN);
+
+    // Index sorted by (processor, kind): SPL = 0, U-Boot = 1
+    uint8_t *entry = pack + HEADER_SIZE;
+    strcpy((char *)entry, "t31x");
+    write_le32(entry + 32, FIRMWARE_PACK_SPL);
+    write_le32(entry + 36, spl_offset);
+    write_le32(entry + 40, sizeof(spl_blob));
+    write_le32(entry + 44, crc32(0L, spl_blob, sizeof(spl_blob)));
+
+    entry += ENTRY_SIZE;
+    strcpy((char *)entry, "t31x");
+    write_le32(entry + 32, FIRMWARE_PACK_UBOOT);
+    write_le32(entry + 36, uboot_offset);
+    write_le32(entry + 40, sizeof(uboot_blob));
+    write_le32(entry + 44, crc32(0L, uboot_blob, sizeof(uboot_blob)));
+
+    write_le32(pack + 20, crc32(0L, pack + HEADER_SIZE, count * ENTRY_SIZE));
+
+    memcpy(pack + spl_offset, spl_blob, sizeof(spl_blob));
+    memcpy(pack + uboot_offset, uboot_blob, sizeof(uboot_blob));
+    return size;
+}
+
+static firmware_pack_t* open_written(const uint8_t *data, size_t size) {
+    FILE *f = fopen(PACK_PATH, "wb");
+    if (!f || fwrite(data, 1, size, f) != size) {
+        if (f) fclose(f);
+        return NULL;
+    }
+    fclose(f);
+    return firmware_pack_open(PACK_PATH);
+}
+
+int main(void) {
+    printf("=== Firmware Pack Test ===\n\n");
+
+    uint8_t pack_data[4 * BLOB_ALIGN];
+    size_t size = build_pack(pack_data);
+
+    // Intact pack
+    printf("Intact pack:\n");
+    firmware_pack_t *pack = open_written(pack_data, size);
+    check(pack != NULL, "opens");
+    if (pack) {
+        check(firmware_pack_count(pack) == 2, "has 2 entries");
+        check(firmware_pack_verify(pack) == 0, "all blob CRCs match");
+
+        firmware_binary_t fw;
+        check(firmware_pack_get(pack, "T31X", &fw) == 0 &&
+              fw.spl_size == sizeof(spl_blob) && memcmp(fw.spl_data, spl_blob, fw.spl_size) == 0 &&
+              fw.uboot_size == sizeof(uboot_blob) && memcmp(fw.uboot_data, uboot_blob, fw.uboot_size) == 0,
+              "firmware_pack_get() returns both binaries (case-insensitive)");
+
+        size_t found = 0;
+        check(firmware_pack_find(pack, "t31x", FIRMWARE_PACK_UBOOT, &found) != NULL &&
+              found == sizeof(uboot_blob), "firmware_pack_find() finds U-Boot");
+        check(firmware_pack_find(pack, "t41", FIRMWARE_PACK_SPL, NULL) == NULL,
+              "missing processor is not found");
+        check(firmware_pack_get(pack, "t41", &fw) != 0, "firmware_pack_get() fails for a missing processor");
+        firmware_pack_close(pack);
+    }
+
+    // Corrupt blob: opens (only the index is checked), verify reports it
+    printf("\nCorrupt blob:\n");
+    uint8_t corrupt[sizeof(pack_data)];
+    memcpy(corrupt, pack_data, size);
+    corrupt[3 * BLOB_ALIGN] ^= 0x01;
+    pack = open_written(corrupt, size);
+    check(pack != NULL, "opens");
+    if (pack) {
+        check(firmware_pack_verify(pack) == 1, "verify reports 1 bad blob");
+        firmware_pack_close(pack);
+    }
+
+    // Corrupt index byte: index CRC mismatch
+    printf("\nCorrupt index:\n");
+    memcpy(corrupt, pack_data, size);
+    corrupt[HEADER_SIZE + 1] ^= 0x01;
+    pack = open_written(corrupt, size);
+    check(pack == NULL, "rejected at open");
+    firmware_pack_close(pack);
+
+    // Bad magic
+    printf("\nBad magic:\n");
+    memcpy(corrupt, pack_data, size);
+    corrupt[0] = 'X';
+    pack = open_written(corrupt, size);
+    check(pack == NULL, "rejected at open");
+    firmware_pack_close(pack);
+
+    // Truncated: entry extends past the end of the file
+    printf("\nTruncated pack:\n");
+    pack = open_written(pack_data, size - 8);
+    check(pack == NULL, "rejected at open");
+    firmware_pack_close(pack);
+
+    remove(PACK_PATH);
+
+    if (failures) {
+        printf("\n[FAIL] %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("\n[SUCCESS] Firmware pack test passed!\n");
+    return 0;
+}
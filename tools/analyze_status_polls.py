@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Status-Poll Overhead Analyzer for Ingenic Cloner Captures
+
+Finds the loops in which the host polls a firmware status request
+(FW_READ_STATUS1-4: 0x16/0x19/0x25/0x26) while the burner erases or
+programs flash, as firmware_wait_for_erase_ready() in src/firmware/writer.c
+does. Only the cloner's traffic counts: the devices that receive vendor
+requests (or --device), without interrupt transfers. Between two polls a
+loop allows bulk IN log reads and the same control requests every cycle
+(the vendor tool sends FW_READ and READ before each FW_READ_STATUS2).
+For every loop it reports:
+
+- number of polls and the mean poll interval
+- total wait, from the end of the command that started the operation to the
+  last poll's completion
+- the first poll that returned "ready": the first poll of the final run of
+  identical status values, since the loop stops once the status settles
+
+Per platform it then searches for a poll schedule (initial delay, then an
+interval that grows by a backoff factor up to --max-interval) that polls the
+least while still seeing every loop's ready status no later than the capture
+did: each loop must get a poll after its last busy poll and no later than
+its first ready poll. A schedule needs at least MIN_SCHEDULE_LOOPS loops.
+
+The platform of each capture comes from its GET_CPU_INFO response, then
+from the file name, unless --platform is given.
+
+Usage:
+    python3 analyze_status_polls.py <capture.pcap> [more captures ...] [--min-polls 2] [--device N]
+                                    [--json polls.json]
+"""
+
+import re
+import os
+import sys
+import json
+import struct
+import argparse
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from analyze_usb_capture import USBCaptureAnalyzer, USBTransfer, COMMAND_NAMES
+from analyze_write_operation import pair_urbs
+
+POLL_REQUESTS = (0x16, 0x19, 0x25, 0x26)
+
+# bmRequestType type bits of a vendor request
+REQUEST_TYPE_MASK = 0x60
+REQUEST_TYPE_VENDOR = 0x40
+
+# One loop shows a single ready time; fitting a schedule to it would overfit
+MIN_SCHEDULE_LOOPS = 2
+
+PLATFORM_PATTERN = re.compile(r'(?<![a-z0-9])(t(?:10|20|21|23|30|31|40|41)|a1)', re.IGNORECASE)
+
+# Schedule search grid (seconds)
+DELAY_STEP = 0.05
+INTERVALS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.25, 0.5, 1.0)
+BACKOFFS = (1.0, 1.25, 1.5, 2.0)
+
+@dataclass
+class Poll:
+    time: float                 # Submit time, seconds from the wait start
+    duration: float
+    status: Optional[int]       # 32-bit status value, None if the poll returned no data
+
+@dataclass
+class PollLoop:
+    capture: str
+    device: int
+    request: int
+    start: float                # Capture time of the wait start
+    polls: List[Poll] = field(default_factory=list)
+    cycle: Optional[Tuple[int, ...]] = None     # Control requests sent between two polls
+
+    @property
+    def request_name(self) -> str:
+        return COMMAND_NAMES.get(self.request, f"0x{self.request:02X}")
+
+    @property
+    def interval(self) -> float:
+        if len(self.polls) < 2:
+            return 0.0
+        return (self.polls[-1].time - self.polls[0].time) / (len(self.polls) - 1)
+
+    @property
+    def total_wait(self) -> float:
+        last = self.polls[-1]
+        return last.time + last.duration
+
+    @property
+    def ready_index(self) -> int:
+        """First poll of the final run of identical status values"""
+        index = len(self.polls) - 1
+        while index > 0 and self.polls[index - 1].status == self.polls[-1].status:
+            index -= 1
+        return index
+
+    @property
+    def ready_window(self) -> Tuple[float, float]:
+        """(last busy poll time, first ready poll time) from the wait start"""
+        index = self.ready_index
+        busy = self.polls[index - 1].time if index > 0 else 0.0
+        return busy, self.polls[index].time
+
+@dataclass
+class Schedule:
+    delay: float
+    interval: float
+    backoff: float
+    max_interval: float
+
+    def polls_until(self, deadline: float, after: float) -> Optional[int]:
+        """Polls issued up to the first one after `after`, or None if that one is past deadline"""
+        time, interval, count = self.delay, self.interval, 1
+        while time <= after:
+            time += interval
+            interval = min(interval * self.backoff, self.max_interval)
+            count += 1
+        return count if time <= deadline else None
+
+    def describe(self) -> str:
+        backoff = f" x{self.backoff:g} backoff up to {self.max_interval * 1000:.0f} ms" if self.backoff > 1 else ""
+        return (f"initial delay {self.delay * 1000:.0f} ms, then every "
+                f"{self.interval * 1000:.0f} ms{backoff}")
+
+def detect_platform(path: str, transfers: List[USBTransfer]) -> str:
+    """
+    Platform from the GET_CPU_INFO responses, else from the file name.
+
+    Firmware-stage magics (X2580 on T41N, A1) win over the bootrom one,
+    since A1 boards report a T31 bootrom.
+    """
+    bootrom = None
+    for submit, complete in pair_urbs(transfers):
+        if submit.transfer_type == 'CONTROL' and submit.request == 0x00 and complete and complete.data:
+            magic = complete.data.rstrip(b'\x00').decode('ascii', 'replace').strip().upper()
+            if magic.startswith('X2580'):
+                return 't41'
+            if magic.startswith('A1'):
+                return 'a1'
+            match = re.match(r'T\d{2}', magic)
+            if match and bootrom is None:
+                bootrom = match.group(0).lower()
+    if bootrom:
+        return bootrom
+    match = PLATFORM_PATTERN.search(os.path.basename(path))
+    return match.group(1).lower() if match else 'unknown'
+
+def cloner_devices(transfers: List[USBTransfer]) -> Set[int]:
+    """Addresses of the devices that receive vendor requests (the cloner, before and after re-enumeration)"""
+    return {transfer.device for transfer in transfers
+            if transfer.transfer_type == 'CONTROL' and transfer.request_type is not None
+            and transfer.request_type & REQUEST_TYPE_MASK == REQUEST_TYPE_VENDOR}
+
+def find_poll_loops(path: str, transfers: List[USBTransfer], min_polls: int,
+                    devices: Set[int]) -> List[PollLoop]:
+    """
+    Runs of the same status request on one of `devices`.
+
+    Between two polls only bulk IN log reads and control requests may
+    appear, and the control requests must be the same in every cycle; the
+    first cycle sets them. Interrupt transfers and other devices' traffic
+    are ignored. The wait starts when the last transfer before the first
+    poll completes.
+    """
+    loops = []
+    current: Optional[PollLoop] = None
+    requests: List[int] = []        # Control requests since the last poll
+    last_end = 0.0
+
+    def close():
+        if current is not None and len(current.polls) >= min_polls:
+            loops.append(current)
+
+    for submit, complete in pair_urbs(transfers):
+        if submit.device not in devices or submit.transfer_type == 'INTERRUPT':
+            continue
+        end = complete.timestamp if complete else submit.timestamp
+        is_poll = (submit.transfer_type == 'CONTROL' and submit.request in POLL_REQUESTS
+                   and submit.direction == 'IN')
+
+        if is_poll:
+            cycle = tuple(requests)
+            if (current is None or current.request != submit.request or current.device != submit.device
+                    or (current.cycle is not None and current.cycle != cycle)):
+                close()
+                current = PollLoop(capture=path, device=submit.device, request=submit.request,
+                                   start=last_end)
+            elif current.cycle is None:
+                current.cycle = cycle
+            data = complete.data if complete else b''
+            status = struct.unpack_from('<I', data.ljust(4, b'\x00'))[0] if data else None
+            current.polls.append(Poll(time=submit.timestamp - current.start,
+                                      duration=end - submit.timestamp, status=status))
+            requests = []
+        elif submit.transfer_type == 'CONTROL':
+            requests.append(submit.request)
+        elif not (submit.transfer_type == 'BULK' and submit.direction == 'IN'):
+            close()
+            current = None
+        last_end = max(last_end, end)
+
+    close()
+    return loops
+
+def recommend_schedule(loops: List[PollLoop], max_interval: float) -> Optional[Tuple[Schedule, int]]:
+    """Schedule with the fewest total polls that sees every loop's ready poll in time"""
+    windows = [loop.ready_window for loop in loops]
+    earliest_ready = min(ready for _, ready in windows)
+    best = None
+
+    steps = int(earliest_ready / DELAY_STEP) + 1
+    for step in range(steps + 1):
+        delay = min(step * DELAY_STEP, earliest_ready)
+        for interval in INTERVALS:
+            for backoff in BACKOFFS:
+                schedule = Schedule(delay, interval, backoff, max(interval, max_interval))
+                total = 0
+                for busy, ready in windows:
+                    count = schedule.polls_until(ready, busy)
+                    if count is None:
+                        break
+                    total += count
+                else:
+                    key = (total, -delay, -interval)
+                    if best is None or key < best[0]:
+                        best = (key, schedule, total)
+    if best is None:
+        return None
+    return best[1], best[2]
+
+def print_loops(loops: List[PollLoop], verbose: bool):
+    shown = loops if verbose else loops[:20]
+    print(f"\n{'Capture':28s} {'Request':16s} {'Start':>9s} {'Polls':>6s} {'Interval':>9s} "
+          f"{'Wait':>9s} {'Ready at':>14s}")
+    for loop in shown:
+        index = loop.ready_index
+        ready = loop.polls[index]
+        status = f"0x{ready.status:X}" if ready.status is not None else "none"
+        print(f"{os.path.basename(loop.capture)[:28]:28s} {loop.request_name:16s} "
+              f"{loop.start:8.3f}s {len(loop.polls):6d} {loop.interval * 1000:7.1f}ms "
+              f"{loop.total_wait:8.3f}s  #{index + 1} {ready.time:6.3f}s ({status})")
+    if len(shown) < len(loops):
+        print(f"... {len(loops) - len(shown)} more loops (use -v)")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure status-poll loops in captures and recommend a poll schedule'
+    )
+    parser.add_argument('captures', nargs='+', help='Capture files (.pcap/.pcapng)')
+    parser.add_argument('--platform', help='Platform for all captures (default: detect per capture)')
+    parser.add_argument('--min-polls', type=int, default=2,
+                        help='Minimum consecutive polls that count as a loop (default: 2)')
+    parser.add_argument('--device', type=int, action='append',
+                        help='USB device address of the cloner, repeatable (default: devices that '
+                             'receive vendor requests)')
+    parser.add_argument('--max-interval', type=float, default=1.0,
+                        help='Longest poll interval the schedule may back off to, in seconds (default: 1.0)')
+    parser.add_argument('--json', metavar='FILE', help='Write loops and recommendations as JSON')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List every loop')
+
+    args = parser.parse_args()
+
+    by_platform: Dict[str, List[PollLoop]] = {}
+    for path in args.captures:
+        if not os.path.exists(path):
+            print(f"ERROR: Capture file not found: {path}")
+            sys.exit(1)
+        analyzer = USBCaptureAnalyzer(path)
+        if not analyzer.parse_pcap():
+            sys.exit(1)
+        platform = args.platform or detect_platform(path, analyzer.transfers)
+        devices = set(args.device) if args.device else cloner_devices(analyzer.transfers)
+        loops = find_poll_loops(path, analyzer.transfers, args.min_polls, devices)
+        addresses = ', '.join(str(device) for device in sorted(devices)) or 'none'
+        print(f"  {platform}: {len(loops)} poll loop(s) (device {addresses})")
+        by_platform.setdefault(platform, []).extend(loops)
+
+    report = {}
+    for platform, loops in sorted(by_platform.items()):
+        print("\n" + "=" * 80)
+        print(f"STATUS POLLS: {platform.upper()}")
+        print("=" * 80)
+        if not loops:
+            print("No status-poll loops found")
+            report[platform] = {'loops': [], 'recommendation': None}
+            continue
+
+        print_loops(loops, args.verbose)
+
+        polls = sum(len(loop.polls) for loop in loops)
+        wait = sum(loop.total_wait for loop in loops)
+        readies = [loop.ready_window[1] for loop in loops]
+        print(f"\nLoops: {len(loops)}, polls: {polls}, total wait: {wait:.3f} s")
+        print(f"Ready after: {min(readies):.3f}-{max(readies):.3f} s "
+              f"(mean {sum(readies) / len(readies):.3f} s)")
+
+        if len(loops) < MIN_SCHEDULE_LOOPS:
+            print(f"\n⚠ No schedule recommended: {len(loops)} loop(s), need at least {MIN_SCHEDULE_LOOPS}")
+            report[platform] = {'loops': [dict(asdict(loop), ready_index=loop.ready_index) for loop in loops],
+                                'recommendation': None}
+            continue
+
+        recommendation = recommend_schedule(loops, args.max_interval)
+        if recommendation is None:
+            print("⚠ No schedule on the search grid matches the capture's ready times")
+            report[platform] = {'loops': [asdict(loop) for loop in loops], 'recommendation': None}
+            continue
+        schedule, scheduled_polls = recommendation
+        saved = polls - scheduled_polls
+        print(f"\n✓ Recommended: {schedule.describe()}")
+        print(f"  {scheduled_polls} polls instead of {polls} "
+              f"({100.0 * saved / polls:.0f}% fewer control transfers), no later ready detection")
+
+        report[platform] = {
+            'loops': [dict(asdict(loop), ready_index=loop.ready_index) for loop in loops],
+            'recommendation': dict(asdict(schedule), polls=scheduled_polls, observed_polls=polls),
+        }
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,7 @@ Usage:
     python3 analyze_usb_capture.py <capture.pcap> [--verbose] [--extract-data]
 """
 
+import os
 import sys
 import subprocess
 import struct
@@ -17,6 +18,11 @@ from dataclasses import dataclass
 from typing import List, Optional, Tuple
 from enum import IntEnum
 
+import content_map
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'references'))
+import ddr_layout
+
 # Ingenic USB Protocol Commands
 class VendorRequest(IntEnum):
     # Bootrom stage (0x00-0x05)
@@ -78,6 +84,9 @@ class USBTransfer:
     value: Optional[int] = None
     index: Optional[int] = None
 
+    # USB device address (usbmon devnum); tells pipes of different devices apart
+    device: int = 0
+
 @dataclass
 class ProtocolSequence:
     """Represents a sequence of related USB transfers"""
@@ -96,6 +105,29 @@ class USBCaptureAnalyzer:
         """Parse pcap file and extract USB transfers"""
         print(f"Analyzing {self.pcap_file}...")
 
+        try:
+            for transfer in self.iter_transfers():
+                self.transfers.append(transfer)
+
+            print(f"Parsed {len(self.transfers)} USB transfers")
+            return True
+
+        except subprocess.CalledProcessError as e:
+            print(f"ERROR: tshark failed: {e}")
+            return False
+        except FileNotFoundError:
+            print("ERROR: tshark not found. Install with: sudo apt-get install tshark")
+            return False
+
+    def iter_transfers(self):
+        """
+        Stream USB transfers from the pcap file one at a time.
+
+        tshark output is consumed line by line, so callers that process
+        transfers as they arrive never hold the whole capture in memory.
+        Raises FileNotFoundError if tshark is missing and
+        subprocess.CalledProcessError if it fails.
+        """
         # Use fields that work across tshark versions; prefer explicit setup fields when available
         cmd = [
             'tshark', '-r', self.pcap_file,
@@ -113,129 +145,137 @@ class USBCaptureAnalyzer:
             '-e', 'usb.setup.wValue',
             '-e', 'usb.setup.wIndex',
             '-e', 'usb.setup.wLength',
+            '-e', 'usb.device_address',
             '-E', 'separator=|',
             '-Y', 'usb'
         ]
 
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-
-            for line in result.stdout.strip().split('\n'):
+            for line in proc.stdout:
+                line = line.rstrip('\n')
                 if not line:
                     continue
 
-                fields = line.split('|')
-                if len(fields) < 7:
-                    continue
-
-                # Base fields from tshark output
-                frame_num_str = fields[0]
-                time_str = fields[1]
-                transfer_type_code = fields[2]
-                direction_code = fields[3]
-                endpoint_str = fields[4]
-                data_len_str = fields[5]
-                capdata_hex = fields[6]
-
-                # Optional control-setup fields (may be empty)
-                bm_req_str = fields[7] if len(fields) > 7 else ''
-                b_req_str = fields[8] if len(fields) > 8 else ''
-                w_value_str = fields[9] if len(fields) > 9 else ''
-                w_index_str = fields[10] if len(fields) > 10 else ''
-                w_length_str = fields[11] if len(fields) > 11 else ''
-
-                # Parse basic values
-                frame_num = int(frame_num_str) if frame_num_str else 0
-                timestamp = float(time_str) if time_str else 0.0
-                endpoint = int(endpoint_str, 16) if endpoint_str else 0
-                data_len = int(data_len_str) if data_len_str else 0
-                data = bytes.fromhex(capdata_hex.replace(':', '')) if capdata_hex else b''
-
-                # Decode transfer type
-                transfer_type_map = {'0x02': 'CONTROL', '0x03': 'BULK', '0x01': 'INTERRUPT'}
-                transfer_type = transfer_type_map.get(transfer_type_code, 'UNKNOWN')
-
-                # Decode direction
-                direction = 'IN' if direction_code == '1' else 'OUT'
-
-                # For control transfers, populate setup fields
-                request_type = None
-                request = None
-                value = None
-                index = None
-
-                if transfer_type == 'CONTROL':
-                    # Prefer explicit setup fields from tshark when available
-                    if bm_req_str:
-                        try:
-                            request_type = int(bm_req_str, 16)
-                        except ValueError:
-                            request_type = None
-
-                    if b_req_str:
-                        try:
-                            # usb.setup.bRequest is BASE_DEC
-                            request = int(b_req_str)
-                        except ValueError:
-                            request = None
-
-                    if w_value_str:
-                        try:
-                            # usb.setup.wValue is BASE_HEX
-                            value = int(w_value_str, 16)
-                        except ValueError:
-                            value = None
-
-                    if w_index_str:
-                        try:
-                            # usb.setup.wIndex is BASE_DEC_HEX (e.g., 4096 or 0x1000)
-                            index = int(w_index_str, 0)
-                        except ValueError:
-                            index = None
-
-                    # Fallback: parse setup packet from capdata when setup fields are missing
-                    if request is None and len(data) >= 8:
-                        # USB control setup packet format:
-                        # Byte 0: bmRequestType
-                        # Byte 1: bRequest
-                        # Bytes 2-3: wValue (little-endian)
-                        # Bytes 4-5: wIndex (little-endian)
-                        # Bytes 6-7: wLength (little-endian)
-                        request_type = data[0]
-                        request = data[1]
-                        value = struct.unpack('<H', data[2:4])[0]
-                        index = struct.unpack('<H', data[4:6])[0]
-                        # Data after setup packet (if any)
-                        if len(data) > 8:
-                            data = data[8:]
-                        else:
-                            data = b''
-
-                transfer = USBTransfer(
-                    frame_number=frame_num,
-                    timestamp=timestamp,
-                    transfer_type=transfer_type,
-                    direction=direction,
-                    endpoint=endpoint,
-                    data=data,
-                    length=data_len,
-                    request_type=request_type,
-                    request=request,
-                    value=value,
-                    index=index
-                )
-
-                self.transfers.append(transfer)
-
-            print(f"Parsed {len(self.transfers)} USB transfers")
-            return True
-
-        except subprocess.CalledProcessError as e:
-            print(f"ERROR: tshark failed: {e}")
-            return False
-        except FileNotFoundError:
-            print("ERROR: tshark not found. Install with: sudo apt-get install tshark")
-            return False
+                transfer = self._parse_line(line)
+                if transfer is not None:
+                    yield transfer
+        except GeneratorExit:
+            # Caller stopped early; don't wait for tshark to finish the file
+            proc.kill()
+            raise
+        finally:
+            proc.stdout.close()
+            proc.wait()
+
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+    def _parse_line(self, line: str) -> Optional[USBTransfer]:
+        """Decode one line of tshark field output into a USBTransfer"""
+        fields = line.split('|')
+        if len(fields) < 7:
+            return None
+
+        # Base fields from tshark output
+        frame_num_str = fields[0]
+        time_str = fields[1]
+        transfer_type_code = fields[2]
+        direction_code = fields[3]
+        endpoint_str = fields[4]
+        data_len_str = fields[5]
+        capdata_hex = fields[6]
+
+        # Optional control-setup fields (may be empty)
+        bm_req_str = fields[7] if len(fields) > 7 else ''
+        b_req_str = fields[8] if len(fields) > 8 else ''
+        w_value_str = fields[9] if len(fields) > 9 else ''
+        w_index_str = fields[10] if len(fields) > 10 else ''
+        w_length_str = fields[11] if len(fields) > 11 else ''
+        device_str = fields[12] if len(fields) > 12 else ''
+
+        # Parse basic values
+        frame_num = int(frame_num_str) if frame_num_str else 0
+        timestamp = float(time_str) if time_str else 0.0
+        endpoint = int(endpoint_str, 16) if endpoint_str else 0
+        device = int(device_str) if device_str else 0
+        data_len = int(data_len_str) if data_len_str else 0
+        data = bytes.fromhex(capdata_hex.replace(':', '')) if capdata_hex else b''
+
+        # Decode transfer type
+        transfer_type_map = {'0x02': 'CONTROL', '0x03': 'BULK', '0x01': 'INTERRUPT'}
+        transfer_type = transfer_type_map.get(transfer_type_code, 'UNKNOWN')
+
+        # Decode direction
+        direction = 'IN' if direction_code == '1' else 'OUT'
+
+        # For control transfers, populate setup fields
+        request_type = None
+        request = None
+        value = None
+        index = None
+
+        if transfer_type == 'CONTROL':
+            # Prefer explicit setup fields from tshark when available
+            if bm_req_str:
+                try:
+                    request_type = int(bm_req_str, 16)
+                except ValueError:
+                    request_type = None
+
+            if b_req_str:
+                try:
+                    # usb.setup.bRequest is BASE_DEC
+                    request = int(b_req_str)
+                except ValueError:
+                    request = None
+
+            if w_value_str:
+                try:
+                    # usb.setup.wValue is BASE_HEX
+                    value = int(w_value_str, 16)
+                except ValueError:
+                    value = None
+
+            if w_index_str:
+                try:
+                    # usb.setup.wIndex is BASE_DEC_HEX (e.g., 4096 or 0x1000)
+                    index = int(w_index_str, 0)
+                except ValueError:
+                    index = None
+
+            # Fallback: parse setup packet from capdata when setup fields are missing
+            if request is None and len(data) >= 8:
+                # USB control setup packet format:
+                # Byte 0: bmRequestType
+                # Byte 1: bRequest
+                # Bytes 2-3: wValue (little-endian)
+                # Bytes 4-5: wIndex (little-endian)
+                # Bytes 6-7: wLength (little-endian)
+                request_type = data[0]
+                request = data[1]
+                value = struct.unpack('<H', data[2:4])[0]
+                index = struct.unpack('<H', data[4:6])[0]
+                # Data after setup packet (if any)
+                if len(data) > 8:
+                    data = data[8:]
+                else:
+                    data = b''
+
+        return USBTransfer(
+            frame_number=frame_num,
+            timestamp=timestamp,
+            transfer_type=transfer_type,
+            direction=direction,
+            endpoint=endpoint,
+            data=data,
+            length=data_len,
+            request_type=request_type,
+            request=request,
+            value=value,
+            index=index,
+            device=device
+        )
 
     def identify_sequences(self):
         """Identify protocol sequences in the transfers"""
@@ -417,49 +457,56 @@ class USBCaptureAnalyzer:
             with open(filepath, 'rb') as f:
                 data = f.read()
 
-            # Check for DDR binary (FIDB marker)
-            if b'FIDB' in data and len(data) >= 324:
-                pos = data.find(b'FIDB')
-                if pos >= 0 and pos + 324 <= len(data):
-                    ddr_data = data[pos:pos+324]
-                    # Verify RDD marker
-                    if b'RDD' in ddr_data[192:196] or b'RD\x00' in ddr_data[192:196]:
-                        ddr_file = os.path.join(output_dir, "ddr_binary.bin")
-                        with open(ddr_file, 'wb') as f:
-                            f.write(ddr_data)
-                        print(f"  ✓ Found DDR binary (324 bytes) -> {ddr_file}")
-                        self._analyze_ddr_binary(ddr_data)
+            # Check for DDR binary (FIDB marker); the RDD size gives the layout
+            pos = data.find(b'FIDB')
+            if pos >= 0 and pos + ddr_layout.RDD_OFFSET + 8 <= len(data):
+                rdd = data[pos + ddr_layout.RDD_OFFSET:pos + ddr_layout.RDD_OFFSET + 8]
+                size = ddr_layout.binary_size(struct.unpack('<I', rdd[4:])[0])
+                if rdd[1:4] == b'RDD' and size is not None and pos + size <= len(data):
+                    ddr_data = data[pos:pos + size]
+                    ddr_file = os.path.join(output_dir, "ddr_binary.bin")
+                    with open(ddr_file, 'wb') as f:
+                        f.write(ddr_data)
+                    print(f"  ✓ Found DDR binary ({size} bytes) -> {ddr_file}")
+                    self._analyze_ddr_binary(ddr_data)
+
+            # Classify content per 4 KB block; bootloaders are mostly code
+            is_code = True
+            if content_map.available() and len(data) >= content_map.BLOCK_SIZE:
+                blocks = content_map.ContentMap.from_buffer(data)
+                summary = blocks.summary()
+                is_code = summary.get('code', 0) >= 0.5
+                print(f"  {filename}: {blocks.describe()}")
 
             # Check for SPL (usually 8-16KB, starts with specific patterns)
-            if len(data) >= 8192 and len(data) <= 32768:
+            if len(data) >= 8192 and len(data) <= 32768 and is_code:
                 # SPL often has ARM/MIPS code patterns
                 print(f"  ? Possible SPL/bootloader: {filename} ({len(data)} bytes)")
 
             # Check for U-Boot (usually 200-500KB)
-            if len(data) >= 200000 and len(data) <= 600000:
+            if len(data) >= 200000 and len(data) <= 600000 and is_code:
                 print(f"  ? Possible U-Boot: {filename} ({len(data)} bytes)")
 
     def _analyze_ddr_binary(self, data: bytes):
         """Quick analysis of DDR binary"""
-        if len(data) != 324:
+        fields = ddr_layout.decode(data)
+        if fields is None:
             return
 
-        try:
-            # Parse FIDB section
-            crystal_freq = struct.unpack('<I', data[8:12])[0]
-            cpu_freq = struct.unpack('<I', data[12:16])[0]
-            ddr_freq = struct.unpack('<I', data[16:20])[0]
-
-            print(f"    Crystal: {crystal_freq/1000000:.1f} MHz")
-            print(f"    CPU: {cpu_freq/1000000:.1f} MHz")
-            print(f"    DDR: {ddr_freq/1000000:.1f} MHz")
-
-            # Parse RDD section
-            ddr_type = struct.unpack('<I', data[204:208])[0]
-            ddr_type_names = {0: "DDR3", 1: "DDR2", 2: "LPDDR2/LPDDR", 4: "LPDDR3"}
-            print(f"    DDR Type: {ddr_type_names.get(ddr_type, f'Unknown ({ddr_type})')}")
-        except:
-            pass
+        # Parse FIDB section
+        print(f"    Crystal: {fields['crystal_freq']/1000000:.1f} MHz")
+        print(f"    CPU: {fields['cpu_freq']/1000000:.1f} MHz")
+        print(f"    DDR: {fields['ddr_freq']/1000000:.1f} MHz")
+
+        # Parse RDD section
+        ddr_type = fields['ddr_type']
+        if 'chip_name' in fields:
+            chip_name = fields['chip_name'].split(b'\x00')[0].decode('ascii', 'replace')
+            print(f"    DDR Chip: {chip_name} (type 0x{ddr_type:02x})")
+        elif not ddr_layout.rdd_mapped(fields):
+            print(f"    DDR Type: n/a (T20 vendor RDD layout, size 0x{fields['rdd_size']:X})")
+        else:
+            print(f"    DDR Type: {ddr_layout.DDR_TYPE_NAMES.get(ddr_type, f'Unknown ({ddr_type})')}")
 
 def main():
     parser = argparse.ArgumentParser(
@@ -7,21 +7,62 @@ the exact sequence of commands and data needed for firmware writing.
 
 This helps reverse-engineer the correct write implementation for thingino-cloner.
 
+With --timeline, every VR_WRITE chunk is broken down into a per-chunk record
+keyed by the flash offset from its 40-byte handshake: handshake send time and
+response latency, bulk OUT duration, status polls and the gap to the next
+chunk. The records are written as CSV or JSON and summarized as protocol
+overhead vs data transfer vs device busy time.
+
 Usage:
     python3 analyze_write_operation.py <capture.pcap> [--extract-sequence]
+                                       [--timeline chunks.csv|chunks.json]
 """
 
 import sys
+import csv
+import json
+import zlib
 import subprocess
 import struct
 import argparse
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
 from enum import IntEnum
 
 # Import the analyzer
 from analyze_usb_capture import USBCaptureAnalyzer, USBTransfer, COMMAND_NAMES
 
+# Status requests polled between chunks (FW_READ and FW_READ_STATUS1-4)
+STATUS_REQUESTS = (0x10, 0x16, 0x19, 0x25, 0x26)
+
+# Bytes 24-27 (T31/T41) or 8-11 (A1) of a VR_WRITE handshake
+HANDSHAKE_MARKER = b'\x00\x00\x06\x00'
+
+@dataclass
+class ChunkRecord:
+    """Timeline of one VR_WRITE chunk (times in seconds from capture start)"""
+    index: int
+    flash_offset: int
+    offset_source: str              # "handshake" or "stream" (bytes sent so far)
+    size: int
+    crc_ok: Optional[bool]          # Handshake ~CRC32 vs the bulk OUT payload
+    handshake_time: float
+    handshake_latency: float
+    bulk_out_start: Optional[float] = None
+    bulk_out_duration: Optional[float] = None
+    status_polls: int = 0
+    status_poll_time: float = 0.0
+    gap_to_next: Optional[float] = None
+    total: Optional[float] = None
+
+    @property
+    def device_busy(self) -> Optional[float]:
+        """Time in the chunk not spent on USB transfers (sleeps, programming)"""
+        if self.total is None:
+            return None
+        return max(0.0, self.total - self.handshake_latency - (self.bulk_out_duration or 0.0)
+                   - self.status_poll_time)
+
 @dataclass
 class WriteSequence:
     """Represents a complete write sequence"""
@@ -29,11 +70,65 @@ class WriteSequence:
     data_size: Optional[int] = None
     chunk_size: Optional[int] = None
     transfers: List[USBTransfer] = None
+    # Span of the sequence in the capture's transfer list (submits and completions)
+    first_index: int = 0
+    last_index: int = 0
+    chunks: List[ChunkRecord] = field(default_factory=list)
     
     def __post_init__(self):
         if self.transfers is None:
             self.transfers = []
 
+def pair_urbs(transfers: List[USBTransfer]):
+    """
+    Pair usbmon submit and completion records into (submit, complete).
+
+    The cloner uses synchronous libusb calls, so records on one pipe
+    (device, type, endpoint, direction) alternate submit/completion. Control
+    submits are recognised by their setup packet, which resynchronises the
+    pairing after a dropped record. complete is None if the capture ends
+    mid-transfer.
+    """
+    pending: Dict[Tuple[int, str, int, str], USBTransfer] = {}
+    for transfer in transfers:
+        if transfer.transfer_type == 'CONTROL':
+            key = (transfer.device, 'CONTROL', transfer.endpoint, '')
+            if transfer.request is not None:
+                if key in pending:
+                    yield pending.pop(key), None
+                pending[key] = transfer
+            elif key in pending:
+                yield pending.pop(key), transfer
+            continue
+
+        key = (transfer.device, transfer.transfer_type, transfer.endpoint, transfer.direction)
+        if key in pending:
+            yield pending.pop(key), transfer
+        else:
+            pending[key] = transfer
+    for submit in pending.values():
+        yield submit, None
+
+def handshake_offset(handshake: bytes) -> Optional[int]:
+    """Flash offset from a 40-byte VR_WRITE handshake (T31/T41 or A1 layout)"""
+    if len(handshake) < 40:
+        return None
+    if handshake[24:28] == HANDSHAKE_MARKER:
+        return struct.unpack_from('<H', handshake, 10)[0] << 16
+    if handshake[8:12] == HANDSHAKE_MARKER:
+        return struct.unpack_from('<I', handshake, 12)[0]
+    return None
+
+def handshake_crc(handshake: bytes) -> Optional[int]:
+    """Inverted CRC32 field of a VR_WRITE handshake"""
+    if len(handshake) < 40:
+        return None
+    if handshake[24:28] == HANDSHAKE_MARKER:
+        return struct.unpack_from('<I', handshake, 28)[0]
+    if handshake[8:12] == HANDSHAKE_MARKER:
+        return struct.unpack_from('<I', handshake, 20)[0]
+    return None
+
 class WriteOperationAnalyzer:
     def __init__(self, pcap_file: str):
         self.pcap_file = pcap_file
@@ -62,10 +157,11 @@ class WriteOperationAnalyzer:
             if transfer.transfer_type == 'CONTROL' and transfer.request == 0x01:
                 # Save previous sequence if exists
                 if in_write_sequence and current_sequence.transfers:
+                    current_sequence.last_index = i - 1
                     self.write_sequences.append(current_sequence)
                 
                 # Start new sequence
-                current_sequence = WriteSequence()
+                current_sequence = WriteSequence(first_index=i)
                 in_write_sequence = True
                 
                 # Extract address from value and index
@@ -100,15 +196,130 @@ class WriteOperationAnalyzer:
                     current_sequence.transfers.append(transfer)
                     # End of sequence
                     if current_sequence.transfers:
+                        current_sequence.last_index = i
                         self.write_sequences.append(current_sequence)
                     in_write_sequence = False
                     current_sequence = WriteSequence()
         
         # Save final sequence if exists
         if in_write_sequence and current_sequence.transfers:
+            current_sequence.last_index = len(self.analyzer.transfers) - 1
             self.write_sequences.append(current_sequence)
         
         print(f"\nFound {len(self.write_sequences)} write sequence(s)")
+
+        for seq in self.write_sequences:
+            seq.chunks = self._build_chunk_timeline(seq)
+
+    def _build_chunk_timeline(self, seq: WriteSequence) -> List[ChunkRecord]:
+        """Per-chunk records for the VR_WRITE (0x12) chunks of one write sequence"""
+        chunks: List[ChunkRecord] = []
+        stream_offset = 0
+        handshake = b''
+        span = self.analyzer.transfers[seq.first_index:seq.last_index + 1]
+
+        for submit, complete in pair_urbs(span):
+            end = complete.timestamp if complete else submit.timestamp
+            duration = end - submit.timestamp
+
+            if submit.transfer_type == 'CONTROL' and submit.request == 0x12:
+                if chunks:
+                    chunks[-1].gap_to_next = submit.timestamp - self._chunk_end(chunks[-1])
+                    chunks[-1].total = submit.timestamp - chunks[-1].handshake_time
+                handshake = submit.data
+                offset = handshake_offset(handshake)
+                chunks.append(ChunkRecord(
+                    index=len(chunks),
+                    flash_offset=offset if offset is not None else stream_offset,
+                    offset_source='handshake' if offset is not None else 'stream',
+                    size=0,
+                    crc_ok=None,
+                    handshake_time=submit.timestamp,
+                    handshake_latency=duration,
+                ))
+            elif not chunks:
+                continue
+            elif (submit.transfer_type == 'BULK' and submit.direction == 'OUT'
+                  and chunks[-1].bulk_out_start is None):
+                chunk = chunks[-1]
+                chunk.size = len(submit.data)
+                chunk.bulk_out_start = submit.timestamp
+                chunk.bulk_out_duration = duration
+                expected = handshake_crc(handshake)
+                if expected is not None and submit.data:
+                    chunk.crc_ok = expected == (~zlib.crc32(submit.data) & 0xFFFFFFFF)
+                stream_offset += len(submit.data)
+            elif submit.transfer_type == 'CONTROL' and submit.request in STATUS_REQUESTS:
+                chunks[-1].status_polls += 1
+                chunks[-1].status_poll_time += duration
+
+        if chunks:
+            # Last chunk runs to the end of the sequence
+            last = chunks[-1]
+            last.total = max(span[-1].timestamp, self._chunk_end(last)) - last.handshake_time
+        return chunks
+
+    @staticmethod
+    def _chunk_end(chunk: ChunkRecord) -> float:
+        """End of the chunk's data stage (or of its handshake if no data followed)"""
+        if chunk.bulk_out_start is not None:
+            return chunk.bulk_out_start + chunk.bulk_out_duration
+        return chunk.handshake_time + chunk.handshake_latency
+
+    @property
+    def chunks(self) -> List[ChunkRecord]:
+        return [chunk for seq in self.write_sequences for chunk in seq.chunks]
+
+    def print_timeline_summary(self):
+        """Average per-chunk time split: protocol overhead, data transfer, device busy"""
+        chunks = [c for c in self.chunks if c.total is not None]
+        print("\n" + "="*80)
+        print("CHUNK TIMELINE")
+        print("="*80)
+        if not chunks:
+            print("No VR_WRITE chunks found")
+            return
+
+        count = len(chunks)
+        total = sum(c.total for c in chunks)
+        protocol = sum(c.handshake_latency + c.status_poll_time for c in chunks)
+        transfer = sum(c.bulk_out_duration or 0.0 for c in chunks)
+        busy = sum(c.device_busy for c in chunks)
+        data = sum(c.size for c in chunks)
+        polls = sum(c.status_polls for c in chunks)
+        from_handshake = sum(1 for c in chunks if c.offset_source == 'handshake')
+        bad_crc = [c for c in chunks if c.crc_ok is False]
+
+        print(f"Chunks: {count} ({from_handshake} keyed by handshake offset), "
+              f"{data} bytes in {total:.3f} s ({data / total / 1024:.1f} KB/s effective)")
+        print(f"Average chunk: {total / count * 1000:.1f} ms")
+        for label, value in (("Protocol overhead (handshake + status polls)", protocol),
+                             ("Data transfer (bulk OUT)", transfer),
+                             ("Device busy / idle gaps", busy)):
+            print(f"  {label:46s} {value / count * 1000:9.2f} ms  {100.0 * value / total:5.1f}%")
+        print(f"Status polls: {polls} ({polls / count:.1f} per chunk)")
+        if bad_crc:
+            print(f"⚠ {len(bad_crc)} chunk(s) whose data does not match the handshake CRC "
+                  f"(first at offset 0x{bad_crc[0].flash_offset:08X})")
+
+    def save_timeline(self, output_file: str):
+        """Write the chunk records as CSV or JSON (by file extension)"""
+        rows = []
+        for seq_num, seq in enumerate(self.write_sequences, 1):
+            for chunk in seq.chunks:
+                row = {'sequence': seq_num, **asdict(chunk), 'device_busy': chunk.device_busy}
+                rows.append(row)
+
+        with open(output_file, 'w', newline='') as f:
+            if output_file.endswith('.json'):
+                json.dump(rows, f, indent=2)
+            else:
+                fields = ['sequence'] + [name for name in ChunkRecord.__dataclass_fields__] + ['device_busy']
+                writer = csv.DictWriter(f, fieldnames=fields, lineterminator='\n')
+                writer.writeheader()
+                writer.writerows(rows)
+
+        print(f"\nChunk timeline ({len(rows)} chunks) saved to {output_file}")
     
     def print_sequences(self):
         """Print detailed information about write sequences"""
@@ -267,6 +478,8 @@ def main():
                        help='Output file for C code (default: write_sequence.c)')
     parser.add_argument('--py-output', default='write_sequence.py',
                        help='Output file for Python code (default: write_sequence.py)')
+    parser.add_argument('-t', '--timeline', metavar='FILE',
+                       help='Write per-chunk timeline records (.csv or .json) and print a time summary')
 
     args = parser.parse_args()
 
@@ -281,6 +494,10 @@ def main():
         analyzer.extract_c_code(args.c_output)
         analyzer.extract_python_code(args.py_output)
 
+    if args.timeline:
+        analyzer.print_timeline_summary()
+        analyzer.save_timeline(args.timeline)
+
     print("\n" + "="*80)
     print("Analysis complete!")
     print("="*80)
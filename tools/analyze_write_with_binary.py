@@ -9,70 +9,215 @@ the actual binary file being written. This helps identify:
 - Chunking patterns
 - Address mapping
 
+The capture is processed in a single streaming pass: each bulk OUT payload is
+correlated against the memory-mapped binary as soon as it is parsed and then
+dropped, so memory use stays at roughly one chunk plus the block index.
+With --jobs N the per-chunk correlation and transform detection fan out to
+N worker processes, which share the mapped binary and index with the parent
+(inherited on fork, not copied), and results are merged in chunk order.
+Payloads that simply continue the previous one are checked in the parent and
+never sent to a worker; a chunk that was correlated against a wrong guess of
+its offset is redone at merge time, so the output matches a serial run.
+
 Usage:
     python3 analyze_write_with_binary.py <capture.pcap> <binary_file> [options]
 """
 
+import os
 import sys
+import mmap
+import multiprocessing
 import subprocess
 import struct
 import argparse
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Iterable
 from pathlib import Path
+from collections import deque
 
 # Import the base analyzer
 from analyze_usb_capture import USBCaptureAnalyzer, USBTransfer, COMMAND_NAMES
+from binary_index import BlockIndex, StreamCorrelator, OffsetMap, MappedRange
+import transform_detector
+import content_map
+from transform_detector import TransformMatch
+
+# Bytes kept from each chunk and each novel range for hex dumps/pattern analysis
+CHUNK_HEAD_SIZE = 64
+NOVEL_SAMPLE_SIZE = 4096
+
+# Novel ranges shorter than this are not worth running the transform detector on
+MIN_TRANSFORM_SIZE = 16
+
+# Chunks in flight per worker in --jobs mode (bounds payload memory)
+JOBS_QUEUE_DEPTH = 4
 
 @dataclass
-class BinaryChunk:
-    """Represents a chunk of the binary file"""
-    offset: int
+class ChunkResult:
+    """Correlation of one bulk OUT transfer (the payload itself is not kept)"""
+    index: int
+    frame_number: int
+    usb_offset: int
     size: int
-    data: bytes
-    flash_address: Optional[int] = None
-    
-@dataclass
-class TransferredChunk:
-    """Represents data transferred over USB"""
-    transfer: USBTransfer
-    data: bytes
-    flash_address: Optional[int] = None
-    
+    flash_address: Optional[int]
+    head: bytes
+    ranges: List[MappedRange] = field(default_factory=list)
+    transforms: Dict[int, TransformMatch] = field(default_factory=dict)  # keyed by range usb_start
+
+    @property
+    def matched_bytes(self) -> int:
+        return sum(r.size for r in self.ranges if not r.is_novel)
+
+    @property
+    def binary_range(self) -> Optional[Tuple[int, int]]:
+        """(start, end) in the binary if the whole chunk maps contiguously"""
+        if len(self.ranges) == 1 and not self.ranges[0].is_novel:
+            return self.ranges[0].binary_start, self.ranges[0].binary_end
+        return None
+
 @dataclass
-class ChunkCorrelation:
-    """Correlation between binary chunk and USB transfer"""
-    binary_chunk: BinaryChunk
-    usb_chunk: TransferredChunk
-    match_type: str  # "exact", "partial", "transformed", "none"
-    match_offset: int = 0
-    differences: List[str] = field(default_factory=list)
+class CorrelationResult:
+    """Correlation of the whole USB stream, computed once and reused"""
+    binary_size: int
+    total_transfers: int = 0
+    total_usb: int = 0
+    chunks: List[ChunkResult] = field(default_factory=list)
+    offset_map: OffsetMap = field(default_factory=OffsetMap)
+    novel_samples: Dict[int, bytes] = field(default_factory=dict)
+
+    @property
+    def match_type(self) -> str:
+        """One of "exact", "overhead", "partial", "mapped" or "none" """
+        ranges = self.offset_map.ranges
+        matched = [r for r in ranges if not r.is_novel]
+
+        if len(matched) == 1:
+            m = matched[0]
+            if m.binary_start == 0 and m.size == self.binary_size:
+                return "exact" if len(ranges) == 1 else "overhead"
+            if len(ranges) == 1:
+                return "partial"
+
+        return "mapped" if matched else "none"
+
+    @property
+    def binary_offset(self) -> int:
+        """USB offset of the binary ("overhead") or binary offset of the USB data ("partial")"""
+        match_type = self.match_type
+        matched = self.offset_map.matched()
+        if match_type == "overhead":
+            return matched[0].usb_start
+        if match_type == "partial":
+            return matched[0].binary_start
+        return 0
+
+    def sample(self, usb_start: int, usb_end: int) -> bytes:
+        """Retained bytes of a novel USB range (may be truncated)"""
+        for start, data in self.novel_samples.items():
+            if start <= usb_start < start + len(data):
+                return data[usb_start - start:usb_end - start]
+        return b''
+
+def detect_chunk_transforms(binary, ranges: List[MappedRange], data: bytes,
+                            expected: int) -> Dict[int, TransformMatch]:
+    """Explain novel ranges of a payload by testing transforms of the binary
+
+    ranges are relative to data; the result is keyed by range start.
+    """
+    transforms = {}
+    for i, r in enumerate(ranges):
+        if not r.is_novel or r.size < MIN_TRANSFORM_SIZE:
+            continue
+
+        # Corresponding binary region: continue the previous match, back off
+        # from the next one, or fall back to the payload's expected position
+        if i > 0 and not ranges[i - 1].is_novel:
+            binary_offset = ranges[i - 1].binary_end
+        elif i + 1 < len(ranges) and not ranges[i + 1].is_novel:
+            binary_offset = ranges[i + 1].binary_start - r.size
+        else:
+            binary_offset = expected + r.usb_start
+
+        match = transform_detector.detect_transform(
+            data[r.usb_start:r.usb_end], binary, max(binary_offset, 0))
+        if match is not None:
+            transforms[r.usb_start] = match
+    return transforms
+
+def correlate_payload(index: BlockIndex, data: bytes, hint: int,
+                      detect_transforms: bool) -> Tuple[List[MappedRange], Dict[int, TransformMatch]]:
+    """Correlate one payload; ranges and transforms are relative to data"""
+    ranges = index.correlate_chunk(data, hint)
+    transforms = {}
+    if detect_transforms:
+        transforms = detect_chunk_transforms(index.binary, ranges, data, hint)
+    return ranges, transforms
+
+# Block index used by --jobs worker processes (inherited when forked)
+_worker_index: Optional[BlockIndex] = None
+
+def _init_worker(binary_file: str):
+    """Pool initializer: map and index the binary unless inherited by fork"""
+    global _worker_index
+    if _worker_index is not None:
+        return
+    with open(binary_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > 0:
+            binary = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            binary = b''
+    _worker_index = BlockIndex(binary).build()
+
+def _correlate_job(data: bytes, hint: int, detect_transforms: bool):
+    """Worker entry point for one chunk"""
+    return correlate_payload(_worker_index, data, hint, detect_transforms)
 
 class WriteWithBinaryAnalyzer:
-    def __init__(self, pcap_file: str, binary_file: str, verbose: bool = False):
+    def __init__(self, pcap_file: str, binary_file: str, verbose: bool = False,
+                 detect_transforms: bool = True, show_content_map: bool = False,
+                 jobs: int = 1):
         self.pcap_file = pcap_file
         self.binary_file = binary_file
         self.verbose = verbose
-        
+        self.detect_transforms = detect_transforms and transform_detector.available()
+        self.show_content_map = show_content_map and content_map.available()
+        self.jobs = max(1, jobs)
+
         self.analyzer = USBCaptureAnalyzer(pcap_file)
         self.binary_data = None
         self.binary_size = 0
-        
+
+        # One entry per SET_DATA_ADDR/SET_DATA_LEN with the state after it and
+        # its frame number (transfers are streamed, not kept, so entries no
+        # longer hold the transfer itself or repeat for every later transfer)
         self.write_sequences = []
-        self.bulk_transfers = []
-        self.correlations = []
-        
+        self.block_index: Optional[BlockIndex] = None
+        self.result: Optional[CorrelationResult] = None
+
+        self._correlator: Optional[StreamCorrelator] = None
+        self._stream_map: Optional[content_map.ContentMap] = None
+
+        # --jobs mode: worker pool, chunks in flight, speculative next offset
+        self._pool = None
+        self._pending = deque()
+        self._speculative_next = 0
+        self._current_flash_addr = None
+        self._current_data_size = None
+
     def load_binary(self):
-        """Load the binary file"""
+        """Memory-map the binary file"""
         print(f"Loading binary file: {self.binary_file}")
-        
+
         try:
             with open(self.binary_file, 'rb') as f:
-                self.binary_data = f.read()
-            
+                if os.fstat(f.fileno()).st_size > 0:
+                    self.binary_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    self.binary_data = b''
+
             self.binary_size = len(self.binary_data)
             print(f"Binary size: {self.binary_size} bytes ({self.binary_size/1024:.1f} KB)")
-            
+
             # Show binary header
             if len(self.binary_data) >= 64:
                 print("\nBinary header (first 64 bytes):")
@@ -81,120 +226,251 @@ class WriteWithBinaryAnalyzer:
                     hex_str = ' '.join(f'{b:02x}' for b in chunk)
                     ascii_str = ''.join(chr(b) if 32 <= b < 127 else '.' for b in chunk)
                     print(f"  {i:04x}: {hex_str:<48} {ascii_str}")
-            
+
+            self.block_index = BlockIndex(self.binary_data)
             return True
-            
+
         except FileNotFoundError:
             print(f"ERROR: Binary file not found: {self.binary_file}")
             return False
         except Exception as e:
             print(f"ERROR: Failed to load binary: {e}")
             return False
-    
-    def analyze(self):
-        """Analyze the capture"""
+
+    def analyze(self, transfers: Optional[Iterable[USBTransfer]] = None):
+        """Analyze the capture, correlating bulk data as it is parsed
+
+        transfers: already decoded transfers to use instead of running tshark
+        on the capture (e.g. from generate_usbmon_capture.read_transfers)
+        """
         print(f"\nAnalyzing USB capture: {self.pcap_file}")
-        
-        if not self.analyzer.parse_pcap():
+
+        if self.block_index is None:
+            print("ERROR: Binary data not loaded")
+            return False
+
+        self.result = CorrelationResult(binary_size=self.binary_size)
+        self._correlator = StreamCorrelator(self.block_index)
+        self.result.offset_map = self._correlator.offset_map
+
+        if self.detect_transforms:
+            print("\nTransform detection enabled for unmatched data")
+        elif not transform_detector.available():
+            print("\nNOTE: NumPy not found, transform detection disabled (pip install numpy)")
+
+        if self.show_content_map:
+            self._stream_map = content_map.ContentMap()
+
+        self._speculative_next = 0
+
+        print("\nExtracting write sequences and bulk OUT transfers...")
+        try:
+            for transfer in (self.analyzer.iter_transfers() if transfers is None else transfers):
+                self._process_transfer(transfer)
+            while self._pending:
+                self._merge_next()
+        except subprocess.CalledProcessError as e:
+            print(f"ERROR: tshark failed: {e}")
+            return False
+        except FileNotFoundError:
+            print("ERROR: tshark not found. Install with: sudo apt-get install tshark")
             return False
-        
-        self._extract_write_sequences()
-        self._extract_bulk_transfers()
+        finally:
+            self._stop_pool()
+
+        print(f"Parsed {self.result.total_transfers} USB transfers")
+        print(f"Found {len(self.result.chunks)} bulk OUT transfers")
+        total_transferred = self.result.total_usb
+        print(f"Total data transferred: {total_transferred} bytes ({total_transferred/1024:.1f} KB)")
+
         self._correlate_data()
-        
+
+        if self._stream_map is not None:
+            self._stream_map.flush()
+            self._print_content_maps()
+
         return True
-    
-    def _extract_write_sequences(self):
-        """Extract write sequences from transfers"""
-        print("\nExtracting write sequences...")
-        
-        current_flash_addr = None
-        current_data_size = None
-        
-        for transfer in self.analyzer.transfers:
+
+    def _process_transfer(self, transfer: USBTransfer):
+        """Track write sequence state and correlate bulk OUT payloads"""
+        self.result.total_transfers += 1
+
+        if transfer.transfer_type == 'CONTROL' and transfer.value is not None and transfer.index is not None:
             # SET_DATA_ADDR (0x01)
-            if transfer.transfer_type == 'CONTROL' and transfer.request == 0x01:
-                if transfer.value is not None and transfer.index is not None:
-                    current_flash_addr = (transfer.index << 16) | transfer.value
-                    print(f"  Flash address set to: 0x{current_flash_addr:08X}")
-            
+            if transfer.request == 0x01:
+                self._current_flash_addr = (transfer.index << 16) | transfer.value
+                print(f"  Flash address set to: 0x{self._current_flash_addr:08X}")
+                self._record_write_sequence(transfer)
+
             # SET_DATA_LEN (0x02)
-            elif transfer.transfer_type == 'CONTROL' and transfer.request == 0x02:
-                if transfer.value is not None and transfer.index is not None:
-                    current_data_size = (transfer.index << 16) | transfer.value
-                    print(f"  Data size set to: {current_data_size} bytes (0x{current_data_size:X})")
-            
-            # Store sequence info
-            if current_flash_addr is not None or current_data_size is not None:
-                self.write_sequences.append({
-                    'flash_addr': current_flash_addr,
-                    'data_size': current_data_size,
-                    'transfer': transfer
-                })
-    
-    def _extract_bulk_transfers(self):
-        """Extract bulk OUT transfers (actual data)"""
-        print("\nExtracting bulk OUT transfers...")
-        
-        current_flash_addr = None
-        
-        for transfer in self.analyzer.transfers:
-            # Track current flash address
-            if transfer.transfer_type == 'CONTROL' and transfer.request == 0x01:
-                if transfer.value is not None and transfer.index is not None:
-                    current_flash_addr = (transfer.index << 16) | transfer.value
-            
-            # Extract bulk OUT data
-            if transfer.transfer_type == 'BULK' and transfer.direction == 'OUT' and len(transfer.data) > 0:
-                chunk = TransferredChunk(
-                    transfer=transfer,
-                    data=transfer.data,
-                    flash_address=current_flash_addr
-                )
-                self.bulk_transfers.append(chunk)
-                
-                if self.verbose:
-                    print(f"  Bulk OUT: {len(transfer.data)} bytes at flash 0x{current_flash_addr:08X}" 
-                          if current_flash_addr else f"  Bulk OUT: {len(transfer.data)} bytes")
-        
-        print(f"Found {len(self.bulk_transfers)} bulk OUT transfers")
-        total_transferred = sum(len(t.data) for t in self.bulk_transfers)
-        print(f"Total data transferred: {total_transferred} bytes ({total_transferred/1024:.1f} KB)")
+            elif transfer.request == 0x02:
+                self._current_data_size = (transfer.index << 16) | transfer.value
+                print(f"  Data size set to: {self._current_data_size} bytes (0x{self._current_data_size:X})")
+                self._record_write_sequence(transfer)
+
+        # Correlate bulk OUT data (actual payload)
+        if transfer.transfer_type == 'BULK' and transfer.direction == 'OUT' and len(transfer.data) > 0:
+            self._correlate_chunk(transfer)
+
+    def _record_write_sequence(self, transfer: USBTransfer):
+        """Store the address/size state set by a SET_DATA_ADDR/SET_DATA_LEN transfer"""
+        self.write_sequences.append({
+            'flash_addr': self._current_flash_addr,
+            'data_size': self._current_data_size,
+            'frame': transfer.frame_number
+        })
+
+    def _start_pool(self):
+        """Start worker processes sharing the mapped binary and block index"""
+        global _worker_index
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            # Build once here; forked workers inherit the mmap and index pages
+            if not self.block_index.built:
+                print("Building block index...")
+                self.block_index.build()
+            _worker_index = self.block_index
+            context = multiprocessing.get_context('fork')
+        else:
+            print("NOTE: fork not available, each worker maps and indexes the binary itself")
+            context = multiprocessing.get_context()
+
+        print(f"Correlating with {self.jobs} worker processes")
+        self._pool = context.Pool(self.jobs, initializer=_init_worker,
+                                  initargs=(self.binary_file,))
+
+    def _stop_pool(self):
+        """Shut the worker pool down (abandoning unmerged chunks on error)"""
+        if self._pool is None:
+            self._pending.clear()
+            return
+        if self._pending:
+            self._pool.terminate()
+            self._pending.clear()
+        else:
+            self._pool.close()
+        self._pool.join()
+        self._pool = None
+
+    def _correlate_chunk(self, transfer: USBTransfer):
+        """Correlate one bulk OUT payload inline or hand it to a worker"""
+        data = transfer.data
+
+        if self.jobs == 1:
+            ranges, transforms = correlate_payload(
+                self.block_index, data, self._correlator.expected_binary_offset,
+                self.detect_transforms)
+            self._merge_chunk(transfer.frame_number, self._current_flash_addr,
+                              data, ranges, transforms)
+            return
+
+        if len(self._pending) >= self.jobs * JOBS_QUEUE_DEPTH:
+            self._merge_next()
+
+        # Workers can't see earlier results, so assume this payload continues
+        # the previous one; _merge_next redoes the chunk if the guess was wrong
+        hint = self._speculative_next
+        self._speculative_next += len(data)
+
+        # A payload that simply continues is a single compare: keep it here
+        # instead of shipping it to a worker
+        if self.block_index.matches_at(data, hint):
+            job = None
+        else:
+            # Started on first use, so captures that only continue never pay for it
+            if self._pool is None:
+                self._start_pool()
+            job = self._pool.apply_async(_correlate_job, (data, hint, self.detect_transforms))
+        self._pending.append((transfer.frame_number, self._current_flash_addr, data, hint, job))
+
+    def _merge_next(self):
+        """Merge the oldest in-flight chunk, keeping chunk order"""
+        frame_number, flash_address, data, hint, job = self._pending.popleft()
+
+        expected = self._correlator.expected_binary_offset
+        if hint != expected:
+            # Correlated against a wrong guess, which can still match in
+            # repeated content (padding); redo it as a serial run would
+            ranges, transforms = correlate_payload(
+                self.block_index, data, expected, self.detect_transforms)
+        elif job is None:
+            ranges, transforms = [MappedRange(0, len(data), hint)], {}
+        else:
+            ranges, transforms = job.get()
+
+        self._merge_chunk(frame_number, flash_address, data, ranges, transforms)
+
+        # Re-anchor speculation for chunks submitted from now on
+        self._speculative_next = (self._correlator.expected_binary_offset
+                                  + sum(len(p[2]) for p in self._pending))
+
+    def _merge_chunk(self, frame_number: int, flash_address: Optional[int], data: bytes,
+                     ranges: List[MappedRange], transforms: Dict[int, TransformMatch]):
+        """Add one correlated payload to the result and keep only its summary"""
+        usb_offset = self._correlator.usb_offset
+        ranges = self._correlator.merge(ranges, len(data))
+
+        # Keep a bounded sample of novel bytes for header/pattern analysis
+        for r in ranges:
+            if r.is_novel:
+                start = r.usb_start - usb_offset
+                self.result.novel_samples[r.usb_start] = bytes(
+                    data[start:start + min(r.size, NOVEL_SAMPLE_SIZE)])
+
+        chunk = ChunkResult(
+            index=len(self.result.chunks),
+            frame_number=frame_number,
+            usb_offset=usb_offset,
+            size=len(data),
+            flash_address=flash_address,
+            head=bytes(data[:CHUNK_HEAD_SIZE]),
+            ranges=ranges,
+            transforms={usb_offset + start: match for start, match in transforms.items()}
+        )
+        if self._stream_map is not None:
+            self._stream_map.feed(data)
+        self.result.chunks.append(chunk)
+        self.result.total_usb += len(data)
+
+        if self.verbose:
+            print(f"  Bulk OUT: {len(data)} bytes at flash 0x{flash_address:08X}"
+                  if flash_address else f"  Bulk OUT: {len(data)} bytes")
 
     def _correlate_data(self):
-        """Correlate USB transfers with binary data"""
+        """Report how the USB transfers correlate with the binary data"""
         print("\n" + "="*80)
         print("CORRELATING USB TRANSFERS WITH BINARY DATA")
         print("="*80)
 
-        if not self.binary_data:
+        if self.result is None:
             print("ERROR: Binary data not loaded")
             return
 
-        # Concatenate all bulk OUT data
-        all_usb_data = b''.join(t.data for t in self.bulk_transfers)
-        print(f"\nTotal USB data: {len(all_usb_data)} bytes")
+        result = self.result
+        print(f"\nTotal USB data: {result.total_usb} bytes")
         print(f"Binary size: {self.binary_size} bytes")
 
+        match_type = result.match_type
+
         # Check if USB data matches binary exactly
-        if all_usb_data == self.binary_data:
+        if match_type == "exact":
             print("\n✓ USB data matches binary EXACTLY!")
             print("  No transformation, encryption, or compression detected")
             self._analyze_exact_match()
             return
 
         # Check if binary is contained in USB data
-        if self.binary_data in all_usb_data:
+        if match_type == "overhead":
             print("\n✓ Binary found within USB data")
-            offset = all_usb_data.find(self.binary_data)
+            offset = result.binary_offset
             print(f"  Binary starts at offset {offset} in USB stream")
-            self._analyze_with_overhead(all_usb_data, offset)
+            self._analyze_with_overhead(offset)
             return
 
         # Check if USB data is contained in binary (partial write)
-        if all_usb_data in self.binary_data:
+        if match_type == "partial":
             print("\n✓ USB data is subset of binary (partial write)")
-            offset = self.binary_data.find(all_usb_data)
+            offset = result.binary_offset
             print(f"  USB data corresponds to binary offset {offset}")
             self._analyze_partial_write(offset)
             return
@@ -207,46 +483,44 @@ class WriteWithBinaryAnalyzer:
         """Analyze when USB data matches binary exactly"""
         print("\nChunk Analysis:")
 
-        binary_offset = 0
-
-        for i, chunk in enumerate(self.bulk_transfers):
-            chunk_size = len(chunk.data)
-            binary_chunk = self.binary_data[binary_offset:binary_offset + chunk_size]
+        for chunk in self.result.chunks:
+            chunk_size = chunk.size
+            binary_offset = chunk.usb_offset
 
-            if chunk.data == binary_chunk:
+            if chunk.binary_range == (binary_offset, binary_offset + chunk_size):
                 status = "✓ MATCH"
             else:
                 status = "✗ MISMATCH"
 
             flash_addr_str = f"0x{chunk.flash_address:08X}" if chunk.flash_address else "Unknown"
 
-            print(f"  Chunk {i+1:3d}: {chunk_size:6d} bytes at flash {flash_addr_str:12s} "
+            print(f"  Chunk {chunk.index+1:3d}: {chunk_size:6d} bytes at flash {flash_addr_str:12s} "
                   f"binary[0x{binary_offset:06X}:0x{binary_offset+chunk_size:06X}] {status}")
 
-            binary_offset += chunk_size
-
-    def _analyze_with_overhead(self, all_usb_data: bytes, binary_offset: int):
+    def _analyze_with_overhead(self, binary_offset: int):
         """Analyze when binary is found within USB data (has overhead)"""
         print("\nProtocol Overhead Analysis:")
+        total_usb = self.result.total_usb
 
         # Analyze data before binary
         if binary_offset > 0:
-            overhead_before = all_usb_data[:binary_offset]
+            overhead_before = self.result.sample(0, binary_offset)
             print(f"\nData BEFORE binary ({binary_offset} bytes):")
-            self._analyze_overhead_data(overhead_before, "HEADER/PREFIX")
+            self._analyze_overhead_data(overhead_before, "HEADER/PREFIX", binary_offset)
 
         # Analyze data after binary
         overhead_after_offset = binary_offset + self.binary_size
-        if overhead_after_offset < len(all_usb_data):
-            overhead_after = all_usb_data[overhead_after_offset:]
-            print(f"\nData AFTER binary ({len(overhead_after)} bytes):")
-            self._analyze_overhead_data(overhead_after, "FOOTER/SUFFIX")
+        if overhead_after_offset < total_usb:
+            overhead_after = self.result.sample(overhead_after_offset, total_usb)
+            print(f"\nData AFTER binary ({total_usb - overhead_after_offset} bytes):")
+            self._analyze_overhead_data(overhead_after, "FOOTER/SUFFIX",
+                                        total_usb - overhead_after_offset)
 
         # Show which chunks contain overhead
         print("\nChunk Breakdown:")
-        usb_offset = 0
-        for i, chunk in enumerate(self.bulk_transfers):
-            chunk_size = len(chunk.data)
+        for chunk in self.result.chunks:
+            chunk_size = chunk.size
+            usb_offset = chunk.usb_offset
             chunk_end = usb_offset + chunk_size
 
             # Determine what this chunk contains
@@ -261,14 +535,14 @@ class WriteWithBinaryAnalyzer:
                 content = "MIXED (overhead + binary)"
 
             flash_addr_str = f"0x{chunk.flash_address:08X}" if chunk.flash_address else "Unknown"
-            print(f"  Chunk {i+1:3d}: {chunk_size:6d} bytes at flash {flash_addr_str:12s} - {content}")
-
-            usb_offset += chunk_size
+            print(f"  Chunk {chunk.index+1:3d}: {chunk_size:6d} bytes at flash {flash_addr_str:12s} - {content}")
 
-    def _analyze_overhead_data(self, data: bytes, label: str):
-        """Analyze overhead/protocol data"""
+    def _analyze_overhead_data(self, data: bytes, label: str, size: Optional[int] = None):
+        """Analyze overhead/protocol data (data may be a truncated sample)"""
         print(f"\n{label} Data Analysis:")
-        print(f"  Size: {len(data)} bytes")
+        print(f"  Size: {size if size is not None else len(data)} bytes")
+        if size is not None and size > len(data):
+            print(f"  (first {len(data)} bytes retained for analysis)")
 
         # Show hex dump
         print(f"  Hex dump:")
@@ -315,49 +589,58 @@ class WriteWithBinaryAnalyzer:
 
     def _analyze_partial_write(self, binary_offset: int):
         """Analyze when only part of binary is written"""
+        total_usb = self.result.total_usb
         print(f"\nPartial Write Analysis:")
-        print(f"  Writing binary[0x{binary_offset:06X}:0x{binary_offset + len(all_usb_data):06X}]")
-        print(f"  This is {len(all_usb_data)} bytes out of {self.binary_size} total")
+        print(f"  Writing binary[0x{binary_offset:06X}:0x{binary_offset + total_usb:06X}]")
+        print(f"  This is {total_usb} bytes out of {self.binary_size} total")
 
         # Show which part of binary is being written
-        percentage = (len(all_usb_data) / self.binary_size) * 100
+        percentage = (total_usb / self.binary_size) * 100
         print(f"  Writing {percentage:.1f}% of the binary")
 
     def _analyze_chunked_correlation(self):
-        """Analyze chunk-by-chunk to find correlations"""
-        print("\nSearching for binary chunks in USB transfers...")
+        """Show how each USB chunk maps onto the binary via the block index"""
+        if self.block_index is not None and self.block_index.built:
+            print(f"\nContent-defined block index: {len(self.block_index.fixed)} fixed blocks, "
+                  f"{len(self.block_index.cdc)} content-defined blocks")
 
+        print("\nMapping USB chunks to binary offsets...")
         matches_found = 0
 
-        for i, usb_chunk in enumerate(self.bulk_transfers):
-            # Search for this USB chunk in the binary
-            if usb_chunk.data in self.binary_data:
-                offset = self.binary_data.find(usb_chunk.data)
-                matches_found += 1
+        for chunk in self.result.chunks:
+            matched = chunk.matched_bytes
+            flash_addr_str = f"0x{chunk.flash_address:08X}" if chunk.flash_address else "Unknown"
 
-                flash_addr_str = f"0x{usb_chunk.flash_address:08X}" if usb_chunk.flash_address else "Unknown"
-                print(f"  ✓ Chunk {i+1}: {len(usb_chunk.data)} bytes at flash {flash_addr_str} "
-                      f"matches binary[0x{offset:06X}:0x{offset+len(usb_chunk.data):06X}]")
+            if matched == chunk.size:
+                matches_found += 1
+                status = "✓"
+            elif matched > 0:
+                status = "~"
             else:
-                # Try to find partial matches
-                match_size = self._find_largest_match(usb_chunk.data, self.binary_data)
-
-                if match_size > 64:  # Significant partial match
-                    print(f"  ~ Chunk {i+1}: {len(usb_chunk.data)} bytes has {match_size} byte partial match")
-                else:
-                    print(f"  ✗ Chunk {i+1}: {len(usb_chunk.data)} bytes - NO MATCH (transformed?)")
+                status = "✗"
+
+            print(f"  {status} Chunk {chunk.index+1}: {chunk.size} bytes at flash {flash_addr_str}, "
+                  f"{matched} bytes mapped")
+            if status != "✓":
+                for r in chunk.ranges:
+                    print(f"      {r.describe()}")
+                    if r.usb_start in chunk.transforms:
+                        print(f"        ↳ transform: {chunk.transforms[r.usb_start].describe()}")
+
+            # Show first 64 bytes for analysis
+            if status == "✗" and self.verbose and len(chunk.head) >= 16:
+                print(f"      First 64 bytes:")
+                for j in range(0, len(chunk.head), 16):
+                    line = chunk.head[j:j+16]
+                    hex_str = ' '.join(f'{b:02x}' for b in line)
+                    print(f"        {j:04x}: {hex_str}")
 
-                    # Show first 64 bytes for analysis
-                    if self.verbose and len(usb_chunk.data) >= 16:
-                        print(f"      First 64 bytes:")
-                        for j in range(0, min(len(usb_chunk.data), 64), 16):
-                            chunk = usb_chunk.data[j:j+16]
-                            hex_str = ' '.join(f'{b:02x}' for b in chunk)
-                            print(f"        {j:04x}: {hex_str}")
+        self._print_offset_map()
+        self._print_transform_summary()
 
-        print(f"\nMatched {matches_found} out of {len(self.bulk_transfers)} chunks")
+        print(f"\nMatched {matches_found} out of {len(self.result.chunks)} chunks")
 
-        if matches_found == 0:
+        if self.result.offset_map.matched_bytes == 0:
             print("\n⚠ WARNING: No chunks matched!")
             print("  Possible reasons:")
             print("  - Data is encrypted")
@@ -365,24 +648,54 @@ class WriteWithBinaryAnalyzer:
             print("  - Wrong binary file")
             print("  - Capture is from a different operation")
 
-    def _find_largest_match(self, needle: bytes, haystack: bytes) -> int:
-        """Find the largest contiguous match between needle and haystack"""
-        max_match = 0
+    def _print_offset_map(self):
+        """Print the USB stream to binary offset map"""
+        offset_map = self.result.offset_map
+        total = offset_map.total_bytes
+
+        print("\nOffset Map (USB stream -> binary):")
+        for r in offset_map:
+            print(f"  {r.describe()}")
+
+        if total:
+            print(f"\n  Mapped: {offset_map.matched_bytes} bytes "
+                  f"({offset_map.matched_bytes * 100 / total:.1f}%)")
+            print(f"  Novel:  {offset_map.novel_bytes} bytes "
+                  f"({offset_map.novel_bytes * 100 / total:.1f}%)")
+
+    def _print_transform_summary(self):
+        """Print how many novel ranges each detected transform explains"""
+        counts = {}
+        for chunk in self.result.chunks:
+            for match in chunk.transforms.values():
+                counts[match.name] = counts.get(match.name, 0) + 1
+
+        if not counts:
+            return
+
+        print("\nDetected Transforms:")
+        for name, count in sorted(counts.items(), key=lambda x: x[1], reverse=True):
+            print(f"  {name:10s}: {count} range(s)")
 
-        # Try different starting positions in needle
-        for start in range(0, len(needle), 16):
-            for size in range(len(needle) - start, 0, -16):
-                chunk = needle[start:start+size]
-                if chunk in haystack:
-                    max_match = max(max_match, size)
-                    break
+    def _print_content_maps(self):
+        """Print per-block content maps of the source image and USB stream"""
+        print("\n" + "="*80)
+        print("CONTENT MAP")
+        print("="*80)
 
-        return max_match
+        image_map = content_map.ContentMap.from_buffer(self.binary_data)
+        image_map.print_map(f"Source image: {self.binary_file}")
+        print(f"\n  Summary: {image_map.describe()}")
+
+        self._stream_map.print_map("USB bulk OUT stream")
+        print(f"\n  Summary: {self._stream_map.describe()}")
 
     def generate_report(self, output_file: str):
         """Generate detailed correlation report"""
         print(f"\nGenerating detailed report: {output_file}")
 
+        result = self.result
+
         with open(output_file, 'w') as f:
             f.write("="*80 + "\n")
             f.write("USB WRITE OPERATION WITH BINARY CORRELATION REPORT\n")
@@ -394,27 +707,32 @@ class WriteWithBinaryAnalyzer:
 
             # USB transfer summary
             f.write("USB Transfer Summary:\n")
-            f.write(f"  Total transfers: {len(self.analyzer.transfers)}\n")
-            f.write(f"  Bulk OUT transfers: {len(self.bulk_transfers)}\n")
+            f.write(f"  Total transfers: {result.total_transfers}\n")
+            f.write(f"  Bulk OUT transfers: {len(result.chunks)}\n")
 
-            total_usb = sum(len(t.data) for t in self.bulk_transfers)
+            total_usb = result.total_usb
             f.write(f"  Total data transferred: {total_usb} bytes ({total_usb/1024:.1f} KB)\n\n")
 
             # Correlation summary
             f.write("Correlation Analysis:\n")
-            all_usb_data = b''.join(t.data for t in self.bulk_transfers)
+            match_type = result.match_type
 
-            if all_usb_data == self.binary_data:
+            if match_type == "exact":
                 f.write("  ✓ USB data matches binary EXACTLY\n")
                 f.write("  No transformation detected\n")
-            elif self.binary_data in all_usb_data:
-                offset = all_usb_data.find(self.binary_data)
-                f.write(f"  ✓ Binary found in USB data at offset {offset}\n")
-                f.write(f"  Protocol overhead: {len(all_usb_data) - self.binary_size} bytes\n")
-            elif all_usb_data in self.binary_data:
-                offset = self.binary_data.find(all_usb_data)
+            elif match_type == "overhead":
+                f.write(f"  ✓ Binary found in USB data at offset {result.binary_offset}\n")
+                f.write(f"  Protocol overhead: {total_usb - self.binary_size} bytes\n")
+            elif match_type == "partial":
+                offset = result.binary_offset
                 f.write(f"  ✓ Partial write detected\n")
-                f.write(f"  Writing binary[{offset}:{offset+len(all_usb_data)}]\n")
+                f.write(f"  Writing binary[{offset}:{offset+total_usb}]\n")
+            elif match_type == "mapped":
+                f.write(f"  ~ Block index mapped {result.offset_map.matched_bytes} of "
+                        f"{result.offset_map.total_bytes} bytes\n")
+                f.write("  Offset map (USB stream -> binary):\n")
+                for r in result.offset_map:
+                    f.write(f"    {r.describe()}\n")
             else:
                 f.write("  ⚠ No direct correlation found\n")
                 f.write("  Data may be transformed (encrypted/compressed)\n")
@@ -424,32 +742,34 @@ class WriteWithBinaryAnalyzer:
             f.write("="*80 + "\n\n")
 
             # Detailed chunk analysis
-            usb_offset = 0
-            for i, chunk in enumerate(self.bulk_transfers):
-                f.write(f"Chunk {i+1}:\n")
-                f.write(f"  USB offset: 0x{usb_offset:06X}\n")
-                f.write(f"  Size: {len(chunk.data)} bytes\n")
+            for chunk in result.chunks:
+                f.write(f"Chunk {chunk.index+1}:\n")
+                f.write(f"  USB offset: 0x{chunk.usb_offset:06X}\n")
+                f.write(f"  Size: {chunk.size} bytes\n")
 
                 if chunk.flash_address:
                     f.write(f"  Flash address: 0x{chunk.flash_address:08X}\n")
 
                 # Check if chunk is in binary
-                if chunk.data in self.binary_data:
-                    bin_offset = self.binary_data.find(chunk.data)
-                    f.write(f"  ✓ Matches binary[0x{bin_offset:06X}:0x{bin_offset+len(chunk.data):06X}]\n")
+                binary_range = chunk.binary_range
+                if binary_range:
+                    f.write(f"  ✓ Matches binary[0x{binary_range[0]:06X}:0x{binary_range[1]:06X}]\n")
                 else:
                     f.write(f"  ✗ No exact match in binary\n")
+                    for r in chunk.ranges:
+                        f.write(f"    {r.describe()}\n")
+                        if r.usb_start in chunk.transforms:
+                            f.write(f"      Transform: {chunk.transforms[r.usb_start].describe()}\n")
 
                 # Show first 64 bytes
                 f.write(f"  First 64 bytes:\n")
-                for j in range(0, min(len(chunk.data), 64), 16):
-                    line = chunk.data[j:j+16]
+                for j in range(0, len(chunk.head), 16):
+                    line = chunk.head[j:j+16]
                     hex_str = ' '.join(f'{b:02x}' for b in line)
                     ascii_str = ''.join(chr(b) if 32 <= b < 127 else '.' for b in line)
                     f.write(f"    {j:04x}: {hex_str:<48} {ascii_str}\n")
 
                 f.write("\n")
-                usb_offset += len(chunk.data)
 
         print(f"Report saved to: {output_file}")
 
@@ -459,30 +779,36 @@ class WriteWithBinaryAnalyzer:
         print("ANALYSIS SUMMARY")
         print("="*80)
 
+        result = self.result
+
         print(f"\nBinary: {self.binary_file}")
         print(f"  Size: {self.binary_size} bytes ({self.binary_size/1024:.1f} KB)")
 
         print(f"\nUSB Capture: {self.pcap_file}")
-        print(f"  Total transfers: {len(self.analyzer.transfers)}")
-        print(f"  Bulk OUT transfers: {len(self.bulk_transfers)}")
+        print(f"  Total transfers: {result.total_transfers}")
+        print(f"  Bulk OUT transfers: {len(result.chunks)}")
 
-        total_usb = sum(len(t.data) for t in self.bulk_transfers)
+        total_usb = result.total_usb
         print(f"  Total data: {total_usb} bytes ({total_usb/1024:.1f} KB)")
 
         # Correlation result
-        all_usb_data = b''.join(t.data for t in self.bulk_transfers)
+        match_type = result.match_type
 
         print(f"\nCorrelation Result:")
-        if all_usb_data == self.binary_data:
+        if match_type == "exact":
             print("  ✓ EXACT MATCH - USB data equals binary")
             print("  → No transformation, ready to implement")
-        elif self.binary_data in all_usb_data:
-            overhead = len(all_usb_data) - self.binary_size
+        elif match_type == "overhead":
+            overhead = total_usb - self.binary_size
             print(f"  ✓ BINARY FOUND - with {overhead} bytes overhead")
             print("  → Identify and strip protocol overhead")
-        elif all_usb_data in self.binary_data:
+        elif match_type == "partial":
             print("  ✓ PARTIAL WRITE - USB data is subset of binary")
             print("  → Identify which part is being written")
+        elif match_type == "mapped":
+            print(f"  ~ MAPPED - {result.offset_map.matched_bytes} bytes map to the binary, "
+                  f"{result.offset_map.novel_bytes} bytes are novel")
+            print("  → Inspect novel ranges for headers or modified data")
         else:
             print("  ⚠ NO MATCH - Data may be transformed")
             print("  → Check for encryption/compression")
@@ -496,6 +822,12 @@ def main():
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='Verbose output with detailed hex dumps')
     parser.add_argument('-r', '--report', help='Generate detailed report file')
+    parser.add_argument('--no-transforms', action='store_true',
+                       help='Skip transform detection (XOR/swap/header/compression) on unmatched data')
+    parser.add_argument('-m', '--content-map', action='store_true',
+                       help='Print per-block content maps of the binary and the USB stream')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                       help='Correlate chunks in N worker processes (default: 1)')
 
     args = parser.parse_args()
 
@@ -508,8 +840,14 @@ def main():
         print(f"ERROR: Binary file not found: {args.binary_file}")
         sys.exit(1)
 
+    if args.content_map and not content_map.available():
+        print("NOTE: NumPy not found, content map disabled (pip install numpy)")
+
     # Create analyzer
-    analyzer = WriteWithBinaryAnalyzer(args.pcap_file, args.binary_file, verbose=args.verbose)
+    analyzer = WriteWithBinaryAnalyzer(args.pcap_file, args.binary_file, verbose=args.verbose,
+                                       detect_transforms=not args.no_transforms,
+                                       show_content_map=args.content_map,
+                                       jobs=args.jobs)
 
     # Load binary
     if not analyzer.load_binary():
@@ -532,13 +870,13 @@ def main():
 
     # Provide recommendations
     print("\nRecommendations:")
-    all_usb_data = b''.join(t.data for t in analyzer.bulk_transfers)
+    match_type = analyzer.result.match_type
 
-    if all_usb_data == analyzer.binary_data:
+    if match_type == "exact":
         print("  1. Implement direct binary transfer (no transformation needed)")
         print("  2. Use the chunking pattern from the capture")
         print("  3. Match the flash addresses from SET_DATA_ADDR commands")
-    elif analyzer.binary_data in all_usb_data:
+    elif match_type == "overhead":
         print("  1. Identify and document the protocol overhead")
         print("  2. Determine if overhead is per-chunk or per-transfer")
         print("  3. Implement overhead generation in thingino-cloner")
@@ -549,5 +887,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
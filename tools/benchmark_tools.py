@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the Capture and Analysis Tools
+
+Times the hot paths of the Python tools over small, medium and large inputs:
+
+- parse_pcap            USBCaptureAnalyzer.parse_pcap (needs tshark)
+- identify_sequences    USBCaptureAnalyzer.identify_sequences
+- compare_transfers     CaptureComparator.compare_transfers (two captures, different seeds)
+- correlate_data        WriteWithBinaryAnalyzer correlation pass and _correlate_data
+- find_ddr_binary       extract_ddr_from_pcap.find_ddr_binary over all bulk OUT payloads
+- binary_builder        BinaryBuilder.build (references/ddr_compiler_final.py)
+- firmware_database     generate_firmware_database (array output, --force)
+
+Capture inputs are synthetic T31 write sessions from generate_usbmon_capture.py
+(cached in the work directory), decoded with read_transfers() so every stage
+except parse_pcap runs without tshark. Each case runs in its own process and
+records the best wall time of --repeat runs, the throughput, the peak RSS of
+the timed runs and the peak memory allocated by one extra run under tracemalloc.
+On Linux the peak RSS is reset after setup (/proc/self/clear_refs) and read
+from VmHWM; elsewhere it falls back to the whole process's ru_maxrss. Results
+are written as JSON; with --baseline they are compared to a stored results
+file and the exit status is 1 if any case got slower (or larger, for peak RSS
+and peak allocation) by more than --threshold.
+
+Usage:
+    python3 benchmark_tools.py [-o results.json] [--baseline baseline.json] [--threshold 0.2]
+                               [--only correlate_data,binary_builder] [--sizes small,medium]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+import contextlib
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+TOOLS = Path(__file__).resolve().parent
+ROOT = TOOLS.parent
+sys.path.insert(0, str(TOOLS))
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'references'))
+
+import generate_usbmon_capture
+from generate_usbmon_capture import ImageSource, build_ddr_binary, read_transfers
+
+SIZE_NAMES = ('small', 'medium', 'large')
+DEFAULT_CAPTURE_SIZES = '1M,16M,128M'
+DEFAULT_BUILD_COUNTS = '100,1000,10000'
+SMALL_FIRMWARE_SET = ('t31x', 't41')
+
+# Wall times below this are timer noise and never count as regressions
+MIN_COMPARED_TIME = 0.005
+
+BENCHMARKS = ('parse_pcap', 'identify_sequences', 'compare_transfers', 'correlate_data',
+              'find_ddr_binary', 'binary_builder', 'firmware_database')
+
+def reset_peak_rss() -> bool:
+    """Reset this process's peak RSS (Linux VmHWM); False where unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb(since_reset: bool) -> Optional[float]:
+    """
+    Peak resident set size in MB: VmHWM since reset_peak_rss() if that
+    worked, else ru_maxrss of the whole process (KB on Linux, bytes on macOS)
+    """
+    if since_reset:
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+def peak_alloc_mb(run) -> float:
+    """Peak memory allocated while run() executes, excluding what was live before it"""
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1 << 20)
+
+def capture_paths(work_dir: Path, size: int, seed: int):
+    stem = work_dir / f"capture_{size}_{seed}"
+    return stem.with_suffix('.pcap'), stem.with_suffix('.bin')
+
+def ensure_capture(work_dir: Path, size: int, seed: int):
+    """Synthetic T31 write capture of a size-byte image, generated once per (size, seed)"""
+    capture, image = capture_paths(work_dir, size, seed)
+    if capture.exists() and image.exists():
+        return capture, image
+    params = generate_usbmon_capture.PLATFORMS['t31']
+    firmware_dir = generate_usbmon_capture.DEFAULT_FIRMWARES / params['firmware']
+    generate_usbmon_capture.generate(
+        capture, ImageSource(None, size, seed), 't31',
+        build_ddr_binary(generate_usbmon_capture.DEFAULT_DDR_CFG, 't31'),
+        (firmware_dir / 'spl.bin').read_bytes(), (firmware_dir / 'uboot.bin').read_bytes(),
+        seed, 'pcap', image)
+    return capture, image
+
+def firmware_source(work_dir: Path, size_name: str):
+    """(firmwares dir, embed_all) for a size: two processors, the embedded subset, or all"""
+    firmwares = generate_usbmon_capture.DEFAULT_FIRMWARES
+    if size_name == 'medium':
+        return firmwares, False
+    if size_name == 'large':
+        return firmwares, True
+    subset = work_dir / 'firmwares_small'
+    if not subset.exists():
+        for name in SMALL_FIRMWARE_SET:
+            shutil.copytree(firmwares / name, subset / name)
+    return subset, True
+
+def setup_case(name: str, size_name: str, work_dir: Path, capture_size: int, build_count: int,
+               seed: int):
+    """
+    Prepare inputs outside the timed region.
+
+    Returns (run, input_bytes, items, unit). Throughput is items/s when items
+    is set, otherwise MB/s of input_bytes (or of the byte count run() returns).
+    A None run means the case is skipped and unit holds the reason.
+    """
+    if name == 'binary_builder':
+        from ddr_compiler_final import DDRConfig, DDRParamConverter, BinaryBuilder, select_encoder
+        config = DDRConfig(generate_usbmon_capture.DEFAULT_DDR_CFG, verbose=False)
+        builder = BinaryBuilder('t31')
+        freq = builder.config['ddr_freq']
+        timing = select_encoder(config, DDRParamConverter(freq, verbose=False),
+                                verbose=False).encode_timing_params()
+
+        def run():
+            for _ in range(build_count):
+                builder.build(config, timing, freq)
+        return run, build_count * 324, build_count, 'binaries/s'
+
+    if name == 'firmware_database':
+        from generate_firmware_database import generate_firmware_database
+        firmwares_dir, embed_all = firmware_source(work_dir, size_name)
+        output_dir = work_dir / f"firmware_out_{size_name}"
+
+        def run():
+            shutil.rmtree(output_dir, ignore_errors=True)
+            generate_firmware_database(firmwares_dir, output_dir, embed_all=embed_all, force=True)
+            # Throughput is measured on the generated sources
+            return sum(f.stat().st_size for f in output_dir.iterdir() if f.is_file())
+        return run, None, None, 'MB/s'
+
+    capture, image = ensure_capture(work_dir, capture_size, seed)
+    capture_bytes = capture.stat().st_size
+
+    if name == 'parse_pcap':
+        from analyze_usb_capture import USBCaptureAnalyzer
+        if shutil.which('tshark') is None:
+            return None, None, None, 'tshark not found'
+
+        def run():
+            if not USBCaptureAnalyzer(str(capture)).parse_pcap():
+                raise RuntimeError('parse_pcap failed')
+        return run, capture_bytes, None, 'MB/s'
+
+    transfers = read_transfers(capture)
+
+    if name == 'identify_sequences':
+        from analyze_usb_capture import USBCaptureAnalyzer
+        analyzer = USBCaptureAnalyzer(str(capture))
+        analyzer.transfers = transfers
+
+        def run():
+            analyzer.sequences = []
+            analyzer.identify_sequences()
+        return run, capture_bytes, len(transfers), 'transfers/s'
+
+    if name == 'compare_transfers':
+        from compare_usb_captures import CaptureComparator
+        other, _ = ensure_capture(work_dir, capture_size, seed + 1)
+        comparator = CaptureComparator(str(capture), str(other))
+        comparator.analyzer1.transfers = transfers
+        comparator.analyzer2.transfers = read_transfers(other)
+
+        def run():
+            comparator.diffs = []
+            comparator.compare_transfers()
+        return run, capture_bytes + other.stat().st_size, len(transfers), 'transfers/s'
+
+    if name == 'correlate_data':
+        from analyze_write_with_binary import WriteWithBinaryAnalyzer
+
+        def run():
+            analyzer = WriteWithBinaryAnalyzer(str(capture), str(image))
+            if not analyzer.load_binary() or not analyzer.analyze(transfers):
+                raise RuntimeError('correlation failed')
+        return run, capture_size, None, 'MB/s'
+
+    if name == 'find_ddr_binary':
+        from extract_ddr_from_pcap import find_ddr_binary
+        payload = b''.join(t.data for t in transfers
+                           if t.transfer_type == 'BULK' and t.direction == 'OUT')
+        del transfers
+
+        def run():
+            if not find_ddr_binary(payload):
+                raise RuntimeError('DDR binary not found')
+        return run, len(payload), None, 'MB/s'
+
+    raise ValueError(f"unknown benchmark: {name}")
+
+def run_case(args) -> Dict:
+    """Child process: set up and time one (benchmark, size) case"""
+    size_index = SIZE_NAMES.index(args.run_case[1])
+    capture_size = [generate_usbmon_capture.parse_size(s) for s in args.capture_sizes.split(',')][size_index]
+    build_count = [int(c) for c in args.build_counts.split(',')][size_index]
+
+    # The tools print progress; keep it out of the result line
+    with contextlib.redirect_stdout(io.StringIO()):
+        run, input_bytes, items, unit = setup_case(args.run_case[0], args.run_case[1],
+                                                   Path(args.work_dir), capture_size, build_count,
+                                                   args.seed)
+        if run is None:
+            return {'status': 'skipped', 'reason': unit}
+
+        # Count only the timed runs, not the inputs setup loaded
+        scoped = reset_peak_rss()
+        best = None
+        for _ in range(max(1, args.repeat)):
+            start = time.perf_counter()
+            processed = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        rss_mb = peak_rss_mb(scoped)
+        if processed is not None:
+            input_bytes = processed
+
+        # Untimed extra run: tracemalloc slows the allocator down
+        peak_mb = peak_alloc_mb(run)
+
+    result = {'status': 'ok', 'wall_s': best, 'peak_rss_mb': rss_mb,
+              'peak_rss_scope': 'run' if scoped else 'process', 'peak_alloc_mb': peak_mb,
+              'unit': unit, 'input_bytes': input_bytes}
+    if items:
+        result['items'] = items
+        result['throughput'] = items / best
+    elif input_bytes:
+        result['throughput'] = input_bytes / best / 1e6
+    return result
+
+def spawn_case(name: str, size_name: str, args) -> Dict:
+    cmd = [sys.executable, str(Path(__file__).resolve()), '--run-case', name, size_name,
+           '--work-dir', args.work_dir, '--repeat', str(args.repeat), '--seed', str(args.seed),
+           '--capture-sizes', args.capture_sizes, '--build-counts', args.build_counts]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ['exit status %d' % proc.returncode])[-1]
+        return {'status': 'error', 'reason': error}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float):
+    """Print per-case changes; returns the list of regressed case keys"""
+    regressions = []
+    print(f"\nBaseline comparison (threshold +{threshold * 100:.0f}%):")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if result.get('status') != 'ok' or not base or base.get('status') != 'ok':
+            continue
+        changes = []
+        regressed = False
+        for metric, label in (('wall_s', 'time'), ('peak_rss_mb', 'RSS'), ('peak_alloc_mb', 'alloc')):
+            if result.get(metric) is None or not base.get(metric):
+                continue
+            if metric == 'peak_rss_mb' and result.get('peak_rss_scope') != base.get('peak_rss_scope'):
+                continue
+            ratio = result[metric] / base[metric]
+            changes.append(f"{label} {(ratio - 1) * 100:+6.1f}%")
+            if metric == 'wall_s' and max(result[metric], base[metric]) < MIN_COMPARED_TIME:
+                continue
+            regressed |= ratio > 1 + threshold
+        symbol = '✗' if regressed else '✓'
+        print(f"  {symbol} {key:32s} {'  '.join(changes)}")
+        if regressed:
+            regressions.append(key)
+    missing = sorted(set(baseline) - set(results))
+    if missing:
+        print(f"  ⚠ Not run (in baseline): {', '.join(missing)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the capture and analysis tools over small/medium/large inputs'
+    )
+    parser.add_argument('-o', '--output', default='benchmark_results.json',
+                        help='Results JSON file (default: benchmark_results.json)')
+    parser.add_argument('--baseline', help='Stored results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed slowdown/RSS/allocation growth over the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Write the results to --baseline instead of comparing')
+    parser.add_argument('--only', help=f"Comma-separated benchmarks (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--sizes', default=','.join(SIZE_NAMES),
+                        help='Comma-separated input sizes to run (default: small,medium,large)')
+    parser.add_argument('--capture-sizes', default=DEFAULT_CAPTURE_SIZES,
+                        help=f"Flash image size of the small,medium,large captures (default: {DEFAULT_CAPTURE_SIZES})")
+    parser.add_argument('--build-counts', default=DEFAULT_BUILD_COUNTS,
+                        help=f"BinaryBuilder.build calls for small,medium,large (default: {DEFAULT_BUILD_COUNTS})")
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case, best is reported (default: 3)')
+    parser.add_argument('--seed', type=int, default=1, help='Synthetic capture seed (default: 1)')
+    parser.add_argument('--work-dir', help='Directory for generated inputs (default: a temporary directory)')
+    parser.add_argument('--run-case', nargs=2, metavar=('BENCHMARK', 'SIZE'), help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args)))
+        return
+
+    benchmarks = args.only.split(',') if args.only else list(BENCHMARKS)
+    sizes = args.sizes.split(',')
+    for name in benchmarks:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+    for size_name in sizes:
+        if size_name not in SIZE_NAMES:
+            parser.error(f"unknown size: {size_name}")
+    if args.update_baseline and not args.baseline:
+        parser.error('--update-baseline requires --baseline PATH')
+
+    temp_dir = None
+    if not args.work_dir:
+        temp_dir = tempfile.TemporaryDirectory(prefix='thingino_bench_')
+        args.work_dir = temp_dir.name
+    Path(args.work_dir).mkdir(parents=True, exist_ok=True)
+
+    print("=" * 80)
+    print(f"Tool benchmarks: {len(benchmarks)} benchmarks x {len(sizes)} sizes, best of {args.repeat}")
+    print(f"Captures: {args.capture_sizes} (seed {args.seed}), work dir: {args.work_dir}")
+    print("=" * 80)
+
+    results = {}
+    for name in benchmarks:
+        for size_name in sizes:
+            key = f"{name}/{size_name}"
+            result = spawn_case(name, size_name, args)
+            results[key] = result
+            if result['status'] != 'ok':
+                print(f"  ⚠ {key:32s} {result['status']}: {result['reason']}")
+                continue
+            throughput = (f"{result['throughput']:10.1f} {result['unit']}"
+                          if 'throughput' in result else '')
+            rss = f"{result['peak_rss_mb']:8.1f} MB RSS" if result['peak_rss_mb'] is not None else ''
+            print(f"  ✓ {key:32s} {result['wall_s']:9.3f} s  {rss}  "
+                  f"{result['peak_alloc_mb']:8.1f} MB alloc  {throughput}")
+
+    if temp_dir:
+        temp_dir.cleanup()
+
+    document = {
+        'meta': {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'capture_sizes': args.capture_sizes,
+            'build_counts': args.build_counts,
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+    elif args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"ERROR: Failed to read baseline {args.baseline}: {e}")
+            sys.exit(1)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) over {args.threshold * 100:.0f}%")
+            sys.exit(1)
+        print("\n✓ No regressions")
+
+    if any(r['status'] == 'error' for r in results.values()):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
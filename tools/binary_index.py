@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Content-Defined Block Index
+
+Indexes a binary image so that arbitrary USB payloads can be mapped back to
+binary offsets even when the vendor tool prepends headers, shifts the data
+or rewrites parts of it. Two kinds of blocks are indexed:
+
+- Fixed 4 KB blocks at aligned binary offsets (cheap, catches aligned writes)
+- Content-defined blocks whose boundaries are chosen by a rolling hash, so
+  they stay stable when the surrounding data is shifted by any amount
+
+Each USB payload is cut with the same content-defined rule, blocks are looked
+up by digest, and every hit is extended byte-by-byte against the binary. The
+result is an OffsetMap describing which USB byte ranges map to which binary
+ranges and which ranges are novel (not present in the binary).
+
+NumPy is used to find content-defined boundaries when available; without it
+the index falls back to fixed blocks only.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Block geometry
+FIXED_BLOCK_SIZE = 4096
+CDC_MIN_SIZE = 1024
+CDC_MAX_SIZE = 16384
+CDC_MASK = 0x0FFF           # ~4 KB average content-defined block
+CDC_WINDOW = 32             # Rolling hash window in bytes
+CDC_SEGMENT = 1024 * 1024    # Boundary search granularity (bounds temp memory)
+
+DIGEST_SIZE = 8
+
+# Shortest same-alignment suffix accepted for a payload tail with no anchor block
+TAIL_MIN_MATCH = 16
+
+def _gear_table():
+    """Deterministic per-byte random values for the rolling hash"""
+    table = []
+    for b in range(256):
+        digest = hashlib.blake2b(bytes([b]), digest_size=4, person=b'thingino').digest()
+        table.append(int.from_bytes(digest, 'little'))
+    return table
+
+_GEAR = np.array(_gear_table(), dtype=np.uint32) if np is not None else None
+
+def block_digest(data) -> bytes:
+    """Digest used as index key for a block"""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+def cdc_boundaries(buf, start: int = 0, end: Optional[int] = None) -> List[int]:
+    """
+    Return content-defined cut points in buf[start:end].
+
+    The returned list contains block end offsets (absolute positions in buf);
+    the last entry is always `end`. Boundaries are placed where a windowed
+    sum of per-byte random values has its low bits clear, constrained to
+    CDC_MIN_SIZE..CDC_MAX_SIZE.
+    """
+    if end is None:
+        end = len(buf)
+    if end <= start:
+        return []
+
+    if np is None:
+        # No NumPy: degrade to fixed-size blocks
+        cuts = list(range(start + FIXED_BLOCK_SIZE, end, FIXED_BLOCK_SIZE))
+        cuts.append(end)
+        return cuts
+
+    # Collect candidate positions segment by segment to bound memory use
+    view = memoryview(buf)
+    candidates = []
+    seg_start = start
+    while seg_start < end:
+        seg_end = min(seg_start + CDC_SEGMENT, end)
+        win_start = max(start, seg_start - CDC_WINDOW)
+        values = _GEAR[np.frombuffer(view[win_start:seg_end], dtype=np.uint8)]
+        sums = np.cumsum(values, dtype=np.uint32)
+        if len(sums) > CDC_WINDOW:
+            # Window sum for the window ending at each position (mod 2^32)
+            window = sums[CDC_WINDOW:] - sums[:-CDC_WINDOW]
+            hits = np.flatnonzero((window & CDC_MASK) == 0)
+            # window[k] covers values[k + 1:k + CDC_WINDOW + 1]
+            positions = hits + (win_start + CDC_WINDOW + 1)
+            candidates.append(positions[positions > seg_start])
+        seg_start = seg_end
+
+    if candidates:
+        cand = np.concatenate(candidates)
+    else:
+        cand = np.empty(0, dtype=np.int64)
+
+    # Enforce min/max block size; jump through candidates with searchsorted
+    # so long runs of constant data (every position a candidate) stay cheap
+    cuts = []
+    last = start
+    while last < end:
+        idx = np.searchsorted(cand, last + CDC_MIN_SIZE)
+        if idx < len(cand) and cand[idx] - last <= CDC_MAX_SIZE:
+            cut = int(cand[idx])
+        else:
+            cut = last + CDC_MAX_SIZE
+        cut = min(cut, end)
+        cuts.append(cut)
+        last = cut
+    return cuts
+
+def common_prefix_length(a, b) -> int:
+    """Length of the common prefix of two buffers (galloping memcmp)"""
+    limit = min(len(a), len(b))
+    if limit == 0:
+        return 0
+    if a[:limit] == b[:limit]:
+        return limit
+
+    # Grow the probe until it mismatches, then bisect
+    lo, step = 0, 64
+    while lo + step < limit and a[lo:lo + step] == b[lo:lo + step]:
+        lo += step
+        step *= 2
+    hi = min(lo + step, limit)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo if a[lo] != b[lo] else lo + 1
+
+def common_suffix_length(a, b) -> int:
+    """Length of the common suffix of two buffers"""
+    limit = min(len(a), len(b))
+    if limit == 0:
+        return 0
+    if a[len(a) - limit:] == b[len(b) - limit:]:
+        return limit
+
+    lo, step = 0, 64
+    while lo + step < limit and a[len(a) - lo - step:len(a) - lo] == b[len(b) - lo - step:len(b) - lo]:
+        lo += step
+        step *= 2
+    hi = min(lo + step, limit)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[len(a) - mid:len(a) - lo] == b[len(b) - mid:len(b) - lo]:
+            lo = mid
+        else:
+            hi = mid
+    return lo if a[len(a) - lo - 1] != b[len(b) - lo - 1] else lo + 1
+
+@dataclass
+class MappedRange:
+    """A range of the USB stream and where it came from in the binary"""
+    usb_start: int
+    usb_end: int
+    binary_start: Optional[int] = None  # None = novel data
+
+    @property
+    def size(self) -> int:
+        return self.usb_end - self.usb_start
+
+    @property
+    def is_novel(self) -> bool:
+        return self.binary_start is None
+
+    @property
+    def binary_end(self) -> Optional[int]:
+        if self.binary_start is None:
+            return None
+        return self.binary_start + self.size
+
+    def describe(self) -> str:
+        usb = f"usb[0x{self.usb_start:08X}:0x{self.usb_end:08X}]"
+        if self.is_novel:
+            return f"{usb} NOVEL ({self.size} bytes)"
+        return f"{usb} -> binary[0x{self.binary_start:08X}:0x{self.binary_end:08X}]"
+
+class OffsetMap:
+    """Ordered, non-overlapping map from USB stream ranges to binary ranges"""
+
+    def __init__(self):
+        self.ranges: List[MappedRange] = []
+
+    def add(self, usb_start: int, usb_end: int, binary_start: Optional[int] = None):
+        """Append a range; ranges must be added in USB stream order"""
+        if usb_end <= usb_start:
+            return
+
+        if self.ranges:
+            last = self.ranges[-1]
+            if last.usb_end == usb_start:
+                # Merge continuous novel data or continuous same-delta matches
+                if last.is_novel and binary_start is None:
+                    last.usb_end = usb_end
+                    return
+                if (not last.is_novel and binary_start is not None
+                        and last.binary_end == binary_start):
+                    last.usb_end = usb_end
+                    return
+
+        self.ranges.append(MappedRange(usb_start, usb_end, binary_start))
+
+    def __iter__(self) -> Iterator[MappedRange]:
+        return iter(self.ranges)
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(r.size for r in self.ranges)
+
+    @property
+    def matched_bytes(self) -> int:
+        return sum(r.size for r in self.ranges if not r.is_novel)
+
+    @property
+    def novel_bytes(self) -> int:
+        return sum(r.size for r in self.ranges if r.is_novel)
+
+    def matched(self) -> List[MappedRange]:
+        return [r for r in self.ranges if not r.is_novel]
+
+    def novel(self) -> List[MappedRange]:
+        return [r for r in self.ranges if r.is_novel]
+
+    def slice(self, usb_start: int, usb_end: int) -> List[MappedRange]:
+        """Ranges clipped to usb[usb_start:usb_end]"""
+        result = []
+        for r in self.ranges:
+            if r.usb_end <= usb_start:
+                continue
+            if r.usb_start >= usb_end:
+                break
+            start = max(r.usb_start, usb_start)
+            end = min(r.usb_end, usb_end)
+            bin_start = None if r.is_novel else r.binary_start + (start - r.usb_start)
+            result.append(MappedRange(start, end, bin_start))
+        return result
+
+class BlockIndex:
+    """Digest index of fixed and content-defined blocks of a binary image"""
+
+    def __init__(self, binary):
+        self.binary = binary
+        self.size = len(binary)
+        self.fixed: Dict[bytes, int] = {}
+        self.cdc: Dict[bytes, int] = {}
+        self.built = False
+
+    def build(self):
+        """Index the binary in a single pass"""
+        self.built = True
+        view = memoryview(self.binary)
+
+        for offset in range(0, self.size - FIXED_BLOCK_SIZE + 1, FIXED_BLOCK_SIZE):
+            self.fixed.setdefault(block_digest(view[offset:offset + FIXED_BLOCK_SIZE]), offset)
+
+        last = 0
+        for cut in cdc_boundaries(self.binary, 0, self.size):
+            # Only full-size-range blocks are stable enough to index
+            if cut - last >= CDC_MIN_SIZE:
+                self.cdc.setdefault(block_digest(view[last:cut]), last)
+            last = cut
+
+        return self
+
+    def _extend(self, data, pos: int, length: int, bin_pos: int) -> Tuple[int, int, int]:
+        """Grow an anchor match in both directions; returns (start, end, bin_start)"""
+        view = memoryview(self.binary)
+        back = common_suffix_length(data[:pos], view[:bin_pos])
+        fwd = common_prefix_length(data[pos + length:], view[bin_pos + length:])
+        return pos - back, pos + length + fwd, bin_pos - back
+
+    def _probe(self, data, pos: int, end: int, bin_pos: int) -> bool:
+        """Check whether data[pos:end] sits at bin_pos in the binary"""
+        if bin_pos < 0 or bin_pos + (end - pos) > self.size:
+            return False
+        return data[pos:end] == self.binary[bin_pos:bin_pos + (end - pos)]
+
+    def matches_at(self, data, bin_pos: int) -> bool:
+        """True if the whole of data sits at bin_pos in the binary"""
+        return self._probe(data, 0, len(data), bin_pos)
+
+    def _tail_match(self, data, pos: int, end: int, delta: int) -> int:
+        """Length of the suffix of data[pos:end] found at the same delta in the binary"""
+        if pos + delta < 0 or end + delta > self.size:
+            return 0
+        return common_suffix_length(data[pos:end], memoryview(self.binary)[pos + delta:end + delta])
+
+    def correlate_chunk(self, data, binary_hint: Optional[int] = None) -> List[MappedRange]:
+        """
+        Map one USB payload against the binary.
+
+        binary_hint is the binary offset where this payload is expected to
+        start (e.g. continuation of the previous chunk); the payload's prefix
+        is matched there first, and the alignment is preferred over index
+        lookups for repeated content such as padding.
+        Returned ranges are relative to the start of data.
+        """
+        size = len(data)
+        if size == 0:
+            return []
+
+        view = memoryview(data)
+        runs: List[Tuple[int, int, int]] = []
+        covered_to = 0
+        delta = binary_hint
+
+        # Continuation of the previous chunk, possibly followed by other data
+        # (e.g. the binary's last bytes plus a trailer)
+        if binary_hint is not None and 0 <= binary_hint < self.size:
+            prefix = common_prefix_length(view, memoryview(self.binary)[binary_hint:])
+            if prefix == size:
+                return [MappedRange(0, size, binary_hint)]
+            if prefix >= TAIL_MIN_MATCH:
+                runs.append((0, prefix, binary_hint))
+                covered_to = prefix
+
+        # Only pay for indexing once a payload doesn't simply continue
+        if not self.built:
+            self.build()
+
+        # Content-defined blocks, plus fixed blocks at chunk-aligned offsets
+        pieces = []
+        last = 0
+        for cut in cdc_boundaries(view, 0, size):
+            pieces.append((last, cut, self.cdc))
+            last = cut
+        for offset in range(0, size - FIXED_BLOCK_SIZE + 1, FIXED_BLOCK_SIZE):
+            pieces.append((offset, offset + FIXED_BLOCK_SIZE, self.fixed))
+        pieces.sort(key=lambda p: p[0])
+
+        for start, end, table in pieces:
+            if end <= covered_to:
+                continue
+
+            bin_pos = None
+            # Prefer the current alignment so repeated content stays in one run
+            if delta is not None and self._probe(view, start, end, start + delta):
+                bin_pos = start + delta
+            else:
+                hit = table.get(block_digest(view[start:end]))
+                if hit is not None:
+                    bin_pos = hit
+
+            if bin_pos is None:
+                continue
+
+            run_start, run_end, run_bin = self._extend(view, start, end - start, bin_pos)
+            run_start = max(run_start, covered_to)
+            run_bin = bin_pos - (start - run_start)
+            runs.append((run_start, run_end, run_bin))
+            covered_to = run_end
+            delta = run_bin - run_start
+
+        # A tail shorter than an indexable block has no anchor of its own:
+        # keep the last alignment and match it back from the payload end
+        if covered_to < size and delta is not None:
+            tail = self._tail_match(view, covered_to, size, delta)
+            if tail >= TAIL_MIN_MATCH:
+                runs.append((size - tail, size, size - tail + delta))
+
+        # Fill gaps between runs with novel ranges
+        ranges = []
+        pos = 0
+        for run_start, run_end, run_bin in runs:
+            if run_start > pos:
+                ranges.append(MappedRange(pos, run_start))
+            ranges.append(MappedRange(run_start, run_end, run_bin))
+            pos = run_end
+        if pos < size:
+            ranges.append(MappedRange(pos, size))
+        return ranges
+
+class StreamCorrelator:
+    """Feeds USB payloads in stream order and accumulates an OffsetMap"""
+
+    def __init__(self, index: BlockIndex):
+        self.index = index
+        self.offset_map = OffsetMap()
+        self.usb_offset = 0
+        self._next_binary = 0
+
+    @property
+    def expected_binary_offset(self) -> int:
+        """Binary offset the next payload is expected to start at"""
+        return self._next_binary
+
+    def feed(self, data) -> List[MappedRange]:
+        """Correlate the next payload; returns its ranges in stream coordinates"""
+        return self.merge(self.index.correlate_chunk(data, self._next_binary), len(data))
+
+    def merge(self, chunk_ranges: List[MappedRange], size: int) -> List[MappedRange]:
+        """
+        Append a payload correlated elsewhere (e.g. in a worker process).
+
+        chunk_ranges are relative to the payload, as returned by
+        BlockIndex.correlate_chunk; payloads must be merged in stream order.
+        """
+        result = []
+        for r in chunk_ranges:
+            mapped = MappedRange(r.usb_start + self.usb_offset,
+                                 r.usb_end + self.usb_offset,
+                                 r.binary_start)
+            self.offset_map.add(mapped.usb_start, mapped.usb_end, mapped.binary_start)
+            result.append(mapped)
+
+        # Next payload most likely continues where the last match ended
+        for r in reversed(chunk_ranges):
+            if not r.is_novel:
+                self._next_binary = r.binary_end + (size - r.usb_end)
+                break
+
+        self.usb_offset += size
+        return result
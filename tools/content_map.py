@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Flash Content Map
+
+Classifies a binary image or captured USB payloads block by block (4 KB by
+default) using per-block statistics computed in bulk with NumPy:
+
+- Shannon entropy
+- Fraction of 0x00 and 0xFF bytes
+- Fraction of printable ASCII
+- Full byte histogram
+
+Each block is classified as padding (zero or erased 0xFF), text, code or
+compressed data. Compressed runs are labelled squashfs/xz/lzma/gzip when a
+container signature starts them. The result is printed as a compact map of
+the whole flash: one character per block plus a run-length table.
+
+Usage:
+    python3 content_map.py <image.bin> [--block-size 4096]
+"""
+
+import sys
+import mmap
+import argparse
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BLOCK_SIZE = 4096
+
+# Blocks per bincount pass (bounds the temporary index array)
+BLOCKS_PER_PASS = 256
+
+# Classification thresholds
+PADDING_FRACTION = 0.98
+TEXT_FRACTION = 0.90
+COMPRESSED_ENTROPY = 7.2   # bits per byte
+
+# Block classes and their map characters
+CLASS_CHARS = {
+    'zero': '0',
+    'erased': 'F',
+    'text': 'T',
+    'code': 'C',
+    'compressed': 'Z',
+    'squashfs': 'S',
+    'xz': 'X',
+    'lzma': 'L',
+    'gzip': 'G',
+}
+
+COMPRESSED_CLASSES = ('compressed', 'squashfs', 'xz', 'lzma', 'gzip')
+
+# Container signatures that start a compressed run. Short signatures also
+# occur by chance inside compressed data, so they only start a run after a
+# block that was not compressed.
+CONTAINER_MAGICS = (
+    (b'hsqs', 'squashfs'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x1f\x8b\x08', 'gzip'),
+)
+WEAK_CONTAINERS = ('gzip', 'lzma')
+
+# LZMA-alone header: properties byte 0x5D followed by a power-of-two dict size
+LZMA_MAGIC = b'\x5d\x00\x00'
+LZMA_DICT_SIZES = (b'\x80\x00', b'\x00\x01', b'\x00\x02', b'\x00\x04',
+                   b'\x00\x08', b'\x00\x10', b'\x00\x20', b'\x00\x40')
+
+def available() -> bool:
+    """True if NumPy is installed and blocks can be classified"""
+    return np is not None
+
+_PRINTABLE = None
+if np is not None:
+    _PRINTABLE = np.zeros(256, dtype=bool)
+    _PRINTABLE[32:127] = True
+    _PRINTABLE[[9, 10, 13]] = True
+
+@dataclass
+class BlockStats:
+    """Per-block statistics for a buffer (arrays indexed by block number)"""
+    histograms: 'np.ndarray'   # (blocks, 256) byte counts
+    sizes: 'np.ndarray'        # bytes in each block (last may be short)
+    entropy: 'np.ndarray'      # bits per byte
+    zero_fraction: 'np.ndarray'
+    ff_fraction: 'np.ndarray'
+    printable_fraction: 'np.ndarray'
+
+def block_stats(buf, block_size: int = BLOCK_SIZE) -> BlockStats:
+    """Compute per-block histogram, entropy and byte-class fractions"""
+    data = np.frombuffer(buf, dtype=np.uint8)
+    blocks = (len(data) + block_size - 1) // block_size
+    hist = np.zeros((blocks, 256), dtype=np.int64)
+
+    # bincount over (block, byte) pairs, a bounded number of blocks at a time
+    pass_bytes = block_size * BLOCKS_PER_PASS
+    for start in range(0, len(data), pass_bytes):
+        segment = data[start:start + pass_bytes]
+        first = start // block_size
+        count = (len(segment) + block_size - 1) // block_size
+        whole = len(segment) // block_size
+        index = segment[:whole * block_size].reshape(whole, block_size).astype(np.intp)
+        index += (np.arange(whole, dtype=np.intp) * 256)[:, None]
+        hist[first:first + whole] = np.bincount(index.ravel(), minlength=whole * 256).reshape(whole, 256)
+        if whole < count:
+            hist[first + whole] = np.bincount(segment[whole * block_size:], minlength=256)
+
+    sizes = hist.sum(axis=1)
+    safe_sizes = np.maximum(sizes, 1)
+    prob = hist / safe_sizes[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.where(prob > 0, np.log2(prob), 0.0)
+    entropy = -(prob * logs).sum(axis=1)
+
+    return BlockStats(
+        histograms=hist,
+        sizes=sizes,
+        entropy=entropy,
+        zero_fraction=hist[:, 0] / safe_sizes,
+        ff_fraction=hist[:, 0xFF] / safe_sizes,
+        printable_fraction=hist[:, _PRINTABLE].sum(axis=1) / safe_sizes,
+    )
+
+def _container_starts(buf, block_size: int) -> Dict[int, str]:
+    """Block numbers where a compressed container signature occurs"""
+    starts = {}
+    for magic, name in CONTAINER_MAGICS:
+        pos = buf.find(magic)
+        while pos != -1:
+            starts.setdefault(pos // block_size, name)
+            pos = buf.find(magic, pos + 1)
+
+    pos = buf.find(LZMA_MAGIC)
+    while pos != -1:
+        if buf[pos + 3:pos + 5] in LZMA_DICT_SIZES:
+            starts.setdefault(pos // block_size, 'lzma')
+        pos = buf.find(LZMA_MAGIC, pos + 1)
+    return starts
+
+class ContentMap:
+    """Block classification of a buffer, printable as a compact flash map"""
+
+    def __init__(self, block_size: int = BLOCK_SIZE, base_offset: int = 0):
+        self.block_size = block_size
+        self.base_offset = base_offset
+        self.classes: List[str] = []
+        self.entropy: List[float] = []
+
+        self._pending = b''       # Partial block carried between feed() calls
+        self._container = None   # Label of the compressed run in progress
+
+    @classmethod
+    def from_buffer(cls, buf, block_size: int = BLOCK_SIZE, base_offset: int = 0) -> 'ContentMap':
+        content_map = cls(block_size, base_offset)
+        content_map.extend(buf)
+        return content_map
+
+    def feed(self, data: bytes):
+        """Append streamed data, classifying every completed block"""
+        buf = self._pending + data if self._pending else data
+        whole = len(buf) - len(buf) % self.block_size
+        self._pending = bytes(buf[whole:])
+        self.extend(buf[:whole])
+
+    def flush(self):
+        """Classify the trailing partial block left by feed()"""
+        pending, self._pending = self._pending, b''
+        self.extend(pending)
+
+    def extend(self, buf):
+        """Classify buf and append its blocks (buf starts on a block boundary)"""
+        if len(buf) == 0:
+            return
+
+        stats = block_stats(buf, self.block_size)
+
+        classes = np.full(len(stats.sizes), 'code', dtype=object)
+        classes[stats.entropy >= COMPRESSED_ENTROPY] = 'compressed'
+        classes[stats.printable_fraction >= TEXT_FRACTION] = 'text'
+        classes[stats.zero_fraction >= PADDING_FRACTION] = 'zero'
+        classes[stats.ff_fraction >= PADDING_FRACTION] = 'erased'
+
+        # Label compressed runs that begin with a container signature
+        containers = _container_starts(buf, self.block_size)
+        current = self._container
+        for block, cls in enumerate(classes):
+            label = containers.get(block)
+            if label is not None and (current is None or label not in WEAK_CONTAINERS):
+                current = label
+                classes[block] = current
+            elif cls == 'compressed' and current is not None:
+                classes[block] = current
+            elif cls != 'compressed':
+                current = None
+        self._container = current
+
+        self.classes.extend(classes.tolist())
+        self.entropy.extend(stats.entropy.tolist())
+
+    def runs(self) -> List[Tuple[int, int, str]]:
+        """(start, end, class) byte ranges of consecutive same-class blocks"""
+        runs = []
+        for block, cls in enumerate(self.classes):
+            start = self.base_offset + block * self.block_size
+            if runs and runs[-1][2] == cls:
+                runs[-1] = (runs[-1][0], start + self.block_size, cls)
+            else:
+                runs.append((start, start + self.block_size, cls))
+        return runs
+
+    def summary(self) -> Dict[str, float]:
+        """Fraction of blocks in each class"""
+        total = len(self.classes)
+        counts = {}
+        for cls in self.classes:
+            counts[cls] = counts.get(cls, 0) + 1
+        return {cls: count / total for cls, count in counts.items()} if total else {}
+
+    def describe(self) -> str:
+        """One-line class breakdown, largest first"""
+        parts = sorted(self.summary().items(), key=lambda x: x[1], reverse=True)
+        return ', '.join(f"{cls} {fraction * 100:.0f}%" for cls, fraction in parts)
+
+    def strip(self) -> str:
+        """One character per block"""
+        return ''.join(CLASS_CHARS[cls] for cls in self.classes)
+
+    def print_map(self, title: str, chars_per_line: int = 64, out=None):
+        """Print the compact map followed by the run-length table"""
+        out = out or sys.stdout
+        strip = self.strip()
+        line_span = chars_per_line * self.block_size
+
+        print(f"\n{title} ({len(self.classes)} blocks of {self.block_size} bytes)", file=out)
+        print("  Legend: " + ' '.join(f"{char}={cls}" for cls, char in CLASS_CHARS.items()), file=out)
+        for i in range(0, len(strip), chars_per_line):
+            offset = self.base_offset + (i // chars_per_line) * line_span
+            print(f"  0x{offset:08X}  {strip[i:i + chars_per_line]}", file=out)
+
+        print(f"\n  Regions:", file=out)
+        for start, end, cls in self.runs():
+            print(f"    0x{start:08X}-0x{end - 1:08X}  {cls:10s} ({(end - start) // 1024} KB)", file=out)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Print a per-block content classification map of a flash image'
+    )
+    parser.add_argument('image', help='Binary image to classify')
+    parser.add_argument('-b', '--block-size', type=int, default=BLOCK_SIZE,
+                        help=f'Block size in bytes (default: {BLOCK_SIZE})')
+
+    args = parser.parse_args()
+
+    if not available():
+        print("ERROR: numpy not found. Install with: pip install numpy")
+        sys.exit(1)
+
+    try:
+        with open(args.image, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Failed to load image: {e}")
+        sys.exit(1)
+
+    content_map = ContentMap.from_buffer(data, args.block_size)
+    content_map.print_map(f"Content map of {args.image}")
+    print(f"\n  Summary: {content_map.describe()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+DDR Generator Equivalence Harness - Python compiler vs C DDR generator
+
+Loads the C DDR generator (src/ddr/ddr_binary_builder.c and
+ddr_config_database.c, built as the thingino_ddr shared library) through
+ctypes and runs it side by side with references/ddr_compiler_final.py over
+every processor x DDR chip of the C database x frequency.
+
+Each side runs its whole path from chip description to binary:
+- C: ddr_build_chip_binary() - chip timings from ddr_config_database.c,
+  converted to cycles by ddr_params_from_chip()
+- Python: the chip's ddrs/*.cfg through DDRConfig, the timing encoder and
+  BinaryBuilder
+
+Both sides use the C database's processor config for the FIDB, so a
+differing byte is a divergence in the timing conversion, the chip data or
+the layout. Chips with no matching cfg are listed and skipped.
+
+Also reported:
+- Platform defaults from the C database (ddr_get_platform_config) that
+  differ from the Python platform configs
+- Per-binary build throughput of each side (Python encode + build, Python
+  batch build_many, C via ctypes)
+
+Build the library first:
+    cmake -B build && cmake --build build --target thingino_ddr
+
+Usage:
+    python3 ddr_equivalence.py [--lib build/libthingino_ddr.so] [--freqs 200000000,400000000]
+"""
+
+import re
+import sys
+import time
+import ctypes
+import struct
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'references'))
+
+import ddr_layout
+from ddr_compiler_final import (DDRConfig, DDRParamConverter, BinaryBuilder,
+                                PLATFORMS, select_encoder, sweep_timings)
+
+DEFAULT_DDRS = ROOT / 'references' / 'cloner-2.5.43-ubuntu_thingino' / 'ddrs'
+DEFAULT_FREQS = '200000000,300000000,400000000,500000000,600000000'
+
+LIBRARY_NAMES = ('libthingino_ddr.so', 'libthingino_ddr.dylib', 'thingino_ddr.dll')
+BUILD_DIRS = ('build', 'build-release', 'cmake-build-debug', 'cmake-build-release')
+
+# Mirrors platform_config_t and ddr_phy_params_t in src/ddr/ddr_binary_builder.h
+class PlatformConfig(ctypes.Structure):
+    _fields_ = [
+        ('crystal_freq', ctypes.c_uint32),
+        ('cpu_freq', ctypes.c_uint32),
+        ('ddr_freq', ctypes.c_uint32),
+        ('uart_baud', ctypes.c_uint32),
+        ('mem_size', ctypes.c_uint32),
+    ]
+
+class DDRPhyParams(ctypes.Structure):
+    _fields_ = [
+        ('ddr_type', ctypes.c_uint32),
+        ('row_bits', ctypes.c_uint8),
+        ('col_bits', ctypes.c_uint8),
+        ('cl', ctypes.c_uint8),
+        ('bl', ctypes.c_uint8),
+        ('tRAS', ctypes.c_uint8),
+        ('tRC', ctypes.c_uint8),
+        ('tRCD', ctypes.c_uint8),
+        ('tRP', ctypes.c_uint8),
+        ('tRFC', ctypes.c_uint8),
+        ('tRTP', ctypes.c_uint8),
+        ('tFAW', ctypes.c_uint8),
+        ('tRRD', ctypes.c_uint8),
+        ('tWTR', ctypes.c_uint8),
+    ]
+
+# Mirrors processor_config_t and ddr_chip_config_t in src/ddr/ddr_config_database.h
+class ProcessorConfig(ctypes.Structure):
+    _fields_ = [
+        ('name', ctypes.c_char_p),
+        ('crystal_freq', ctypes.c_uint32),
+        ('cpu_freq', ctypes.c_uint32),
+        ('ddr_freq', ctypes.c_uint32),
+        ('uart_baud', ctypes.c_uint32),
+        ('mem_size', ctypes.c_uint32),
+    ]
+
+class DDRChipConfig(ctypes.Structure):
+    _fields_ = [
+        ('name', ctypes.c_char_p),
+        ('vendor', ctypes.c_char_p),
+        ('ddr_type', ctypes.c_uint32),
+        ('row_bits', ctypes.c_uint8),
+        ('col_bits', ctypes.c_uint8),
+        ('cl', ctypes.c_uint8),
+        ('bl', ctypes.c_uint8),
+        ('rl', ctypes.c_uint8),
+        ('wl', ctypes.c_uint8),
+    ] + [(name, ctypes.c_uint32) for name in ('tRAS', 'tRC', 'tRCD', 'tRP', 'tRFC', 'tRTP', 'tFAW',
+                                              'tRRD', 'tWTR', 'tWR', 'tREFI', 'tCKE', 'tXP')]
+
+# Processor fields shared by processor_config_t and the Python platform configs
+PLATFORM_FIELDS = ('crystal_freq', 'cpu_freq', 'ddr_freq', 'uart_baud', 'mem_size')
+
+# ddr_chip_config_t.ddr_type codes, named as DDRConfig.ddr_type (from the cfg directory)
+C_DDR_TYPES = {0: 'DDR3', 1: 'DDR2', 2: 'LPDDR2', 4: 'LPDDR3'}
+
+# Database chip name suffix ("M14D1G1664A_DDR2" -> part number "M14D1G1664A")
+CHIP_TYPE_SUFFIX = re.compile(r'_(?:LP)?DDR\d?$', re.IGNORECASE)
+
+def find_library(explicit: Optional[str]) -> Optional[Path]:
+    """The shared library given on the command line, or the first one built"""
+    if explicit:
+        return Path(explicit)
+    for build_dir in BUILD_DIRS:
+        for name in LIBRARY_NAMES:
+            candidate = ROOT / build_dir / name
+            if candidate.is_file():
+                return candidate
+    return None
+
+def load_library(path: Path):
+    lib = ctypes.CDLL(str(path))
+    lib.ddr_build_binary.argtypes = [ctypes.POINTER(PlatformConfig), ctypes.POINTER(DDRPhyParams),
+                                     ctypes.POINTER(ctypes.c_uint8)]
+    lib.ddr_build_binary.restype = ctypes.c_size_t
+    lib.ddr_get_platform_config.argtypes = [ctypes.c_char_p, ctypes.POINTER(PlatformConfig)]
+    lib.ddr_get_platform_config.restype = ctypes.c_int
+    lib.ddr_build_chip_binary.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32,
+                                          ctypes.POINTER(ctypes.c_uint8)]
+    lib.ddr_build_chip_binary.restype = ctypes.c_size_t
+    lib.processor_config_list.argtypes = [ctypes.POINTER(ctypes.c_size_t)]
+    lib.processor_config_list.restype = ctypes.POINTER(ProcessorConfig)
+    lib.ddr_chip_config_list.argtypes = [ctypes.POINTER(ctypes.c_size_t)]
+    lib.ddr_chip_config_list.restype = ctypes.POINTER(DDRChipConfig)
+    return lib
+
+def c_processors(lib) -> List[ProcessorConfig]:
+    """Processor configs of the C database, in database order"""
+    count = ctypes.c_size_t()
+    configs = lib.processor_config_list(ctypes.byref(count))
+    return [configs[i] for i in range(count.value)]
+
+def c_chips(lib) -> List[DDRChipConfig]:
+    """DDR chip configs of the C database, in database order"""
+    count = ctypes.c_size_t()
+    configs = lib.ddr_chip_config_list(ctypes.byref(count))
+    return [configs[i] for i in range(count.value)]
+
+def build_chip_binary(lib, platform: str, chip: str, freq: int) -> Optional[bytes]:
+    """ddr_build_chip_binary(): the C generator from processor + chip to binary"""
+    output = (ctypes.c_uint8 * ddr_layout.LAYOUT_324.size)()
+    size = lib.ddr_build_chip_binary(platform.encode(), chip.encode(), freq, output)
+    return bytes(output[:size]) if size else None
+
+def cfg_for_chip(chip: str, cfg_files: List[Path]) -> Optional[Path]:
+    """The cfg whose name contains the chip's part number, if exactly one does"""
+    part = CHIP_TYPE_SUFFIX.sub('', chip).upper()
+    matches = [f for f in cfg_files if part in f.stem.upper()]
+    return matches[0] if len(matches) == 1 else None
+
+def python_builder(processor: ProcessorConfig) -> BinaryBuilder:
+    """BinaryBuilder with the C database's processor config as FIDB input"""
+    builder = BinaryBuilder(processor.name.decode())
+    builder.config = {name: getattr(processor, name) for name in PLATFORM_FIELDS}
+    return builder
+
+def compare_platform_defaults(lib) -> List[str]:
+    """Python platform config fields that differ from the C database defaults"""
+    differences = []
+    for platform in PLATFORMS:
+        c_config = PlatformConfig()
+        if lib.ddr_get_platform_config(platform.encode(), ctypes.byref(c_config)) != 0:
+            differences.append(f"{platform}: not in the C database")
+            continue
+        py_config = BinaryBuilder(platform).config
+        for name, _ in PlatformConfig._fields_:
+            if getattr(c_config, name) != py_config[name]:
+                differences.append(f"{platform}.{name}: C {getattr(c_config, name)}, Python {py_config[name]}")
+    return differences
+
+def divergent_fields(py_binary: bytes, c_binary: bytes) -> List[str]:
+    """Layout fields that differ (offsets for unnamed bytes), in offset order"""
+    layout = ddr_layout.LAYOUT_324
+    fields = []
+    for field_name, start, code in layout.fields:
+        end = start + struct.calcsize(f'<{code}')
+        if py_binary[start:end] != c_binary[start:end]:
+            fields.append(field_name)
+    named = {i for _, start, code in layout.fields for i in range(start, start + struct.calcsize(f'<{code}'))}
+    fields.extend(f"0x{i:03X}" for i in range(len(py_binary))
+                  if i not in named and py_binary[i] != c_binary[i])
+    return fields
+
+def describe_divergence(py_binary: bytes, c_binary: bytes) -> str:
+    """Differing offsets with their layout field names"""
+    layout = ddr_layout.LAYOUT_324
+    offsets = [i for i in range(len(py_binary)) if py_binary[i] != c_binary[i]]
+    names = []
+    for offset in offsets[:8]:
+        name = next((n for n, start, code in layout.fields
+                     if start <= offset < start + struct.calcsize(f'<{code}')), None)
+        names.append(f"0x{offset:03X}{f' ({name})' if name else ''}")
+    more = f" +{len(offsets) - 8} more" if len(offsets) > 8 else ""
+    return f"{len(offsets)} bytes: {', '.join(names)}{more}"
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the Python DDR compiler with the C binary builder'
+    )
+    parser.add_argument('--lib', help='Path to the thingino_ddr shared library (default: search build dirs)')
+    parser.add_argument('--ddrs', default=str(DEFAULT_DDRS),
+                        help='DDR config directory (contains <TYPE>/*.cfg)')
+    parser.add_argument('--freqs', default=DEFAULT_FREQS,
+                        help='Comma-separated DDR frequencies in Hz')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timing repetitions, best is reported (default: 3)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='List every divergent binary')
+
+    args = parser.parse_args()
+
+    lib_path = find_library(args.lib)
+    if lib_path is None:
+        print("ERROR: thingino_ddr shared library not found")
+        print("       Build it with: cmake -B build && cmake --build build --target thingino_ddr")
+        sys.exit(1)
+    try:
+        lib = load_library(lib_path)
+    except OSError as e:
+        print(f"ERROR: Failed to load {lib_path}: {e}")
+        sys.exit(1)
+
+    freqs = [int(f) for f in args.freqs.split(',')]
+    ddrs_dir = Path(args.ddrs)
+    cfg_files = sorted(ddrs_dir.glob('*/*.cfg'))
+    processors = c_processors(lib)
+
+    chips, unmatched = [], []
+    for chip in c_chips(lib):
+        name = chip.name.decode()
+        cfg_file = cfg_for_chip(name, cfg_files)
+        try:
+            config = DDRConfig(cfg_file, verbose=False) if cfg_file else None
+        except ValueError:
+            config = None
+        if config is None:
+            unmatched.append(f"{name}: no cfg")
+            continue
+        cfg_name = str(cfg_file.relative_to(ddrs_dir).with_suffix(''))
+        chip_type = C_DDR_TYPES.get(chip.ddr_type, f"type {chip.ddr_type}")
+        if config.ddr_type != chip_type:
+            # Same part number, different DDR type: not a generator divergence
+            unmatched.append(f"{name}: type mismatch, chip is {chip_type}, {cfg_name} is {config.ddr_type}")
+            continue
+        chips.append((name, cfg_name, config))
+
+    print("=" * 80)
+    print(f"DDR generator equivalence: {len(chips)} chips x {len(processors)} processors x "
+          f"{len(freqs)} frequencies")
+    print(f"C library: {lib_path}")
+    print("=" * 80)
+    for chip, cfg_name, _ in chips:
+        print(f"  {chip:24s} <-> {cfg_name}")
+    if unmatched:
+        print("⚠ Unmatched chips:")
+        for note in unmatched:
+            print(f"  {note}")
+
+    builders = [(processor.name.decode(), python_builder(processor)) for processor in processors]
+    cases = [(chip, config, platform, builder, freq)
+             for chip, _, config in chips
+             for platform, builder in builders
+             for freq in freqs]
+
+    def run_python():
+        binaries = []
+        for _, config, _, builder, freq in cases:
+            converter = DDRParamConverter(freq, verbose=False)
+            timing = select_encoder(config, converter, verbose=False).encode_timing_params()
+            binaries.append(builder.build(config, timing, freq))
+        return binaries
+
+    def run_c():
+        return [build_chip_binary(lib, platform, chip, freq) for chip, _, platform, _, freq in cases]
+
+    def run_python_batch():
+        binaries = []
+        for _, _, config in chips:
+            timing = sweep_timings(config, freqs)
+            for _, builder in builders:
+                binaries.extend(builder.build_many(config, timing, freqs))
+        return binaries
+
+    def best_time(func):
+        best, result = None, None
+        for _ in range(max(1, args.repeat)):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    py_time, py_binaries = best_time(run_python)
+    c_time, c_binaries = best_time(run_c)
+
+    divergent = []
+    for case, py_binary, c_binary in zip(cases, py_binaries, c_binaries):
+        if c_binary is None:
+            divergent.append((case, ['(no C binary)'], "C generator returned no binary"))
+        elif py_binary != c_binary:
+            divergent.append((case, divergent_fields(py_binary, c_binary),
+                              describe_divergence(py_binary, c_binary)))
+
+    differences = compare_platform_defaults(lib)
+    if differences:
+        print("\n⚠ Platform defaults differ (C database vs Python):")
+        for difference in differences:
+            print(f"  {difference}")
+    else:
+        print("\n✓ Platform defaults match the C database")
+
+    if divergent:
+        print(f"\n✗ {len(divergent)}/{len(cases)} binaries diverge")
+        per_chip: Dict[str, set] = {}
+        counts: Dict[str, int] = {}
+        for (chip, *_), fields, _ in divergent:
+            per_chip.setdefault(chip, set()).update(fields)
+            counts[chip] = counts.get(chip, 0) + 1
+        cases_per_chip = len(builders) * len(freqs)
+        for chip, names in per_chip.items():
+            ordered = sorted(names, key=lambda n: ddr_layout.LAYOUT_324.offsets.get(n, 0))
+            print(f"  {chip:24s} {counts[chip]:4d}/{cases_per_chip}  {', '.join(ordered)}")
+        if args.verbose:
+            print()
+            for (chip, _, platform, _, freq), _, description in divergent:
+                print(f"  {chip:24s} {platform:6s} {freq / 1e6:6.1f} MHz  {description}")
+        else:
+            print("  (use -v to list every binary)")
+    else:
+        print(f"\n✓ All {len(cases)} binaries are byte-identical")
+
+    print(f"\nThroughput ({len(cases)} binaries, best of {max(1, args.repeat)}):")
+    print(f"  Python encode+build: {py_time * 1e6 / len(cases):7.1f} µs/binary")
+    if np is not None:
+        batch_time, _ = best_time(run_python_batch)
+        print(f"  Python build_many(): {batch_time * 1e6 / len(cases):7.1f} µs/binary (timing included)")
+    print(f"  C via ctypes:        {c_time * 1e6 / len(cases):7.1f} µs/binary")
+
+    sys.exit(1 if divergent else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+DDR Field Inference - map unknown RDD bytes from (cfg, binary) pairs
+
+Takes a corpus of DDR configs and the binaries produced from them (vendor
+captures, references/*ddr*.bin, or compiler batch output) and computes, in
+one NumPy pass per DDR type:
+
+- A feature matrix per sample: every cfg parameter as value, picoseconds and
+  clock cycles at the sample's DDR frequency, plus the frequency itself
+- The Pearson correlation of every feature with every output byte and bit
+- For each unknown byte, the candidate encodings of its best-correlated
+  features (f + c, f >> s, integer linear fit), ranked by the fraction of
+  samples they reproduce exactly
+
+Pairs are read from CSV files with a cfg column and a binary (or batch
+manifest 'output') column. 384-byte binaries passed directly are paired by
+the chip name in their RDD section.
+
+Usage:
+    python3 ddr_field_inference.py pairs.csv [more.csv ...] [t41n_ddr.bin ...]
+    python3 ddr_field_inference.py out/manifest.csv --cfg-root ddrs/ --offsets 0xE0-0xE3,0xED
+"""
+
+import sys
+import csv
+import time
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'references'))
+
+import ddr_layout
+from ddr_compiler_final import DDRConfig
+
+DEFAULT_CFG_ROOT = Path(__file__).resolve().parent.parent / 'references' / 'cloner-2.5.43-ubuntu_thingino' / 'ddrs'
+
+# Features present in fewer samples than this are dropped
+MIN_COVERAGE = 0.9
+
+# Features whose encodings are tested per target byte
+CANDIDATE_FEATURES = 8
+
+# Largest right shift tried for f >> s encodings
+MAX_SHIFT = 24
+
+# Bytes of the 324-byte layout whose encoding the compiler already derives
+KNOWN_324 = ('ddr_type', 'freq_val', 'cl', 'bl', 'row_bits', 'col_bits_minus6',
+             'tRAS', 'tRC', 'tRCD', 'tRP', 'tRFC', 'tRTP', 'tFAW', 'tRRD', 'tWTR')
+
+@dataclass
+class Sample:
+    """One (cfg, binary) pair"""
+    config: DDRConfig
+    chip: str
+    binary: bytes
+
+@dataclass
+class Encoding:
+    """A candidate encoding of a target byte from one feature"""
+    feature: str
+    form: str
+    score: float        # Fraction of samples reproduced exactly
+    corr: float
+
+    def describe(self) -> str:
+        return f"{self.form:28s} {self.score * 100:5.1f}%  r={self.corr:+.2f}"
+
+def resolve(path_text: str, *bases: Path) -> Optional[Path]:
+    """First existing interpretation of a path from a CSV row"""
+    path = Path(path_text)
+    for candidate in [path] + [base / path for base in bases]:
+        if candidate.is_file():
+            return candidate
+    return None
+
+def load_pairs_csv(csv_path: Path, cfg_root: Path, configs: Dict) -> Tuple[List[Sample], int]:
+    """Samples from a pairs CSV or a batch manifest; returns (samples, skipped)"""
+    samples, skipped = [], 0
+    with open(csv_path, newline='') as f:
+        for row in csv.DictReader(f):
+            cfg_path = resolve(row.get('cfg', ''), cfg_root, csv_path.parent)
+            bin_path = resolve(row.get('binary') or row.get('output') or '', csv_path.parent)
+            if cfg_path is None or bin_path is None:
+                skipped += 1
+                continue
+            config = load_config(cfg_path, configs)
+            if config is None:
+                skipped += 1
+                continue
+            samples.append(Sample(config, chip_name(cfg_path, cfg_root), bin_path.read_bytes()))
+    return samples, skipped
+
+def load_config(cfg_path: Path, configs: Dict) -> Optional[DDRConfig]:
+    key = cfg_path.resolve()
+    if key not in configs:
+        try:
+            configs[key] = DDRConfig(cfg_path, verbose=False)
+        except ValueError:
+            configs[key] = None
+    return configs[key]
+
+def chip_name(cfg_path: Path, cfg_root: Path) -> str:
+    try:
+        return str(cfg_path.resolve().relative_to(cfg_root.resolve()).with_suffix(''))
+    except ValueError:
+        return cfg_path.stem
+
+def pair_by_chip_name(bin_path: Path, cfg_root: Path, configs: Dict) -> Optional[Sample]:
+    """Pair a 384-byte binary with the cfg named in its RDD section"""
+    data = bin_path.read_bytes()
+    fields = ddr_layout.decode(data)
+    if fields is None or 'chip_name' not in fields:
+        return None
+    name = fields['chip_name'].split(b'\x00')[0].decode('ascii', 'replace')
+    for cfg_path in sorted(cfg_root.glob('*/*.cfg')):
+        if cfg_path.stem.lower() == name.lower():
+            config = load_config(cfg_path, configs)
+            if config is not None:
+                return Sample(config, chip_name(cfg_path, cfg_root), data)
+    return None
+
+def feature_matrix(samples: List[Sample], freqs) -> Tuple[List[str], 'np.ndarray']:
+    """
+    (names, matrix) of per-sample features; missing values are NaN.
+
+    Each cfg parameter contributes its raw value, its picoseconds and its
+    clock cycles (ceil) at the sample's frequency.
+    """
+    freqs = np.asarray(freqs, dtype=np.int64)
+    ps_per_tck = 1000000000 // (freqs // 1000)
+    keys = sorted({key for s in samples for key in s.config.params})
+
+    columns = {'freq_hz': freqs.astype(float), 'freq_mhz': freqs / 1e6}
+    for key in keys:
+        value = np.full(len(samples), np.nan)
+        ps = np.full(len(samples), np.nan)
+        for i, s in enumerate(samples):
+            param = s.config.params.get(key)
+            if param is None or not isinstance(param.value, int) or param.value == -1:
+                continue
+            value[i] = param.value
+            if param.unit == 'tck':
+                ps[i] = param.value * ps_per_tck[i]
+            elif param.unit in ('ns', 'ps'):
+                ps[i] = param.ps
+        columns[key] = value
+        if not np.all(np.isnan(ps)):
+            columns[f"{key}.ps"] = ps
+            columns[f"{key}.cycles"] = np.ceil(ps / ps_per_tck)
+
+    names = list(columns)
+    return names, np.stack([columns[name] for name in names], axis=1)
+
+def correlate(features, outputs):
+    """
+    Pearson correlation (features x outputs); constant columns give 0.
+
+    Missing feature values are mean-imputed, so they add nothing to the
+    covariance.
+    """
+    x = np.where(np.isnan(features), np.nanmean(features, axis=0), features)
+    x = x - x.mean(axis=0)
+    y = outputs - outputs.mean(axis=0)
+    x_norm = np.sqrt((x * x).sum(axis=0))
+    y_norm = np.sqrt((y * y).sum(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = (x.T @ y) / np.outer(x_norm, y_norm)
+    return np.nan_to_num(corr)
+
+def fit_encodings(name: str, f, target, corr: float) -> List[Encoding]:
+    """Candidate integer encodings of target from feature f (present rows only)"""
+    present = ~np.isnan(f)
+    if present.sum() < 2:
+        return []
+    f = f[present].astype(np.int64)
+    t = target[present].astype(np.int64)
+    results = []
+
+    # (f >> s) + c, s = 0 is a plain offset
+    for shift in range(MAX_SHIFT + 1):
+        shifted = f >> shift
+        if shift and not shifted.any():
+            break
+        offset = int(np.bincount((t - shifted) & 0xFF, minlength=256).argmax())
+        score = np.count_nonzero(((shifted + offset) & 0xFF) == t) / len(t)
+        signed = offset - 256 if offset > 127 else offset
+        form = name if shift == 0 else f"({name} >> {shift})"
+        if signed:
+            form += f" {'+' if signed > 0 else '-'} {abs(signed)}"
+        results.append(Encoding(name, form, score, corr))
+
+    # round(a * f + b) from a least-squares fit
+    if np.ptp(f) > 0:
+        a, b = np.polyfit(f.astype(float), t.astype(float), 1)
+        if abs(a - 1) > 1e-6:    # Slope 1 is already covered by the offset form
+            score = np.count_nonzero(np.round(a * f + b).astype(np.int64) == t) / len(t)
+            b = 0.0 if abs(b) < 1e-6 else b
+            results.append(Encoding(name, f"{a:.4g}*{name} {'-' if b < 0 else '+'} {abs(b):.3g}",
+                                    score, corr))
+
+    return results
+
+def parse_offsets(spec: str) -> List[int]:
+    """Parse '0xE0-0xE3,0xED' into absolute byte offsets"""
+    offsets = []
+    for part in spec.split(','):
+        if '-' in part:
+            start, end = (int(p, 0) for p in part.split('-'))
+            offsets.extend(range(start, end + 1))
+        else:
+            offsets.append(int(part, 0))
+    return offsets
+
+def default_targets(size: int) -> List[int]:
+    """RDD data bytes without a derived encoding (the CRC is excluded)"""
+    layout = ddr_layout.LAYOUTS[size]
+    known = set()
+    if size == 324:
+        for name in KNOWN_324 + ('rdd_crc',):
+            start = layout.offsets[name]
+            known.update(range(start, start + field_size(layout, name)))
+    return [o for o in range(ddr_layout.RDD_OFFSET + 8, size) if o not in known]
+
+def field_size(layout, name: str) -> int:
+    code = next(code for field, _, code in layout.fields if field == name)
+    return int(code[:-1]) if code.endswith('s') else {'B': 1, 'H': 2, 'I': 4}[code]
+
+def field_at(size: int, offset: int) -> str:
+    """Layout field name covering an offset, or the raw RDD data offset"""
+    layout = ddr_layout.LAYOUTS[size]
+    for name, start, _ in layout.fields:
+        if start <= offset < start + field_size(layout, name):
+            return name if field_size(layout, name) == 1 else f"{name}[{offset - start}]"
+    return f"rdd+0x{offset - ddr_layout.RDD_OFFSET - 8:02x}"
+
+def analyze_group(title: str, samples: List[Sample], targets: List[int], top: int, bits: bool):
+    """Correlate one group of same-layout, same-type samples and print rankings"""
+    size = len(samples[0].binary)
+    binaries = np.frombuffer(b''.join(s.binary for s in samples), dtype=np.uint8).reshape(len(samples), size)
+    records = ddr_layout.LAYOUTS[size].decode_many(binaries.tobytes())
+    freqs = records['ddr_freq'].astype(np.int64)
+
+    names, features = feature_matrix(samples, freqs)
+    coverage = 1 - np.isnan(features).mean(axis=0)
+    keep = coverage >= MIN_COVERAGE
+    names = [n for n, k in zip(names, keep) if k]
+    features = features[:, keep]
+
+    targets = [o for o in targets if o < size]
+    outputs = binaries[:, targets].astype(float)
+    corr = correlate(features, outputs)
+
+    print("\n" + "=" * 80)
+    print(f"{title}: {len(samples)} samples, {len({s.chip for s in samples})} cfgs, "
+          f"{len(np.unique(freqs))} frequencies, {len(names)} features")
+    print("=" * 80)
+    if len(samples) < 3:
+        print("⚠ Fewer than 3 samples: bytes can only be reported as constant")
+
+    constant = []
+    for j, offset in enumerate(targets):
+        column = binaries[:, offset]
+        label = f"0x{offset:03X} {field_at(size, offset)}"
+        if np.all(column == column[0]):
+            constant.append((offset, int(column[0])))
+            continue
+
+        order = np.argsort(-np.abs(corr[:, j]))[:CANDIDATE_FEATURES]
+        encodings = []
+        for i in order:
+            encodings.extend(fit_encodings(names[i], features[:, i], column, float(corr[i, j])))
+        encodings.sort(key=lambda e: (e.score, abs(e.corr)), reverse=True)
+
+        values = np.unique(column)
+        print(f"\n{label}  ({len(values)} distinct values)")
+        seen = set()
+        shown = 0
+        for encoding in encodings:
+            if encoding.form in seen:
+                continue
+            seen.add(encoding.form)
+            mark = "✓" if encoding.score == 1.0 else " "
+            print(f"  {mark} {encoding.describe()}")
+            shown += 1
+            if shown >= top:
+                break
+
+        if bits:
+            bit_matrix = ((column[:, None] >> np.arange(8)) & 1).astype(float)
+            bit_corr = correlate(features, bit_matrix)
+            for bit in range(8):
+                if np.ptp(bit_matrix[:, bit]) == 0:
+                    continue
+                best = int(np.argmax(np.abs(bit_corr[:, bit])))
+                print(f"      bit {bit}: {names[best]} (r={bit_corr[best, bit]:+.2f})")
+
+    if constant:
+        print(f"\nConstant across the corpus ({len(constant)} bytes):")
+        for i in range(0, len(constant), 8):
+            print("  " + '  '.join(f"0x{o:03X}={v:02x}" for o, v in constant[i:i + 8]))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Infer RDD field encodings by correlating cfg parameters with output bytes'
+    )
+    parser.add_argument('inputs', nargs='+',
+                        help='Pairs CSV (cfg + binary/output columns) or 384-byte .bin files')
+    parser.add_argument('--cfg-root', default=str(DEFAULT_CFG_ROOT),
+                        help='Directory relative cfg paths and chip names resolve against')
+    parser.add_argument('--offsets', default=None,
+                        help='Absolute byte offsets to analyze, e.g. 0xE0-0xE3,0xED (default: unknown RDD bytes)')
+    parser.add_argument('--top', type=int, default=3,
+                        help='Encodings listed per byte (default: 3)')
+    parser.add_argument('--bits', action='store_true',
+                        help='Also show the best-correlated feature for every varying bit')
+    parser.add_argument('--by-type', action=argparse.BooleanOptionalAction, default=True,
+                        help='Analyze each DDR type separately (default: on)')
+
+    args = parser.parse_args()
+
+    if np is None:
+        print("ERROR: numpy not found. Install with: pip install numpy")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    cfg_root = Path(args.cfg_root)
+    configs = {}
+    samples = []
+    for text in args.inputs:
+        path = Path(text)
+        if path.suffix.lower() == '.csv':
+            loaded, skipped = load_pairs_csv(path, cfg_root, configs)
+            samples.extend(loaded)
+            if skipped:
+                print(f"⚠ {path}: skipped {skipped} rows with missing cfg or binary")
+        else:
+            sample = pair_by_chip_name(path, cfg_root, configs)
+            if sample is None:
+                print(f"⚠ {path}: no cfg matches its chip name, skipped")
+            else:
+                samples.append(sample)
+
+    groups = {}
+    for sample in samples:
+        if len(sample.binary) not in ddr_layout.LAYOUTS:
+            continue
+        key = (len(sample.binary), sample.config.ddr_type if args.by_type else 'all')
+        groups.setdefault(key, []).append(sample)
+
+    if not groups:
+        print("ERROR: No usable (cfg, binary) pairs")
+        sys.exit(1)
+
+    for (size, ddr_type), group in sorted(groups.items()):
+        targets = parse_offsets(args.offsets) if args.offsets else default_targets(size)
+        analyze_group(f"{size}-byte binaries, {ddr_type}", group, targets, args.top, args.bits)
+
+    print(f"\nAnalyzed {sum(len(g) for g in groups.values())} samples in "
+          f"{time.perf_counter() - start:.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Inverse DDR Lookup - find the cfg and frequency behind a captured DDR binary
+
+Builds an index of the RDD geometry/timing region (RDD data 0x1c-0x2b: CL/BL,
+row/col bits and the timing bytes; the CRC and the frequency words are left
+out) for every ddrs/*.cfg over a DDR frequency range, using the vectorized
+sweep in references/ddr_compiler_final.py. A captured binary is then matched
+against the whole index at once: exact matches by hash, otherwise the nearest
+encodings by bit-level Hamming distance over the same 16 bytes.
+
+The index is saved as .npz (default $XDG_CACHE_HOME/thingino-cloner/, with
+XDG_CACHE_HOME defaulting to ~/.cache) and rebuilt when a .cfg changes or a
+different frequency range is requested.
+
+The RDD region does not depend on the platform, so platforms are matched
+separately by comparing the captured FIDB against each platform's config.
+
+Nearest matches are restricted to the DDR frequency in the captured FIDB
+(--freq-tolerance widens the window, --any-freq searches the whole range), and
+exact matches at other frequencies are flagged.
+
+384-byte (XBurst2) binaries use a layout the compiler does not produce; they
+are matched by the chip name embedded in the RDD and the FIDB frequency.
+T20 vendor blobs (RDD size 0xC4) have unmapped RDD data and are rejected.
+
+Usage:
+    python3 ddr_inverse_lookup.py <ddr.bin> [--ddrs DIR] [--freqs 100e6:800e6:1e6] [--top 10]
+                                  [--freq-tolerance 0] [--any-freq]
+"""
+
+import sys
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'references'))
+
+import ddr_layout
+from ddr_compiler_final import (DDRConfig, BinaryBuilder, PLATFORMS,
+                                cache_dir, parse_freq_range, sweep_timings, write_cache_file)
+
+DEFAULT_DDRS = Path(__file__).resolve().parent.parent / 'references' / 'cloner-2.5.43-ubuntu_thingino' / 'ddrs'
+DEFAULT_FREQS = '100e6:800e6:1e6'
+DEFAULT_INDEX = cache_dir() / 'ddr_inverse_index.npz'
+
+# Bump when the indexed region or the compiler's encoding changes
+INDEX_VERSION = 1
+
+# Geometry/timing region of the 324-byte format (absolute offsets)
+REGION_START = ddr_layout.LAYOUT_324.offsets['cl']
+REGION_END = ddr_layout.LAYOUT_324.offsets['tWTR'] + 1
+REGION_NAMES = tuple(name for name, offset, _ in ddr_layout.LAYOUT_324.fields
+                     if REGION_START <= offset < REGION_END)
+
+def cfg_signature(cfg_files: List[Path], freqs) -> str:
+    """Identity of the cfg set and frequency range an index was built from"""
+    digest = hashlib.sha256(f"v{INDEX_VERSION}".encode())
+    for cfg_file in cfg_files:
+        st = cfg_file.stat()
+        digest.update(f"{cfg_file}:{st.st_mtime_ns}:{st.st_size};".encode())
+    digest.update(np.asarray(freqs, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+class InverseIndex:
+    """RDD region encodings for every (cfg, frequency) pair"""
+
+    def __init__(self, chips: List[str], freqs, codes):
+        self.chips = list(chips)                        # "<TYPE>/<cfg name>"
+        self.freqs = np.asarray(freqs, dtype=np.int64)  # (F,)
+        self.codes = np.asarray(codes, dtype=np.uint8)  # (chips, F, region bytes)
+
+        # Exact-match table: region bytes -> flat (chip * F + freq) indices
+        flat = self.codes.reshape(-1, self.codes.shape[-1])
+        unique, inverse = np.unique(flat, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        bounds = np.searchsorted(inverse.ravel()[order], np.arange(len(unique) + 1))
+        self.exact = {bytes(row): order[bounds[i]:bounds[i + 1]] for i, row in enumerate(unique)}
+
+    @classmethod
+    def build(cls, cfg_files: List[Path], ddrs_dir: Path, freqs) -> 'InverseIndex':
+        """Compile every cfg over freqs (one sweep + layout pass per cfg)"""
+        builder = BinaryBuilder(PLATFORMS[0])
+        chips, codes = [], []
+        for cfg_file in cfg_files:
+            try:
+                config = DDRConfig(cfg_file, verbose=False)
+            except ValueError:
+                continue
+            binaries = builder.build_many(config, sweep_timings(config, freqs), freqs)
+            records = ddr_layout.LAYOUT_324.decode_many(b''.join(binaries))
+            chips.append(str(cfg_file.relative_to(ddrs_dir).with_suffix('')))
+            codes.append(np.stack([records[name] for name in REGION_NAMES], axis=1))
+        return cls(chips, freqs, np.stack(codes))
+
+    @classmethod
+    def load(cls, path: Path, signature: str):
+        """Saved index if it matches signature, else None"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data['signature']) != signature:
+                    return None
+                return cls(data['chips'].tolist(), data['freqs'], data['codes'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path: Path, signature: str):
+        write_cache_file(path, lambda tmp: np.savez(tmp, signature=signature, chips=np.array(self.chips),
+                                                     freqs=self.freqs, codes=self.codes))
+
+    def _ranges(self, flat_indices) -> List[Tuple[str, int, int]]:
+        """Group flat indices into (chip, first freq, last freq) runs"""
+        ranges = []
+        for flat in sorted(int(i) for i in flat_indices):
+            chip, freq = divmod(flat, len(self.freqs))
+            if ranges and ranges[-1][0] == chip and ranges[-1][2] == freq - 1:
+                ranges[-1][2] = freq
+            else:
+                ranges.append([chip, freq, freq])
+        return [(self.chips[c], int(self.freqs[a]), int(self.freqs[b])) for c, a, b in ranges]
+
+    def lookup_exact(self, region: bytes) -> List[Tuple[str, int, int]]:
+        return self._ranges(self.exact.get(region, ()))
+
+    def freq_window(self, freq_hz: int, tolerance_hz: int):
+        """
+        Mask of indexed frequencies within tolerance of freq_hz.
+
+        With tolerance 0 this is the indexed frequency closest to freq_hz.
+        None if freq_hz lies outside the indexed range.
+        """
+        if not self.freqs[0] - tolerance_hz <= freq_hz <= self.freqs[-1] + tolerance_hz:
+            return None
+        offset = np.abs(self.freqs - freq_hz)
+        return offset <= max(tolerance_hz, int(offset.min()))
+
+    def nearest(self, region: bytes, top: int, freq_mask=None) -> List[Tuple[int, int, str, int, int]]:
+        """
+        Closest encodings by bit Hamming distance over the region.
+
+        freq_mask (from freq_window) restricts the search to those frequencies.
+        Returns (bit distance, differing bytes, chip, first freq, last freq),
+        best first, one entry per contiguous frequency range.
+        """
+        target = np.frombuffer(region, dtype=np.uint8)
+        diff = self.codes ^ target
+        bits = np.unpackbits(diff, axis=-1).sum(axis=-1, dtype=np.int32)   # (chips, F)
+        if freq_mask is not None:
+            bits[:, ~freq_mask] = -1
+        flat = bits.ravel()
+
+        results = []
+        for distance in np.unique(flat[flat >= 0]):
+            indices = np.flatnonzero(flat == distance)
+            for chip, first, last in self._ranges(indices):
+                chip_index = self.chips.index(chip)
+                freq_index = int(np.searchsorted(self.freqs, first))
+                byte_diff = int(np.count_nonzero(diff[chip_index, freq_index]))
+                results.append((int(distance), byte_diff, chip, first, last))
+            if len(results) >= top:
+                break
+        return results[:top]
+
+def matching_platforms(fields: Dict) -> List[str]:
+    """Platforms whose FIDB config matches the captured binary"""
+    platforms = []
+    for platform in PLATFORMS:
+        config = BinaryBuilder(platform).config
+        if (config['crystal_freq'] == fields['crystal_freq'] and config['cpu_freq'] == fields['cpu_freq']
+                and config['mem_size'] == fields['mem_size']):
+            platforms.append(platform)
+    return platforms
+
+def format_range(first: int, last: int) -> str:
+    if first == last:
+        return f"{first / 1e6:.1f} MHz"
+    return f"{first / 1e6:.1f}-{last / 1e6:.1f} MHz"
+
+def lookup_384(fields: Dict, cfg_files: List[Path], ddrs_dir: Path):
+    """Match an XBurst2 binary by its embedded chip name"""
+    chip_name = fields['chip_name'].split(b'\x00')[0].decode('ascii', 'replace')
+    print(f"384-byte binary: chip '{chip_name}', {fields['ddr_freq'] / 1e6:.1f} MHz "
+          f"(compiler does not produce this layout; matching by name)")
+
+    matches = [f for f in cfg_files if f.stem.lower() == chip_name.lower()]
+    if not matches:
+        print(f"  ✗ No cfg named {chip_name}")
+        return False
+    for cfg_file in matches:
+        print(f"  ✓ {cfg_file.relative_to(ddrs_dir).with_suffix('')} at {fields['ddr_freq'] / 1e6:.1f} MHz")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Find the DDR cfg and frequency that produce a captured DDR binary'
+    )
+    parser.add_argument('binary', help='Captured 324- or 384-byte DDR binary')
+    parser.add_argument('--ddrs', default=str(DEFAULT_DDRS),
+                        help='DDR config directory (contains <TYPE>/*.cfg)')
+    parser.add_argument('--freqs', default=DEFAULT_FREQS,
+                        help=f'DDR frequency range START:STOP[:STEP] in Hz (default: {DEFAULT_FREQS})')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Nearest matches to list when there is no exact match (default: 10)')
+    parser.add_argument('--freq-tolerance', type=float, default=0.0,
+                        help='Nearest matches within this many MHz of the FIDB DDR frequency '
+                             '(default: 0, the closest indexed frequency)')
+    parser.add_argument('--any-freq', action='store_true',
+                        help='Search nearest matches at every indexed frequency, ignoring the FIDB')
+    parser.add_argument('--index', default=str(DEFAULT_INDEX),
+                        help=f'Saved index file (default: {DEFAULT_INDEX})')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Rebuild the index even if the saved one is current')
+
+    args = parser.parse_args()
+
+    if np is None:
+        print("ERROR: numpy not found. Install with: pip install numpy")
+        sys.exit(1)
+
+    try:
+        data = Path(args.binary).read_bytes()
+    except OSError as e:
+        print(f"ERROR: Failed to read binary: {e}")
+        sys.exit(1)
+
+    fields = ddr_layout.decode(data)
+    if fields is None:
+        print(f"ERROR: {args.binary} is {len(data)} bytes, expected 324 or 384")
+        sys.exit(1)
+    if not ddr_layout.rdd_mapped(fields):
+        print(f"⚠ {args.binary}: RDD size 0x{fields['rdd_size']:X} is the T20 vendor layout; "
+              f"its RDD data is not mapped, so it cannot be matched against cfgs")
+        sys.exit(1)
+
+    ddrs_dir = Path(args.ddrs)
+    cfg_files = sorted(ddrs_dir.glob('*/*.cfg'))
+    if not cfg_files:
+        print(f"ERROR: No .cfg files under {ddrs_dir}")
+        sys.exit(1)
+
+    print("=" * 80)
+    print(f"Inverse DDR lookup: {args.binary}")
+    print("=" * 80)
+
+    platforms = matching_platforms(fields)
+    print(f"FIDB: CPU {fields['cpu_freq'] / 1e6:.1f} MHz, DDR {fields['ddr_freq'] / 1e6:.1f} MHz, "
+          f"platforms: {', '.join(platforms) if platforms else 'none matching'}")
+
+    if len(data) == 384:
+        sys.exit(0 if lookup_384(fields, cfg_files, ddrs_dir) else 1)
+
+    try:
+        freqs = parse_freq_range(args.freqs)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    signature = cfg_signature(cfg_files, freqs)
+    index = None if args.rebuild else InverseIndex.load(Path(args.index), signature)
+    if index is None:
+        index = InverseIndex.build(cfg_files, ddrs_dir, freqs)
+        index.save(Path(args.index), signature)
+        print(f"Built index: {len(index.chips)} cfgs x {len(freqs)} frequencies "
+              f"({len(index.exact)} distinct encodings) in {time.perf_counter() - start:.2f}s")
+    else:
+        print(f"Loaded index: {len(index.chips)} cfgs x {len(freqs)} frequencies in "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    ddr_freq = fields['ddr_freq']
+    region = bytes(data[REGION_START:REGION_END])
+    print(f"RDD region: {region.hex(' ')}")
+
+    start = time.perf_counter()
+    exact = index.lookup_exact(region)
+    if exact:
+        print(f"\n✓ Exact matches ({(time.perf_counter() - start) * 1000:.1f} ms):")
+        for chip, first, last in exact:
+            mismatch = "" if first <= ddr_freq <= last else f"  ⚠ FIDB DDR is {ddr_freq / 1e6:.1f} MHz"
+            print(f"  {chip:45s} {format_range(first, last)}{mismatch}")
+        sys.exit(0)
+
+    freq_mask = None
+    if not args.any_freq:
+        freq_mask = index.freq_window(ddr_freq, int(args.freq_tolerance * 1e6))
+        if freq_mask is None:
+            print(f"⚠ FIDB DDR frequency {ddr_freq / 1e6:.1f} MHz is outside the index; "
+                  f"searching every frequency")
+    window = ("every indexed frequency" if freq_mask is None
+              else f"{format_range(int(index.freqs[freq_mask][0]), int(index.freqs[freq_mask][-1]))}")
+
+    nearest = index.nearest(region, args.top, freq_mask)
+    print(f"\n✗ No exact match; nearest encodings at {window} "
+          f"({(time.perf_counter() - start) * 1000:.1f} ms):")
+    print(f"  {'Bits':>4s} {'Bytes':>5s}  {'cfg':45s} Frequency")
+    for distance, byte_diff, chip, first, last in nearest:
+        print(f"  {distance:4d} {byte_diff:5d}  {chip:45s} {format_range(first, last)}")
+
+if __name__ == '__main__':
+    main()
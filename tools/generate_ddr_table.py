@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Generate precompiled DDR binary table from the C DDR databases
+
+This script builds the FIDB+RDD DDR binary for every (processor, DDR chip,
+frequency) combination of src/ddr/ddr_config_database.c with the C generator,
+ddr_build_chip_binary() in the thingino_ddr shared library (loaded through
+ctypes, see ddr_equivalence.py), and emits them as a C table. Identical
+binaries are stored once, and the entries are sorted (case-insensitively) so
+ddr_table_lookup() is a bsearch() with no runtime DDR generation.
+
+Chip names are the C database names, e.g. "M14D1G1664A_DDR2". Every
+processor's default DDR frequency is added to --freqs. XBurst2 processors
+(T40/T41) are left out: they take the 384-byte DDR format, which the C
+builder does not produce.
+
+Build the library first:
+    cmake -B build && cmake --build build --target thingino_ddr
+
+Usage:
+    generate_ddr_table.py <output_dir> [--lib build/libthingino_ddr.so] [--freqs 300000000,400000000,...]
+Example:
+    generate_ddr_table.py src/ddr
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+from ddr_equivalence import find_library, load_library, c_processors, c_chips, build_chip_binary
+
+DEFAULT_FREQS = [300000000, 400000000, 500000000]
+DDR_BINARY_SIZE = 324
+
+# 384-byte DDR format (ddr_layout.LAYOUT_384), not produced by ddr_build_binary()
+XBURST2_PROCESSORS = ('t40', 't41', 't41n')
+
+def bytes_to_c_rows(data, bytes_per_line=12, indent="        "):
+    """Convert bytes to C initializer lines"""
+    lines = []
+    for i in range(0, len(data), bytes_per_line):
+        chunk = data[i:i+bytes_per_line]
+        lines.append(indent + ', '.join(f'0x{b:02x}' for b in chunk) + ',')
+    return '\n'.join(lines)
+
+def compile_table(lib, freqs):
+    """Return (entries, blobs): entries sorted by lookup key, blobs deduplicated"""
+    rows = []
+    chips = [chip.name.decode() for chip in c_chips(lib)]
+
+    for processor in c_processors(lib):
+        platform = processor.name.decode()
+        if platform in XBURST2_PROCESSORS:
+            continue
+        for chip in chips:
+            for freq in sorted(set(freqs) | {processor.ddr_freq}):
+                binary = build_chip_binary(lib, platform, chip, freq)
+                if binary is None:
+                    raise ValueError(f"ddr_build_chip_binary failed for {platform}/{chip}")
+                rows.append((platform, chip, freq, binary))
+
+    # strcasecmp() order, matching the comparator in the generated lookup
+    rows.sort(key=lambda r: (r[0].lower(), r[1].lower(), r[2]))
+
+    blobs = []
+    blob_index = {}
+    entries = []
+    for platform, chip, freq, binary in rows:
+        if binary not in blob_index:
+            blob_index[binary] = len(blobs)
+            blobs.append(binary)
+        entries.append((platform, chip, freq, blob_index[binary]))
+
+    return entries, blobs
+
+def generate_ddr_table(lib_path, output_dir, freqs):
+    """Generate ddr_table.h and ddr_table.c"""
+
+    if lib_path is None:
+        print("Error: thingino_ddr shared library not found")
+        print("       Build it with: cmake -B build && cmake --build build --target thingino_ddr")
+        return 1
+    try:
+        lib = load_library(lib_path)
+    except OSError as e:
+        print(f"Error: Failed to load {lib_path}: {e}")
+        return 1
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    try:
+        entries, blobs = compile_table(lib, freqs)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    for binary in blobs:
+        if len(binary) != DDR_BINARY_SIZE:
+            print(f"Error: DDR binary is {len(binary)} bytes, expected {DDR_BINARY_SIZE}")
+            return 1
+
+    print(f"Compiled {len(entries)} DDR binaries, {len(blobs)} distinct")
+
+    # Generate header
+    header_file = output_path / "ddr_table.h"
+    with open(header_file, 'w') as f:
+        f.write(f"""/**
+ * Precompiled DDR Binary Table - Auto-generated by tools/generate_ddr_table.py
+ * DO NOT EDIT
+ *
+ * FIDB+RDD binaries built by ddr_build_chip_binary() for every (processor,
+ * DDR chip, frequency) combination of ddr_config_database.c, sorted for
+ * binary search. T40/T41 (384-byte DDR format) are not included.
+ */
+
+#ifndef DDR_TABLE_H
+#define DDR_TABLE_H
+
+#include <stdint.h>
+#include <stddef.h>
+
+#define DDR_TABLE_BINARY_SIZE {DDR_BINARY_SIZE}
+
+typedef struct {{
+    const char *platform;       // Processor name (e.g., "t31x")
+    const char *chip;           // DDR chip (e.g., "M14D1G1664A_DDR2")
+    uint32_t freq_hz;           // DDR frequency (Hz)
+    uint16_t binary;            // Index into the deduplicated binary table
+}} ddr_table_entry_t;
+
+/**
+ * Look up a precompiled DDR binary (case-insensitive names, exact frequency)
+ *
+ * @param platform Processor name (e.g., "t31x")
+ * @param chip DDR chip name (e.g., "W631GU6NG_DDR3")
+ * @param freq_hz DDR frequency in Hz
+ * @param size Output parameter for binary size
+ * @return Pointer to DDR binary, or NULL if not found
+ */
+const uint8_t* ddr_table_lookup(const char *platform, const char *chip,
+    uint32_t freq_hz, size_t *size);
+
+/**
+ * List all table entries (sorted by platform, chip, frequency)
+ *
+ * @param count Output parameter for number of entries
+ * @return Array of table entries
+ */
+const ddr_table_entry_t* ddr_table_list(size_t *count);
+
+#endif // DDR_TABLE_H
+""")
+
+    # Generate implementation
+    table_file = output_path / "ddr_table.c"
+    with open(table_file, 'w') as f:
+        f.write(f"""/**
+ * Precompiled DDR Binary Table - Auto-generated by tools/generate_ddr_table.py
+ * DO NOT EDIT
+ *
+ * {len(entries)} entries, {len(blobs)} distinct binaries
+ */
+
+#include "ddr_table.h"
+#include <stdlib.h>
+#include <strings.h>
+
+""")
+
+        f.write(f"static const uint8_t ddr_binaries[{len(blobs)}][DDR_TABLE_BINARY_SIZE] = {{\n")
+        for i, binary in enumerate(blobs):
+            f.write(f"    {{ // {i}\n")
+            f.write(bytes_to_c_rows(binary))
+            f.write("\n    },\n")
+        f.write("};\n\n")
+
+        f.write("// Sorted by strcasecmp(platform), strcasecmp(chip), freq_hz\n")
+        f.write("static const ddr_table_entry_t ddr_table[] = {\n")
+        for platform, chip, freq, blob in entries:
+            f.write(f"    {{\"{platform}\", \"{chip}\", {freq}u, {blob}}},\n")
+        f.write("};\n\n")
+
+        f.write("""#define DDR_TABLE_COUNT (sizeof(ddr_table) / sizeof(ddr_table[0]))
+
+static int ddr_table_compare(const void *key, const void *element) {
+    const ddr_table_entry_t *k = key;
+    const ddr_table_entry_t *e = element;
+
+    int result = strcasecmp(k->platform, e->platform);
+    if (result != 0) return result;
+
+    result = strcasecmp(k->chip, e->chip);
+    if (result != 0) return result;
+
+    return (k->freq_hz > e->freq_hz) - (k->freq_hz < e->freq_hz);
+}
+
+const uint8_t* ddr_table_lookup(const char *platform, const char *chip,
+    uint32_t freq_hz, size_t *size) {
+    if (!platform || !chip) return NULL;
+
+    ddr_table_entry_t key = {platform, chip, freq_hz, 0};
+    const ddr_table_entry_t *entry = bsearch(&key, ddr_table, DDR_TABLE_COUNT,
+        sizeof(ddr_table[0]), ddr_table_compare);
+    if (!entry) return NULL;
+
+    if (size) *size = DDR_TABLE_BINARY_SIZE;
+    return ddr_binaries[entry->binary];
+}
+
+const ddr_table_entry_t* ddr_table_list(size_t *count) {
+    if (count) *count = DDR_TABLE_COUNT;
+    return ddr_table;
+}
+""")
+
+    print(f"Generated header: {header_file}")
+    print(f"Generated table: {table_file}")
+    return 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Generate a precompiled, binary-searchable DDR binary table'
+    )
+    parser.add_argument('output_dir', help='Output directory for ddr_table.[ch]')
+    parser.add_argument('--lib', help='Path to the thingino_ddr shared library (default: search build dirs)')
+    parser.add_argument('--freqs', default=','.join(str(f) for f in DEFAULT_FREQS),
+                        help='Comma-separated DDR frequencies in Hz')
+
+    args = parser.parse_args()
+    sys.exit(generate_ddr_table(find_library(args.lib), args.output_dir,
+                                [int(f) for f in args.freqs.split(',')]))
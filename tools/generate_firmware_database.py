@@ -6,35 +6,368 @@ This script reads SPL and U-Boot binaries from the cloner firmwares directory
 and generates separate C source files for each processor, plus a registry file
 that ties them all together. This approach makes compilation much faster and
 more modular than having all binaries in a single file.
+
+Emission modes (--emit):
+  array   Hex-literal C arrays (default; self-contained, works everywhere)
+  incbin  Raw blobs written to <output_dir>/blobs/ and pulled in by the C
+          compiler with C23 #embed when supported, otherwise by an assembler
+          .incbin stub. Much faster to generate and compile. The .incbin path
+          is absolute, so regenerate rather than commit incbin output.
+
+Compression (--compress zlib) stores every blob zlib-compressed; the accessors
+inflate it into a heap buffer on first access and return that buffer from
+then on. Together with --all (every processor directory instead of the
+EMBEDDED_PROCESSORS subset) this keeps the binary size close to the subset
+while covering all processors. Compressed output links against zlib.
+
+Regeneration is incremental: <output_dir>/.firmware_manifest.json records, for
+every firmware_*.c, a key over the generator script, the mode and the SHA-256
+of its input blobs. Files whose key is unchanged are not rewritten (their
+mtimes stay, so the build does not recompile them); changed files are
+generated in parallel by a process pool. The small registry and support files
+are only written when their content changes.
+
+--pack PATH also writes every selected blob to one firmware pack file, which
+the cloner can mmap at runtime (src/firmware/firmware_pack.h) instead of
+compiling the blobs in. Layout (little-endian):
+
+    0x00  header (32 bytes): "TFWPACK\0", version, entry count, entry size,
+          CRC32 of the index, blob alignment, reserved
+    0x20  index: entry count x 48 bytes, sorted by (processor, kind):
+          processor name (lowercase, NUL-padded to 32), kind (0 SPL, 1 U-Boot),
+          offset, size, CRC32 of the blob
+    ...   blobs, each starting on a PACK_ALIGNMENT boundary; identical blobs
+          are stored once and shared by their entries
+
+Usage:
+    generate_firmware_database.py <firmwares_dir> <output_dir> [--emit array|incbin]
+                                  [--compress none|zlib] [--all] [-j N] [--force]
+                                  [--pack PATH [--pack-only]]
 """
 
 import os
 import sys
+import json
+import time
+import struct
+import zlib
+import hashlib
+import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+EMIT_MODES = ('array', 'incbin')
+COMPRESS_MODES = ('none', 'zlib')
+BLOB_DIR = 'blobs'
+MANIFEST_NAME = '.firmware_manifest.json'
+
+# Firmware pack format, mirrored by src/firmware/firmware_pack.c
+PACK_MAGIC = b'TFWPACK\0'
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct('<8sIIIIII')
+PACK_ENTRY = struct.Struct('<32sIIII')
+PACK_ALIGNMENT = 4096
+PACK_KINDS = {'spl': 0, 'uboot': 1}
+
+# Pre-formatted byte literals for bytes_to_c_array
+HEX_BYTES = [f'0x{b:02x}' for b in range(256)]
 
 def read_binary(filepath):
     """Read binary file and return bytes"""
     with open(filepath, 'rb') as f:
         return f.read()
 
-def bytes_to_c_array(data, name, bytes_per_line=12):
+def bytes_to_c_array(data, name, bytes_per_line=12, storage="static "):
     """Convert bytes to C array initialization"""
     lines = []
-    lines.append(f"static const uint8_t {name}[] = {{")
+    lines.append(f"{storage}const uint8_t {name}[] = {{")
     
     for i in range(0, len(data), bytes_per_line):
-        chunk = data[i:i+bytes_per_line]
-        hex_values = ', '.join(f'0x{b:02x}' for b in chunk)
+        hex_values = ', '.join(map(HEX_BYTES.__getitem__, data[i:i+bytes_per_line]))
         lines.append(f"    {hex_values},")
     
     lines.append("};")
     return '\n'.join(lines)
 
-def generate_processor_file(proc_name, spl_data, uboot_data, output_dir):
-    """Generate a single processor firmware C file"""
+def incbin_header(output_dir):
+    """Write firmware_incbin.h: #embed / .incbin helpers for --emit incbin"""
+    header = output_dir / "firmware_incbin.h"
+    write_if_changed(header, """/**
+ * Raw Firmware Blob Embedding - Auto-generated
+ * DO NOT EDIT
+ *
+ * FIRMWARE_INCBIN(name, path) defines const uint8_t name[] from a binary file
+ * with an assembler .incbin directive; FIRMWARE_BLOB_SIZE(name) is its size.
+ * Compilers with C23 #embed use plain arrays instead (see firmware_*.c).
+ */
+
+#ifndef FIRMWARE_INCBIN_H
+#define FIRMWARE_INCBIN_H
+
+#include <stdint.h>
+#include <stddef.h>
+
+#if defined(__has_embed)
+#define FIRMWARE_BLOB_SIZE(name) sizeof(name)
+#else
+
+#if defined(__APPLE__)
+#define FIRMWARE_RODATA ".const_data"
+#define FIRMWARE_SYMBOL(name) "_" #name
+#elif defined(_WIN32)
+#define FIRMWARE_RODATA ".section .rdata,\\"dr\\""
+#define FIRMWARE_SYMBOL(name) #name
+#else
+#define FIRMWARE_RODATA ".section .rodata"
+#define FIRMWARE_SYMBOL(name) #name
+#endif
+
+#define FIRMWARE_INCBIN(name, path) \\
+    __asm__(FIRMWARE_RODATA "\\n" \\
+            ".balign 16\\n" \\
+            ".globl " FIRMWARE_SYMBOL(name) "\\n" \\
+            FIRMWARE_SYMBOL(name) ":\\n" \\
+            ".incbin \\"" path "\\"\\n" \\
+            ".globl " FIRMWARE_SYMBOL(name##_end) "\\n" \\
+            FIRMWARE_SYMBOL(name##_end) ":\\n" \\
+            ".previous\\n"); \\
+    extern const uint8_t name[]; \\
+    extern const uint8_t name##_end[]
+
+#define FIRMWARE_BLOB_SIZE(name) ((size_t)(name##_end - name))
+#endif
+
+#endif // FIRMWARE_INCBIN_H
+""")
+    return header
+
+def blob_definition(name, data, blob_path, rel_path, storage="static "):
+    """C definition of one firmware blob for --emit incbin"""
+    return f"""#if defined(__has_embed)
+{storage}const uint8_t {name}[] = {{
+#embed "{rel_path}"
+}};
+#else
+FIRMWARE_INCBIN({name}, "{blob_path}");
+#endif"""
+
+def inflate_sources(output_dir):
+    """Write firmware_inflate.h/.c: the shared decompressor for --compress zlib"""
+    write_if_changed(output_dir / "firmware_inflate.h", """/**
+ * Compressed Firmware Support - Auto-generated
+ * DO NOT EDIT
+ */
+
+#ifndef FIRMWARE_INFLATE_H
+#define FIRMWARE_INFLATE_H
+
+#include <stdint.h>
+#include <stddef.h>
+
+/**
+ * Decompress a zlib stream of exactly size bytes into a new heap buffer.
+ * Returns NULL on allocation or stream errors.
+ */
+uint8_t* firmware_inflate(const uint8_t *data, size_t data_size, size_t size);
+
+/**
+ * Run-once guard for lazily initialized data shared between threads.
+ * firmware_once_begin() returns 1 to exactly one caller, which initializes
+ * and then calls firmware_once_end(); every other caller waits until that
+ * is done and gets 0. state must start out zero.
+ */
+int firmware_once_begin(int *state);
+void firmware_once_end(int *state);
+
+#endif // FIRMWARE_INFLATE_H
+""")
+
+    write_if_changed(output_dir / "firmware_inflate.c", """/**
+ * Compressed Firmware Support - Auto-generated
+ * DO NOT EDIT
+ */
+
+#include "firmware_inflate.h"
+#include <stdlib.h>
+#include <zlib.h>
+
+uint8_t* firmware_inflate(const uint8_t *data, size_t data_size, size_t size) {
+    uint8_t *buffer = malloc(size);
+    if (!buffer) return NULL;
 
+    uLongf out_size = size;
+    if (uncompress(buffer, &out_size, data, data_size) != Z_OK || out_size != size) {
+        free(buffer);
+        return NULL;
+    }
+    return buffer;
+}
+
+enum { FIRMWARE_ONCE_NEW, FIRMWARE_ONCE_BUSY, FIRMWARE_ONCE_DONE };
+
+int firmware_once_begin(int *state) {
+    if (__atomic_load_n(state, __ATOMIC_ACQUIRE) == FIRMWARE_ONCE_DONE) return 0;
+
+    int expected = FIRMWARE_ONCE_NEW;
+    if (__atomic_compare_exchange_n(state, &expected, FIRMWARE_ONCE_BUSY, 0,
+                                    __ATOMIC_ACQUIRE, __ATOMIC_ACQUIRE)) {
+        return 1;
+    }
+
+    // Another thread is initializing; inflating takes a few milliseconds at most
+    while (__atomic_load_n(state, __ATOMIC_ACQUIRE) != FIRMWARE_ONCE_DONE) {
+    }
+    return 0;
+}
+
+void firmware_once_end(int *state) {
+    __atomic_store_n(state, FIRMWARE_ONCE_DONE, __ATOMIC_RELEASE);
+}
+""")
+
+def write_if_changed(path, text):
+    """Write text to path unless it already has that content; returns True if written"""
+    try:
+        if path.read_text() == text:
+            return False
+    except OSError:
+        pass
+    path.write_text(text)
+    return True
+
+def remove_stale(output_dir, names):
+    """Remove support files left over from a different generator mode"""
+    for name in names:
+        path = output_dir / name
+        if path.exists():
+            path.unlink()
+
+def inflate_time(stored):
+    """Best-of-3 time to decompress a blob, a stand-in for first access in C"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        zlib.decompress(stored)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def store_blob(data, compress):
+    """Bytes to embed for a blob and a comment describing them"""
+    if compress == 'zlib':
+        stored = zlib.compress(data, 9)
+        return stored, f"{len(data)} bytes, zlib {len(stored)} bytes"
+    return data, f"{len(data)} bytes"
+
+def blob_includes(emit, compress):
+    """#include lines needed by a file that defines blobs"""
+    includes = ""
+    if compress == 'zlib':
+        includes += '#include "firmware_inflate.h"\n'
+    if emit == 'incbin':
+        includes += '#include "firmware_incbin.h"\n'
+    return includes
+
+def write_blob(f, name, label, data, output_dir, emit, compress):
+    """
+    Write one blob's storage to f.
+
+    Returns (accessor body that serves the blob, stored size, first-access
+    latency estimate).
+    """
+    stored, note = store_blob(data, compress)
+    suffix = "_z" if compress == 'zlib' else ""
+
+    # Uncompressed blobs are global (firmware_<name>) so that firmware_database.c
+    # can point its static records straight at them
+    symbol = f"firmware_{name}{suffix}"
+    storage = "static " if compress == 'zlib' else ""
+
+    f.write(f"// {label} ({note})\n")
+    if emit == 'incbin':
+        blob_dir = output_dir / BLOB_DIR
+        blob_dir.mkdir(exist_ok=True)
+        blob_file = f"{name}.bin" + (".z" if compress == 'zlib' else "")
+        (blob_dir / blob_file).write_bytes(stored)
+        f.write(blob_definition(symbol, stored, (blob_dir / blob_file).resolve().as_posix(),
+                                f"{BLOB_DIR}/{blob_file}", storage))
+        size_expr = f"FIRMWARE_BLOB_SIZE({symbol})"
+    else:
+        f.write(bytes_to_c_array(stored, symbol, storage=storage))
+        size_expr = f"sizeof({symbol})"
+    f.write("\n\n")
+
+    if compress == 'zlib':
+        # Decompressed once on first access and kept for the process lifetime
+        f.write(f"static uint8_t *{name};\nstatic int {name}_once;\n\n")
+        body = f"""    if (firmware_once_begin(&{name}_once)) {{
+        {name} = firmware_inflate({symbol}, {size_expr}, {len(data)});
+        firmware_once_end(&{name}_once);
+    }}
+    if (size) *size = {name} ? {len(data)} : 0;
+    return {name};"""
+        return body, len(stored), inflate_time(stored)
+    body = f"""    if (size) *size = {size_expr};
+    return {symbol};"""
+    return body, len(stored), 0.0
+
+def blob_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+def generate_shared_file(shared, output_dir, emit='array', compress='none'):
+    """
+    Generate firmware_shared.c with the blobs used by several processors.
+
+    shared is a list of (name, users, data); each blob gets a
+    firmware_<name>_get() accessor that the processor accessors forward to.
+    Returns (path, {blob digest: [stored size, latency]}).
+    """
+    output_file = output_dir / "firmware_shared.c"
+    stats = {}
+
+    with open(output_file, 'w') as f:
+        f.write(f"""/**
+ * Shared Embedded Firmware - Auto-generated
+ * DO NOT EDIT
+ *
+ * Blobs that are byte-identical across processors, embedded once.
+ */
+
+#include <stdint.h>
+#include <stddef.h>
+{blob_includes(emit, compress)}
+""")
+        accessors = []
+        for name, users, data in shared:
+            body, stored, latency = write_blob(f, name, ', '.join(users), data,
+                                               output_dir, emit, compress)
+            stats[blob_digest(data)] = [stored, latency]
+            accessors.append(f"""const uint8_t* firmware_{name}_get(size_t *size) {{
+{body}
+}}
+""")
+        f.write("\n".join(accessors))
+
+    return output_file, stats
+
+def generate_processor_file(proc_name, spl_data, uboot_data, output_dir, emit='array', compress='none',
+                            shared=None):
+    """
+    Generate a single processor firmware C file.
+
+    shared maps 'spl'/'uboot' to the firmware_shared.c blob name for blobs
+    that are deduplicated; those accessors forward to the shared copy.
+    Returns (path, {blob digest: [stored size, latency]}) for the blobs
+    stored in this file.
+    """
+
+    shared = shared or {}
     proc_safe_name = proc_name.replace('-', '_').replace('.', '_')
     output_file = output_dir / f"firmware_{proc_safe_name}.c"
+    stats = {}
+
+    blobs = ((f"spl_{proc_safe_name}", "SPL", "spl", spl_data),
+             (f"uboot_{proc_safe_name}", "U-Boot", "uboot", uboot_data))
 
     with open(output_file, 'w') as f:
         f.write(f"""/**
@@ -44,36 +377,284 @@ def generate_processor_file(proc_name, spl_data, uboot_data, output_dir):
 
 #include <stdint.h>
 #include <stddef.h>
-
+""")
+        if len(shared) < len(blobs):
+            f.write(blob_includes(emit, compress))
+        f.write("\n")
+
+        accessors = []
+        for name, label, kind, data in blobs:
+            if kind in shared:
+                shared_get = f"firmware_{shared[kind]}_get"
+                f.write(f"// {proc_name} {label} ({len(data)} bytes, shared)\n")
+                f.write(f"const uint8_t* {shared_get}(size_t *size);\n\n")
+                body = f"    return {shared_get}(size);"
+            else:
+                body, stored, latency = write_blob(f, name, f"{proc_name} {label}", data,
+                                                   output_dir, emit, compress)
+                stats[blob_digest(data)] = [stored, latency]
+            accessors.append(f"""const uint8_t* firmware_{proc_safe_name}_get_{kind}(size_t *size) {{
+{body}
+}}
 """)
 
-        # Write SPL array
-        f.write(f"// {proc_name} SPL ({len(spl_data)} bytes)\n")
-        f.write(bytes_to_c_array(spl_data, f"spl_{proc_safe_name}"))
-        f.write("\n\n")
+        # Write accessor functions
+        f.write("\n".join(accessors))
+
+    return output_file, stats
+
+def generator_version():
+    """Hash of this script; any change to it invalidates the manifest"""
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+def file_key(*inputs):
+    """Manifest key of a generated file from everything its content depends on"""
+    return hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+
+def load_manifest(output_dir):
+    try:
+        with open(output_dir / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest.get('files'), dict) else {'files': {}}
+    except (OSError, ValueError, AttributeError):
+        return {'files': {}}
+
+def run_tasks(tasks, jobs):
+    """Run generator tasks {filename: (func, args)}, in a process pool when worthwhile"""
+    if jobs <= 1 or len(tasks) <= 1:
+        return {filename: func(*args)[1] for filename, (func, args) in tasks.items()}
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        futures = {filename: pool.submit(func, *args) for filename, (func, args) in tasks.items()}
+        return {filename: future.result()[1] for filename, future in futures.items()}
+
+def firmware_hash(name, seed):
+    """FNV-1a over the lowercased name, then a murmur3 finalizer (mirrors the C lookup)"""
+    h = (2166136261 ^ seed) & 0xFFFFFFFF
+    for c in name.encode('ascii').lower():
+        h = ((h ^ c) * 16777619) & 0xFFFFFFFF
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h
+
+def perfect_hash(names):
+    """
+    Minimal perfect hash by hash-and-displace.
+
+    Returns (seeds, slots): a name's slot is
+    firmware_hash(name, seeds[firmware_hash(name, 0) % n]) % n, and
+    slots[slot] is its index in names.
+    """
+    n = len(names)
+    buckets = [[] for _ in range(n)]
+    for index, name in enumerate(names):
+        buckets[firmware_hash(name, 0) % n].append(index)
+
+    seeds = [0] * n
+    slots = [None] * n
+    for bucket_index in sorted(range(n), key=lambda b: -len(buckets[b])):
+        bucket = buckets[bucket_index]
+        if not bucket:
+            break
+        for seed in range(1 << 16):
+            positions = [firmware_hash(names[index], seed) % n for index in bucket]
+            if len(set(positions)) == len(positions) and all(slots[p] is None for p in positions):
+                break
+        else:
+            raise ValueError(f"No perfect hash seed for {[names[i] for i in bucket]}")
+        seeds[bucket_index] = seed
+        for index, position in zip(bucket, positions):
+            slots[position] = index
+    return seeds, slots
+
+def c_table(values, per_line=12):
+    """Comma-separated values wrapped for a C initializer"""
+    return '\n'.join("    " + ', '.join(str(v) for v in values[i:i + per_line]) + ","
+                     for i in range(0, len(values), per_line))
+
+def database_source(processors, compress):
+    """
+    firmware_database.c: one static firmware_binary_t per processor and an
+    O(1) firmware_get() through a minimal perfect hash of the lowercased names.
+
+    Uncompressed records are const and point straight at the blob arrays;
+    compressed records are filled once per processor on first lookup.
+    """
+    names = [proc['name'] for proc in processors]
+    if len(set(name.lower() for name in names)) != len(names):
+        raise ValueError("Processor names must be unique ignoring case")
+    seeds, slots = perfect_hash(names)
+    seed_type = "uint8_t" if max(seeds) < 256 else "uint16_t"
+    slot_type = "uint8_t" if len(names) <= 256 else "uint16_t"
+
+    lines = [f"""/**
+ * Firmware Database Registry - Auto-generated
+ * DO NOT EDIT
+ */
+
+#include "firmware_database.h"
+#include "firmware_registry.h"
+{'#include "firmware_inflate.h"' + chr(10) if compress == 'zlib' else ''}#include <string.h>
+#include <strings.h>
 
-        # Write U-Boot array
-        f.write(f"// {proc_name} U-Boot ({len(uboot_data)} bytes)\n")
-        f.write(bytes_to_c_array(uboot_data, f"uboot_{proc_safe_name}"))
-        f.write("\n\n")
+#define FIRMWARE_COUNT {len(names)}
 
-        # Write accessor functions
-        f.write(f"""const uint8_t* firmware_{proc_safe_name}_get_spl(size_t *size) {{
-    if (size) *size = sizeof(spl_{proc_safe_name});
-    return spl_{proc_safe_name};
+"""]
+
+    if compress == 'zlib':
+        lines.append("// Accessors per record; compressed blobs are inflated on first use\n")
+        lines.append("typedef struct {\n")
+        lines.append("    const uint8_t* (*get_spl)(size_t *size);\n")
+        lines.append("    const uint8_t* (*get_uboot)(size_t *size);\n")
+        lines.append("} firmware_registry_entry_t;\n\n")
+        lines.append("static const firmware_registry_entry_t firmware_registry[FIRMWARE_COUNT] = {\n")
+        for proc in processors:
+            proc_safe_name = proc['name'].replace('-', '_').replace('.', '_')
+            lines.append(f"    {{firmware_{proc_safe_name}_get_spl, firmware_{proc_safe_name}_get_uboot}},\n")
+        lines.append("};\n\n")
+        lines.append("// One record per processor, sorted by name; filled once by firmware_record()\n")
+        lines.append("static firmware_binary_t firmware_records[FIRMWARE_COUNT] = {\n")
+        for proc in processors:
+            lines.append(f"    {{\"{proc['name']}\", NULL, 0, NULL, 0}},\n")
+        lines.append("};\n\n")
+        lines.append("static int firmware_records_once[FIRMWARE_COUNT];\n\n")
+    else:
+        lines.append("// One record per processor, sorted by name\n")
+        lines.append("static const firmware_binary_t firmware_records[FIRMWARE_COUNT] = {\n")
+        for proc in processors:
+            lines.append(f"    {{\"{proc['name']}\", {proc['spl_symbol']}, {len(proc['spl_data'])}, "
+                         f"{proc['uboot_symbol']}, {len(proc['uboot_data'])}}},\n")
+        lines.append("};\n\n")
+
+    lines.append(f"""// Minimal perfect hash of the lowercased names (hash-and-displace):
+// record = firmware_hash_slot[firmware_hash(name, firmware_hash_seed[firmware_hash(name, 0) % N]) % N]
+static const {seed_type} firmware_hash_seed[FIRMWARE_COUNT] = {{
+{c_table(seeds)}
+}};
+
+static const {slot_type} firmware_hash_slot[FIRMWARE_COUNT] = {{
+{c_table(slots)}
+}};
+
+static uint32_t firmware_hash(const char *name, uint32_t seed) {{
+    uint32_t h = 2166136261u ^ seed;
+    for (; *name; name++) {{
+        unsigned char c = (unsigned char)*name;
+        if (c >= 'A' && c <= 'Z') c += 'a' - 'A';
+        h = (h ^ c) * 16777619u;
+    }}
+    h ^= h >> 16;
+    h *= 0x85ebca6bu;
+    h ^= h >> 13;
+    h *= 0xc2b2ae35u;
+    h ^= h >> 16;
+    return h;
 }}
 
-const uint8_t* firmware_{proc_safe_name}_get_uboot(size_t *size) {{
-    if (size) *size = sizeof(uboot_{proc_safe_name});
-    return uboot_{proc_safe_name};
+static int firmware_index(const char *processor) {{
+    if (!processor) return -1;
+
+    uint32_t seed = firmware_hash_seed[firmware_hash(processor, 0) % FIRMWARE_COUNT];
+    int index = firmware_hash_slot[firmware_hash(processor, seed) % FIRMWARE_COUNT];
+    return strcasecmp(firmware_records[index].processor, processor) == 0 ? index : -1;
 }}
+
 """)
 
-    return output_file
+    if compress == 'zlib':
+        lines.append("""static const firmware_binary_t* firmware_record(int index) {
+    firmware_binary_t *record = &firmware_records[index];
+
+    if (firmware_once_begin(&firmware_records_once[index])) {
+        record->spl_data = firmware_registry[index].get_spl(&record->spl_size);
+        record->uboot_data = firmware_registry[index].get_uboot(&record->uboot_size);
+        firmware_once_end(&firmware_records_once[index]);
+    }
+
+    // Compressed accessors return NULL when inflating fails
+    return record->spl_data && record->uboot_data ? record : NULL;
+}
 
-def generate_firmware_database(firmwares_dir, output_dir):
+const firmware_binary_t* firmware_get(const char *processor) {
+    int index = firmware_index(processor);
+    return index < 0 ? NULL : firmware_record(index);
+}
+
+const firmware_binary_t* firmware_list(size_t *count) {
+    if (count) *count = FIRMWARE_COUNT;
+
+    for (int i = 0; i < FIRMWARE_COUNT; i++) {
+        firmware_record(i);
+    }
+    return firmware_records;
+}
+""")
+    else:
+        lines.append("""const firmware_binary_t* firmware_get(const char *processor) {
+    int index = firmware_index(processor);
+    return index < 0 ? NULL : &firmware_records[index];
+}
+
+const firmware_binary_t* firmware_list(size_t *count) {
+    if (count) *count = FIRMWARE_COUNT;
+    return firmware_records;
+}
+""")
+
+    lines.append("""
+int firmware_available(const char *processor) {
+    return firmware_get(processor) != NULL;
+}
+""")
+    return ''.join(lines)
+
+def write_pack(path, processors):
+    """Write the firmware pack for processors (atomically), returns its size"""
+    entries = sorted(((proc['name'].lower(), PACK_KINDS[kind], proc[f'{kind}_digest'], proc[f'{kind}_data'])
+                      for proc in processors for kind in ('spl', 'uboot')), key=lambda e: (e[0], e[1]))
+    for name, *_ in entries:
+        if len(name.encode('ascii')) >= 32:
+            raise ValueError(f"Processor name too long for the pack: {name}")
+
+    # Blobs after the index, page aligned, identical ones stored once
+    offsets = {}
+    blobs = []
+    position = PACK_HEADER.size + len(entries) * PACK_ENTRY.size
+    for _, _, digest, data in entries:
+        if digest not in offsets:
+            position = -(-position // PACK_ALIGNMENT) * PACK_ALIGNMENT
+            offsets[digest] = position
+            blobs.append((position, data))
+            position += len(data)
+
+    index = b''.join(PACK_ENTRY.pack(name.encode('ascii'), kind, offsets[digest], len(data),
+                                     zlib.crc32(data) & 0xFFFFFFFF)
+                     for name, kind, digest, data in entries)
+    header = PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(entries), PACK_ENTRY.size,
+                              zlib.crc32(index) & 0xFFFFFFFF, PACK_ALIGNMENT, 0)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(header + index)
+        for offset, data in blobs:
+            f.seek(offset)
+            f.write(data)
+        # Pad the last blob to the alignment so the whole file maps in pages
+        f.truncate(-(-position // PACK_ALIGNMENT) * PACK_ALIGNMENT)
+    # Replace rather than overwrite, a running cloner may have the old pack mapped
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+def generate_firmware_database(firmwares_dir, output_dir, emit='array', compress='none',
+                               embed_all=False, jobs=1, force=False, pack_path=None, pack_only=False):
     """Generate firmware database with separate files per processor"""
 
+    start_time = time.perf_counter()
+
     firmwares_path = Path(firmwares_dir)
     output_path = Path(output_dir)
 
@@ -100,7 +681,7 @@ def generate_firmware_database(firmwares_dir, output_dir):
             continue
 
         # Only include processors in our embedded list
-        if proc_dir.name not in EMBEDDED_PROCESSORS:
+        if not embed_all and proc_dir.name not in EMBEDDED_PROCESSORS:
             continue
 
         spl_file = proc_dir / "spl.bin"
@@ -113,23 +694,118 @@ def generate_firmware_database(firmwares_dir, output_dir):
                 'uboot_path': uboot_file
             })
 
-    print(f"Found {len(processors)} processors with firmware binaries (embedded subset)")
+    print(f"Found {len(processors)} processors with firmware binaries "
+          f"({'all' if embed_all else 'embedded subset'})")
 
-    # Generate individual processor files
-    generated_files = []
+    # Group identical blobs by content hash
+    blob_users = {}
     for proc in processors:
-        spl_data = read_binary(proc['spl_path'])
-        uboot_data = read_binary(proc['uboot_path'])
+        proc['spl_data'] = read_binary(proc['spl_path'])
+        proc['uboot_data'] = read_binary(proc['uboot_path'])
+        for kind in ('spl', 'uboot'):
+            digest = blob_digest(proc[f'{kind}_data'])
+            blob_users.setdefault(digest, []).append((proc['name'], kind))
+            proc[f'{kind}_digest'] = digest
+
+    if pack_path:
+        pack_size = write_pack(Path(pack_path), processors)
+        unique = len(set(proc[f'{kind}_digest'] for proc in processors for kind in ('spl', 'uboot')))
+        print(f"Generated pack: {pack_path} ({pack_size} bytes, {2 * len(processors)} entries, "
+              f"{unique} unique blobs)")
+        if pack_only:
+            return 0
+
+    # Support files for the emission/compression mode; small, rewritten only on change
+    if emit == 'incbin':
+        incbin_header(output_path)
+    else:
+        remove_stale(output_path, ["firmware_incbin.h"])
+    if compress == 'zlib':
+        inflate_sources(output_path)
+    else:
+        remove_stale(output_path, ["firmware_inflate.h", "firmware_inflate.c"])
+
+    # Blobs used by several processors go to firmware_shared.c, named after the first user
+    shared_names = {}
+    shared = []
+    for digest, users in blob_users.items():
+        if len(users) > 1:
+            first_proc, first_kind = users[0]
+            name = f"shared_{first_kind}_{first_proc.replace('-', '_').replace('.', '_')}"
+            shared_names[digest] = name
+            proc = next(p for p in processors if p['name'] == first_proc)
+            shared.append((name, [f"{user} {kind}" for user, kind in users], proc[f'{first_kind}_data']))
+
+    # Every large generated file keyed by the generator, the mode and its input hashes;
+    # files whose key matches the manifest are left untouched
+    version = generator_version()
+    mode = [emit, compress, str(output_path.resolve()) if emit == 'incbin' else None]
+    manifest = {} if force else load_manifest(output_path)['files']
+    entries = {}
+    tasks = {}
+
+    if shared:
+        key = file_key(version, mode, [[name, users, blob_digest(data)] for name, users, data in shared])
+        entries["firmware_shared.c"] = {'key': key}
+        tasks["firmware_shared.c"] = (generate_shared_file, (shared, output_path, emit, compress))
 
-        print(f"  {proc['name']}: SPL={len(spl_data)} bytes, U-Boot={len(uboot_data)} bytes")
-
-        proc_file = generate_processor_file(proc['name'], spl_data, uboot_data, output_path)
-        generated_files.append(proc_file)
+    for proc in processors:
+        proc_safe_name = proc['name'].replace('-', '_').replace('.', '_')
+        proc_shared = {kind: shared_names[proc[f'{kind}_digest']] for kind in ('spl', 'uboot')
+                       if proc[f'{kind}_digest'] in shared_names}
+        filename = f"firmware_{proc_safe_name}.c"
+        key = file_key(version, mode, proc['name'], proc['spl_digest'], proc['uboot_digest'], proc_shared)
+        entries[filename] = {'key': key}
+        tasks[filename] = (generate_processor_file, (proc['name'], proc['spl_data'], proc['uboot_data'],
+                                                     output_path, emit, compress, proc_shared))
+
+    for filename, entry in entries.items():
+        previous = manifest.get(filename)
+        if previous and previous.get('key') == entry['key'] and (output_path / filename).exists():
+            entry['blobs'] = previous.get('blobs', {})
+            del tasks[filename]
+
+    for filename, blobs in run_tasks(tasks, jobs).items():
+        entries[filename]['blobs'] = blobs
+
+    # Files from an earlier run that are no longer generated (dropped processors)
+    remove_stale(output_path, [filename for filename in manifest if filename not in entries])
+
+    # Stored size and first-access latency of every unique blob
+    blob_stats = {}
+    for entry in entries.values():
+        blob_stats.update(entry['blobs'])
+
+    latencies = []
+    for proc in processors:
+        proc_safe_name = proc['name'].replace('-', '_').replace('.', '_')
+        status = "regenerated" if f"firmware_{proc_safe_name}.c" in tasks else "unchanged"
+        if compress == 'zlib':
+            # firmware_get() inflates both blobs on the first lookup
+            latency = sum(blob_stats[proc[f'{kind}_digest']][1] for kind in ('spl', 'uboot'))
+            latencies.append((latency, proc['name']))
+            print(f"  {proc['name']}: SPL={len(proc['spl_data'])} bytes, U-Boot={len(proc['uboot_data'])} bytes, "
+                  f"first access ~{latency * 1000:.2f} ms ({status})")
+        else:
+            print(f"  {proc['name']}: SPL={len(proc['spl_data'])} bytes, "
+                  f"U-Boot={len(proc['uboot_data'])} bytes ({status})")
+
+    raw_total = sum(len(proc['spl_data']) + len(proc['uboot_data']) for proc in processors)
+    unique_sizes = {proc[f'{kind}_digest']: len(proc[f'{kind}_data'])
+                    for proc in processors for kind in ('spl', 'uboot')}
+    unique_total = sum(unique_sizes.values())
+    stored_total = sum(blob_stats[digest][0] for digest in unique_sizes)
+
+    # Storage symbol behind each processor blob (the shared copy for deduplicated ones)
+    for proc in processors:
+        proc_safe_name = proc['name'].replace('-', '_').replace('.', '_')
+        for kind in ('spl', 'uboot'):
+            name = shared_names.get(proc[f'{kind}_digest'], f"{kind}_{proc_safe_name}")
+            proc[f'{kind}_symbol'] = f"firmware_{name}"
 
     # Generate registry header file
     registry_header = output_path / "firmware_registry.h"
-    with open(registry_header, 'w') as f:
-        f.write("""/**
+    lines = ["""/**
  * Firmware Registry - Auto-generated
  * DO NOT EDIT
  */
@@ -140,103 +816,82 @@ def generate_firmware_database(firmwares_dir, output_dir):
 #include <stdint.h>
 #include <stddef.h>
 
-""")
+"""]
 
-        # Declare external functions for each processor
-        for proc in processors:
-            proc_safe_name = proc['name'].replace('-', '_').replace('.', '_')
-            f.write(f"const uint8_t* firmware_{proc_safe_name}_get_spl(size_t *size);\n")
-            f.write(f"const uint8_t* firmware_{proc_safe_name}_get_uboot(size_t *size);\n")
+    # Declare external functions for each processor
+    for proc in processors:
+        proc_safe_name = proc['name'].replace('-', '_').replace('.', '_')
+        lines.append(f"const uint8_t* firmware_{proc_safe_name}_get_spl(size_t *size);\n")
+        lines.append(f"const uint8_t* firmware_{proc_safe_name}_get_uboot(size_t *size);\n")
+
+    if compress != 'zlib':
+        # Blob arrays referenced by the static records in firmware_database.c
+        lines.append("\n")
+        symbols = dict.fromkeys(proc[f'{kind}_symbol'] for proc in processors for kind in ('spl', 'uboot'))
+        for symbol in symbols:
+            lines.append(f"extern const uint8_t {symbol}[];\n")
 
-        f.write("\n#endif // FIRMWARE_REGISTRY_H\n")
+    lines.append("\n#endif // FIRMWARE_REGISTRY_H\n")
+    write_if_changed(registry_header, ''.join(lines))
 
     # Generate registry implementation
     registry_impl = output_path / "firmware_database.c"
-    with open(registry_impl, 'w') as f:
-        f.write("""/**
- * Firmware Database Registry - Auto-generated
- * DO NOT EDIT
- */
-
-#include "firmware_database.h"
-#include "firmware_registry.h"
-#include <string.h>
-#include <strings.h>
-#include <stdlib.h>
+    write_if_changed(registry_impl, database_source(processors, compress))
 
-""")
+    write_if_changed(output_path / MANIFEST_NAME,
+                     json.dumps({'generator': version, 'files': entries}, indent=2, sort_keys=True) + "\n")
 
-        # Generate firmware table with function pointers
-        f.write("// Firmware registry table\n")
-        f.write("typedef struct {\n")
-        f.write("    const char *processor;\n")
-        f.write("    const uint8_t* (*get_spl)(size_t *size);\n")
-        f.write("    const uint8_t* (*get_uboot)(size_t *size);\n")
-        f.write("} firmware_registry_entry_t;\n\n")
-
-        f.write("static const firmware_registry_entry_t firmware_registry[] = {\n")
-        for proc in processors:
-            proc_safe_name = proc['name'].replace('-', '_').replace('.', '_')
-            f.write(f"    {{\"{proc['name']}\", firmware_{proc_safe_name}_get_spl, firmware_{proc_safe_name}_get_uboot}},\n")
-        f.write("};\n\n")
-
-        # Generate lookup functions
-        f.write("""const firmware_binary_t* firmware_get(const char *processor) {
-    if (!processor) return NULL;
-
-    static firmware_binary_t result;
-
-    for (size_t i = 0; i < sizeof(firmware_registry) / sizeof(firmware_registry[0]); i++) {
-        if (strcasecmp(firmware_registry[i].processor, processor) == 0) {
-            result.processor = firmware_registry[i].processor;
-            result.spl_data = firmware_registry[i].get_spl(&result.spl_size);
-            result.uboot_data = firmware_registry[i].get_uboot(&result.uboot_size);
-            return &result;
-        }
-    }
-
-    return NULL;
-}
-
-const firmware_binary_t* firmware_list(size_t *count) {
-    if (count) {
-        *count = sizeof(firmware_registry) / sizeof(firmware_registry[0]);
-    }
-
-    // Build array of firmware_binary_t on first call
-    static firmware_binary_t *list = NULL;
-    static size_t list_size = 0;
-
-    if (!list) {
-        list_size = sizeof(firmware_registry) / sizeof(firmware_registry[0]);
-        list = malloc(list_size * sizeof(firmware_binary_t));
-
-        for (size_t i = 0; i < list_size; i++) {
-            list[i].processor = firmware_registry[i].processor;
-            list[i].spl_data = firmware_registry[i].get_spl(&list[i].spl_size);
-            list[i].uboot_data = firmware_registry[i].get_uboot(&list[i].uboot_size);
-        }
-    }
-
-    return list;
-}
-
-int firmware_available(const char *processor) {
-    return firmware_get(processor) != NULL;
-}
-""")
-
-    print(f"\nGenerated {len(generated_files)} processor files in: {output_path}")
+    print(f"\nGenerated {len(processors)} processor files in: {output_path}")
     print(f"Generated registry: {registry_header}")
     print(f"Generated database: {registry_impl}")
+    if shared:
+        print(f"Generated shared blobs: {output_path / 'firmware_shared.c'}")
+    workers = min(jobs, len(tasks)) if jobs > 1 and len(tasks) > 1 else 1
+    print(f"Regenerated {len(tasks)} of {len(entries)} firmware files "
+          f"({len(entries) - len(tasks)} unchanged, {workers} worker{'s' if workers > 1 else ''})")
     print(f"Total processors: {len(processors)}")
+    saved = raw_total - unique_total
+    print(f"Deduplication: {len(unique_sizes)} unique of {2 * len(processors)} blobs, "
+          f"{len(shared)} shared, saved {saved} bytes ({100.0 * saved / raw_total:.1f}%)")
+    for name, users, data in shared:
+        print(f"  {len(data):8d} bytes x{len(users)}: {', '.join(users)}")
+    if compress == 'zlib':
+        print(f"Embedded size: {stored_total} bytes zlib vs {unique_total} bytes raw "
+              f"({100.0 * stored_total / unique_total:.1f}%)")
+        slowest, slowest_name = max(latencies)
+        print(f"First-access latency (zlib inflate, per processor): "
+              f"mean {1000 * sum(l for l, _ in latencies) / len(latencies):.2f} ms, "
+              f"max {slowest * 1000:.2f} ms ({slowest_name}); later accesses are free")
+    else:
+        print(f"Embedded size: {stored_total} bytes")
+    print(f"Emission mode: {emit}, compression: {compress} ({time.perf_counter() - start_time:.2f}s)")
     return 0
 
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
-        print("Usage: generate_firmware_database.py <firmwares_dir> <output_dir>")
-        print("Example: generate_firmware_database.py references/cloner-2.5.43-ubuntu_thingino/firmwares src/firmware")
-        sys.exit(1)
-
-    sys.exit(generate_firmware_database(sys.argv[1], sys.argv[2]))
-
+    parser = argparse.ArgumentParser(
+        description='Generate the embedded firmware database C sources',
+        epilog='Example: generate_firmware_database.py references/cloner-2.5.43-ubuntu_thingino/firmwares src/firmware'
+    )
+    parser.add_argument('firmwares_dir', help='Cloner firmwares directory (<processor>/spl.bin, uboot.bin)')
+    parser.add_argument('output_dir', help='Output directory for firmware_*.c and the registry')
+    parser.add_argument('--emit', choices=EMIT_MODES, default='array',
+                        help='Blob emission: hex arrays (default) or raw files via #embed/.incbin')
+    parser.add_argument('--compress', choices=COMPRESS_MODES, default='none',
+                        help='Store blobs zlib-compressed and inflate them on first access')
+    parser.add_argument('--all', action='store_true', dest='embed_all',
+                        help='Embed every processor directory, not just EMBEDDED_PROCESSORS')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes for regenerating changed files (default: CPU count)')
+    parser.add_argument('--force', action='store_true',
+                        help='Regenerate every file, ignoring the manifest')
+    parser.add_argument('--pack', metavar='PATH',
+                        help='Also write a memory-mappable firmware pack (see src/firmware/firmware_pack.h)')
+    parser.add_argument('--pack-only', action='store_true',
+                        help='Only write the --pack file, leave the C sources alone')
+
+    args = parser.parse_args()
+    if args.pack_only and not args.pack:
+        parser.error('--pack-only requires --pack PATH')
+    sys.exit(generate_firmware_database(args.firmwares_dir, args.output_dir, args.emit,
+                                        args.compress, args.embed_all, args.jobs, args.force,
+                                        args.pack, args.pack_only))
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Synthetic usbmon Capture Generator for Ingenic Cloner
+
+Writes a pcap or pcapng usbmon capture (LINKTYPE_USB_LINUX_MMAPPED) of a
+complete cloner session, following the sequences in src/bootstrap.c and
+src/firmware/writer.c:
+
+- GET_CPU_INFO in bootrom stage
+- DDR binary (FIDB/RDD, built by references/ddr_compiler_final.py) to 0x80001000
+- SPL to 0x80001800, d2i_len and PROG_STAGE1, then the SPL wait
+- U-Boot to 0x80100000, FLUSH_CACHE, PROG_STAGE2, GET_CPU_INFO in firmware stage
+- FW_HANDSHAKE, flash base/length and erase status polls (VR_FW_READ_STATUS2)
+- Per chunk: 40-byte VR_WRITE handshake with the inverted CRC32, bulk OUT chunk
+  at the platform chunk size (T31 128KB, T41 64KB, A1 1MB), per-chunk status
+  and bulk IN log drain
+
+The flash image is the source image (tiled or truncated to --size), or seeded
+pseudo-random data when no image is given. The seed also drives timing jitter,
+device/bus numbers and log messages, so the same arguments always produce the
+same capture byte for byte. Records are streamed, so multi-GB captures need no
+more memory than one chunk.
+
+read_transfers() decodes usbmon captures back into USBTransfers without
+tshark, for benchmarks and tests of the analyzers.
+
+Usage:
+    python3 generate_usbmon_capture.py <output.pcap> [image.bin] [--platform t31]
+                                       [--size 64M] [--seed 1] [--format pcapng]
+"""
+
+import sys
+import time
+import zlib
+import random
+import struct
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'references'))
+
+from analyze_usb_capture import USBTransfer
+from ddr_compiler_final import DDRConfig, DDRParamConverter, BinaryBuilder, select_encoder
+
+DEFAULT_FIRMWARES = ROOT / 'references' / 'cloner-2.5.43-ubuntu_thingino' / 'firmwares'
+DEFAULT_DDR_CFG = (ROOT / 'references' / 'cloner-2.5.43-ubuntu_thingino' / 'ddrs' /
+                   'DDR2' / 'DDR2_W975116NG18I.cfg')
+
+# Vendor requests (see analyze_usb_capture.VendorRequest)
+VR_GET_CPU_INFO = 0x00
+VR_SET_DATA_ADDR = 0x01
+VR_SET_DATA_LEN = 0x02
+VR_FLUSH_CACHE = 0x03
+VR_PROG_STAGE1 = 0x04
+VR_PROG_STAGE2 = 0x05
+VR_FW_READ = 0x10
+VR_FW_HANDSHAKE = 0x11
+VR_WRITE = 0x12
+VR_FW_READ_STATUS2 = 0x19
+
+REQUEST_TYPE_OUT = 0x40
+REQUEST_TYPE_VENDOR = 0xC0
+ENDPOINT_OUT = 0x01
+ENDPOINT_IN = 0x81
+
+DDR_ADDRESS = 0x80001000
+SPL_ADDRESS = 0x80001800
+UBOOT_ADDRESS = 0x80100000
+FLASH_BASE_ADDRESS = 0x00008010
+
+# Per-platform session parameters (src/bootstrap.c, src/firmware/writer.c, handshake.c).
+# ddr_compiler_final has no A1 platform config, so A1 sessions upload a T31 DDR binary.
+PLATFORMS = {
+    't31': {
+        'firmware': 't31x', 'ddr_platform': 't31', 'chunk_size': 128 * 1024,
+        'bootrom_magic': b'T31V', 'firmware_magic': b'BOOT47XX',
+        'trailer': bytes.fromhex('20FB0008A2770000'),
+        'spl_wait_ms': 2000, 'erase_min_ms': 5000, 'fw_read_per_chunk': False,
+    },
+    't41': {
+        'firmware': 't41', 'ddr_platform': 't41', 'chunk_size': 64 * 1024,
+        'bootrom_magic': b'T41', 'firmware_magic': b'X2580',
+        'trailer': bytes.fromhex('F0170044707A0000'),
+        'spl_wait_ms': 1100, 'erase_min_ms': 5000, 'fw_read_per_chunk': True,
+    },
+    'a1': {
+        'firmware': 'a1_n_ne_x', 'ddr_platform': 't31', 'chunk_size': 1024 * 1024,
+        'bootrom_magic': b'T31VX', 'firmware_magic': b'A1',
+        'trailer': bytes.fromhex('302400D402750000'),
+        'spl_wait_ms': 2000, 'erase_min_ms': 60000, 'fw_read_per_chunk': False,
+    },
+}
+
+# Linux usbmon mmapped header (64 bytes, host byte order)
+USBMON_HEADER = struct.Struct('<QBBBBHbbqiiII8siiII')
+SETUP = struct.Struct('<BBHHH')
+XFER_CONTROL = 2
+XFER_BULK = 3
+TRANSFER_TYPES = {1: 'INTERRUPT', XFER_CONTROL: 'CONTROL', XFER_BULK: 'BULK'}
+EINPROGRESS = -115
+ENOENT = -2
+NO_SETUP = ord('-')
+LINKTYPE_USB_LINUX_MMAPPED = 220
+
+# Simulated bus timing: high-speed bulk throughput and control round trip
+BULK_BYTES_PER_US = 35
+CONTROL_US = 150
+
+LOG_MESSAGES = (
+    b'nor write ok\n',
+    b'sfc nor write finish\n',
+    b'crc check pass\n',
+    b'erase done, program start\n',
+)
+
+def parse_size(text: str) -> int:
+    """Byte count with an optional K/M/G suffix (binary units)"""
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text, 0)
+
+def write_handshake(chunk: bytes, offset: int, platform: str) -> bytes:
+    """40-byte VR_WRITE handshake (firmware_handshake_write_chunk[_a1] layout)"""
+    params = PLATFORMS[platform]
+    crc_inv = ~zlib.crc32(chunk) & 0xFFFFFFFF
+    handshake = bytearray(40)
+    if platform == 'a1':
+        struct.pack_into('<IIII', handshake, 8, 0x00060000, offset, len(chunk), crc_inv)
+    else:
+        struct.pack_into('<H', handshake, 10, (offset >> 16) & 0xFFFF)
+        struct.pack_into('<H', handshake, 18, (len(chunk) + 0xFFFF) >> 16)
+        struct.pack_into('<II', handshake, 24, 0x00060000, crc_inv)
+    handshake[32:40] = params['trailer']
+    return bytes(handshake)
+
+def build_ddr_binary(cfg_file: Path, platform: str) -> bytes:
+    """324-byte FIDB/RDD binary at the platform default DDR frequency"""
+    config = DDRConfig(cfg_file, verbose=False)
+    builder = BinaryBuilder(PLATFORMS[platform]['ddr_platform'])
+    freq = builder.config['ddr_freq']
+    timing = select_encoder(config, DDRParamConverter(freq, verbose=False), verbose=False).encode_timing_params()
+    return builder.build(config, timing, freq)
+
+class PcapWriter:
+    """Classic pcap, microsecond timestamps"""
+
+    def __init__(self, f, snaplen: int):
+        self.f = f
+        f.write(struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, snaplen, LINKTYPE_USB_LINUX_MMAPPED))
+
+    def write(self, ts_us: int, header: bytes, data: bytes):
+        length = len(header) + len(data)
+        self.f.write(struct.pack('<IIII', ts_us // 1000000, ts_us % 1000000, length, length))
+        self.f.write(header)
+        self.f.write(data)
+
+class PcapngWriter:
+    """pcapng with one usbmon interface (default microsecond resolution)"""
+
+    def __init__(self, f, snaplen: int):
+        self.f = f
+        shb = struct.pack('<IHHq', 0x1A2B3C4D, 1, 0, -1)
+        self._block(0x0A0D0D0A, shb)
+        self._block(0x00000001, struct.pack('<HHI', LINKTYPE_USB_LINUX_MMAPPED, 0, snaplen))
+
+    def _block(self, block_type: int, body: bytes, tail: bytes = b''):
+        padding = -(len(body) + len(tail)) % 4
+        total = 12 + len(body) + len(tail) + padding
+        self.f.write(struct.pack('<II', block_type, total))
+        self.f.write(body)
+        self.f.write(tail)
+        self.f.write(b'\x00' * padding + struct.pack('<I', total))
+
+    def write(self, ts_us: int, header: bytes, data: bytes):
+        length = len(header) + len(data)
+        epb = struct.pack('<IIIII', 0, ts_us >> 32, ts_us & 0xFFFFFFFF, length, length) + header
+        self._block(0x00000006, epb, data)
+
+class SessionWriter:
+    """Emits submit/complete usbmon record pairs on a simulated clock"""
+
+    def __init__(self, writer, rng: random.Random, start_us: int):
+        self.writer = writer
+        self.rng = rng
+        self.clock = start_us
+        self.busnum = rng.randint(1, 4)
+        self.devnum = rng.randint(2, 127)
+        self.urb_id = 0xFFFF880000000000 | (rng.getrandbits(24) << 8)
+        self.packets = 0
+        self.transfers = 0
+
+    def _record(self, ts_us, urb_id, kind, xfer_type, epnum, setup, status, length, data, flag_data):
+        header = USBMON_HEADER.pack(
+            urb_id, ord(kind), xfer_type, epnum, self.devnum, self.busnum,
+            0 if setup else NO_SETUP, flag_data,
+            ts_us // 1000000, ts_us % 1000000, status, length, len(data),
+            setup or b'\x00' * 8, 0, 0, 0, 0)
+        self.writer.write(ts_us, header, data)
+        self.packets += 1
+
+    def _urb(self, xfer_type, epnum, setup, length, out_data, in_data, duration_us, status=0):
+        """One URB: submit carries OUT data, completion carries IN data"""
+        self.urb_id = (self.urb_id + 0x40) & 0xFFFFFFFFFFFFFFFF
+        is_in = bool(epnum & 0x80)
+        submit = self.clock
+        self.clock += duration_us + self.rng.randint(0, duration_us // 4 + 10)
+        self._record(submit, self.urb_id, 'S', xfer_type, epnum, setup, EINPROGRESS, length,
+                     out_data, ord('<') if is_in else 0)
+        actual = len(in_data) if is_in else (length if status == 0 else 0)
+        self._record(self.clock, self.urb_id, 'C', xfer_type, epnum, None, status, actual,
+                     in_data, 0 if in_data else ord('>'))
+        self.clock += self.rng.randint(20, 80)
+        self.transfers += 1
+
+    def control_out(self, request: int, value: int = 0, index: int = 0, data: bytes = b''):
+        setup = SETUP.pack(REQUEST_TYPE_OUT, request, value, index, len(data))
+        self._urb(XFER_CONTROL, 0x00, setup, len(data), data, b'', CONTROL_US)
+
+    def control_in(self, request: int, length: int, response: bytes, value: int = 0, index: int = 0):
+        setup = SETUP.pack(REQUEST_TYPE_VENDOR, request, value, index, length)
+        self._urb(XFER_CONTROL, 0x80, setup, length, b'', response[:length], CONTROL_US)
+
+    def bulk_out(self, data: bytes):
+        self._urb(XFER_BULK, ENDPOINT_OUT, None, len(data), data, b'',
+                  CONTROL_US + len(data) // BULK_BYTES_PER_US)
+
+    def bulk_in(self, length: int, response: bytes, status: int = 0, duration_us: int = CONTROL_US):
+        self._urb(XFER_BULK, ENDPOINT_IN, None, length, b'', response, duration_us, status)
+
+    def wait(self, ms: int):
+        self.clock += ms * 1000 + self.rng.randint(0, ms * 20 + 50)
+
+    def set_address(self, address: int):
+        self.control_out(VR_SET_DATA_ADDR, address >> 16, address & 0xFFFF)
+
+    def set_length(self, length: int):
+        self.control_out(VR_SET_DATA_LEN, length >> 16, length & 0xFFFF)
+
+    def load(self, data: bytes, address: int):
+        """bootstrap_load_data_to_memory(): address, length, bulk OUT"""
+        self.set_address(address)
+        self.set_length(len(data))
+        self.bulk_out(data)
+
+    def cpu_info(self, magic: bytes):
+        self.control_in(VR_GET_CPU_INFO, 8, magic.ljust(8, b'\x00'))
+
+class ImageSource:
+    """Flash image chunks: the source image tiled to size, or seeded data"""
+
+    def __init__(self, image: Optional[bytes], size: int, seed: int):
+        self.image = image
+        self.size = size
+        self.rng = random.Random(seed ^ 0x5EED1A6E)
+
+    def chunks(self, chunk_size: int):
+        for offset in range(0, self.size, chunk_size):
+            length = min(chunk_size, self.size - offset)
+            yield offset, self._read(offset, length)
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if self.image is None:
+            # 64KB blocks, about a quarter of them erased (0xFF), like a partly filled NOR
+            blocks = []
+            for block_start in range(0, length, 0x10000):
+                block_len = min(0x10000, length - block_start)
+                erased = self.rng.random() < 0.25
+                blocks.append(b'\xff' * block_len if erased else self.rng.randbytes(block_len))
+            return b''.join(blocks)
+        start = offset % len(self.image)
+        if start + length <= len(self.image):
+            return self.image[start:start + length]
+        parts = []
+        while length > 0:
+            part = self.image[start:start + length]
+            parts.append(part)
+            length -= len(part)
+            start = 0
+        return b''.join(parts)
+
+def iter_records(path: Path):
+    """(timestamp in seconds, usbmon record) for each packet of a pcap/pcapng usbmon capture"""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+        if magic == b'\x0a\x0d\x0d\x0a':
+            f.seek(0)
+            while True:
+                head = f.read(8)
+                if len(head) < 8:
+                    return
+                block_type, total = struct.unpack('<II', head)
+                body = f.read(total - 8)
+                if block_type == 0x00000001 and struct.unpack_from('<H', body)[0] != LINKTYPE_USB_LINUX_MMAPPED:
+                    raise ValueError(f"{path}: not a usbmon (mmapped) capture")
+                if block_type == 0x00000006:
+                    _, ts_high, ts_low, captured, _ = struct.unpack_from('<IIIII', body)
+                    yield ((ts_high << 32) | ts_low) / 1e6, body[20:20 + captured]
+        elif magic == b'\xd4\xc3\xb2\xa1':
+            linktype = struct.unpack('<16xI', f.read(20))[0]
+            if linktype != LINKTYPE_USB_LINUX_MMAPPED:
+                raise ValueError(f"{path}: not a usbmon (mmapped) capture")
+            while True:
+                head = f.read(16)
+                if len(head) < 16:
+                    return
+                ts_sec, ts_usec, captured, _ = struct.unpack('<IIII', head)
+                yield ts_sec + ts_usec / 1e6, f.read(captured)
+        else:
+            raise ValueError(f"{path}: not a little-endian pcap/pcapng file")
+
+def read_transfers(path: Path) -> List[USBTransfer]:
+    """
+    Decode a usbmon capture into USBTransfers without tshark.
+
+    Fields follow USBCaptureAnalyzer._parse_line: one transfer per usbmon
+    record (submit and completion), setup fields on control submits only,
+    times relative to the first record.
+    """
+    transfers = []
+    start = None
+    for frame_number, (timestamp, record) in enumerate(iter_records(path), 1):
+        fields = USBMON_HEADER.unpack_from(record)
+        xfer_type, epnum, devnum = fields[2], fields[3], fields[4]
+        flag_setup, len_cap, setup = fields[6], fields[12], fields[13]
+        start = timestamp if start is None else start
+        transfer = USBTransfer(
+            frame_number=frame_number,
+            timestamp=timestamp - start,
+            transfer_type=TRANSFER_TYPES.get(xfer_type, 'UNKNOWN'),
+            direction='IN' if epnum & 0x80 else 'OUT',
+            endpoint=epnum & 0x7F,
+            data=record[USBMON_HEADER.size:USBMON_HEADER.size + len_cap],
+            length=len_cap,
+            device=devnum,
+        )
+        if xfer_type == XFER_CONTROL and flag_setup == 0:
+            transfer.request_type, transfer.request, transfer.value, transfer.index, _ = SETUP.unpack(setup)
+        transfers.append(transfer)
+    return transfers
+
+def generate(output: Path, source: ImageSource, platform: str, ddr: bytes, spl: bytes,
+             uboot: bytes, seed: int, fmt: str, image_out: Optional[Path]) -> dict:
+    params = PLATFORMS[platform]
+    rng = random.Random(seed)
+    chunk_size = params['chunk_size']
+    snaplen = max(262144, USBMON_HEADER.size + max(chunk_size, len(uboot)))
+    start_us = (1700000000 + rng.randint(0, 86400 * 365)) * 1000000 + rng.randint(0, 999999)
+
+    image_hash = hashlib.sha256()
+    chunks = 0
+    img = open(image_out, 'wb') if image_out else None
+    with open(output, 'wb') as f:
+        writer = (PcapngWriter if fmt == 'pcapng' else PcapWriter)(f, snaplen)
+        session = SessionWriter(writer, rng, start_us)
+
+        # Bootrom stage: DDR config and SPL, then run the SPL
+        session.cpu_info(params['bootrom_magic'])
+        session.load(ddr, DDR_ADDRESS)
+        session.load(spl, SPL_ADDRESS)
+        session.set_length(0x7000)
+        session.control_out(VR_PROG_STAGE1, SPL_ADDRESS >> 16, SPL_ADDRESS & 0xFFFF)
+        session.wait(params['spl_wait_ms'])
+        if platform == 't41':
+            session.cpu_info(params['bootrom_magic'])
+
+        # U-Boot (bootstrap_program_stage2)
+        session.load(uboot, UBOOT_ADDRESS)
+        session.wait(500)
+        session.control_out(VR_FLUSH_CACHE)
+        session.control_out(VR_PROG_STAGE2, UBOOT_ADDRESS >> 16, UBOOT_ADDRESS & 0xFFFF)
+        session.cpu_info(params['firmware_magic'])
+        session.wait(1000)
+
+        # Firmware stage: handshake, flash base/length, erase
+        session.control_out(VR_FW_HANDSHAKE)
+        session.wait(50)
+        session.control_out(VR_SET_DATA_ADDR, FLASH_BASE_ADDRESS & 0xFFFF, 0)
+        session.set_length(chunk_size if platform == 't41' else source.size)
+        if platform == 'a1':
+            session.wait(params['erase_min_ms'])
+        else:
+            polls = params['erase_min_ms'] // 500 + rng.randint(3, 8)
+            for poll in range(polls):
+                busy = poll < polls - 3
+                session.control_in(VR_FW_READ_STATUS2, 4, struct.pack('<I', 1 if busy else 0))
+                session.wait(500)
+
+        # Firmware chunks (firmware_handshake_write_chunk[_a1])
+        for offset, chunk in source.chunks(chunk_size):
+            image_hash.update(chunk)
+            if img:
+                img.write(chunk)
+            session.control_out(VR_WRITE, 0, 0, write_handshake(chunk, offset, platform))
+            session.wait(50)
+            session.bulk_out(chunk)
+            session.wait(100)
+            if params['fw_read_per_chunk']:
+                session.control_in(VR_FW_READ, 4, b'\x00' * 4)
+            session.bulk_in(512, rng.choice(LOG_MESSAGES))
+            session.bulk_in(512, b'', status=ENOENT, duration_us=5000)
+            session.wait(300)
+            chunks += 1
+
+    if img:
+        img.close()
+    return {
+        'packets': session.packets,
+        'transfers': session.transfers,
+        'chunks': chunks,
+        'duration_s': (session.clock - start_us) / 1e6,
+        'image_sha256': image_hash.hexdigest(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate a synthetic usbmon capture of an Ingenic cloner session'
+    )
+    parser.add_argument('output', help='Output capture file')
+    parser.add_argument('image', nargs='?', help='Source flash image (default: seeded random data)')
+    parser.add_argument('--platform', '-p', default='t31', choices=sorted(PLATFORMS),
+                        help='Session platform (default: t31)')
+    parser.add_argument('--size', type=parse_size,
+                        help='Flash image size, e.g. 1M or 2G; the source image is tiled or '
+                             'truncated to it (default: source size, or 8M without a source)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--format', choices=['pcap', 'pcapng'], default='pcap',
+                        help='Capture file format (default: pcap)')
+    parser.add_argument('--firmwares', default=str(DEFAULT_FIRMWARES),
+                        help='Cloner firmwares directory (<processor>/spl.bin, uboot.bin)')
+    parser.add_argument('--ddr-cfg', default=str(DEFAULT_DDR_CFG),
+                        help='DDR .cfg compiled into the FIDB/RDD upload')
+    parser.add_argument('--image-out', help='Also write the flash image carried by the capture '
+                                            '(for analyze_write_with_binary.py)')
+
+    args = parser.parse_args()
+    params = PLATFORMS[args.platform]
+
+    image = None
+    if args.image:
+        if not Path(args.image).exists():
+            print(f"ERROR: Image not found: {args.image}")
+            sys.exit(1)
+        image = Path(args.image).read_bytes()
+        if not image:
+            print(f"ERROR: Image is empty: {args.image}")
+            sys.exit(1)
+    size = args.size if args.size is not None else (len(image) if image else 8 << 20)
+    if size <= 0 or size > 0xFFFFFFFF:
+        print(f"ERROR: Image size must be between 1 byte and 4 GB: {size}")
+        sys.exit(1)
+
+    firmware_dir = Path(args.firmwares) / params['firmware']
+    try:
+        spl = (firmware_dir / 'spl.bin').read_bytes()
+        uboot = (firmware_dir / 'uboot.bin').read_bytes()
+    except OSError as e:
+        print(f"ERROR: Failed to read firmware: {e}")
+        sys.exit(1)
+    ddr = build_ddr_binary(Path(args.ddr_cfg), args.platform)
+
+    print("=" * 80)
+    print(f"Synthetic usbmon capture: {args.platform}, {size:,} byte image, seed {args.seed}")
+    print("=" * 80)
+    print(f"Source:  {args.image or 'seeded random data'}")
+    print(f"DDR:     {len(ddr)} bytes ({Path(args.ddr_cfg).stem})")
+    print(f"SPL:     {len(spl):,} bytes, U-Boot: {len(uboot):,} bytes ({params['firmware']})")
+    print(f"Chunks:  {params['chunk_size'] // 1024} KB")
+
+    start = time.perf_counter()
+    stats = generate(Path(args.output), ImageSource(image, size, args.seed), args.platform,
+                     ddr, spl, uboot, args.seed, args.format,
+                     Path(args.image_out) if args.image_out else None)
+    elapsed = time.perf_counter() - start
+    capture_size = Path(args.output).stat().st_size
+
+    print(f"\n✓ Wrote {args.output} ({args.format}, {capture_size:,} bytes)")
+    print(f"  {stats['transfers']:,} transfers, {stats['packets']:,} records, "
+          f"{stats['chunks']:,} VR_WRITE chunks")
+    print(f"  Simulated session: {stats['duration_s']:.1f} s")
+    print(f"  Image SHA-256: {stats['image_sha256']}")
+    if args.image_out:
+        print(f"  Image written to {args.image_out}")
+    print(f"  Generated in {elapsed:.2f} s ({capture_size / max(elapsed, 1e-9) / 1e6:.0f} MB/s)")
+
+if __name__ == '__main__':
+    main()
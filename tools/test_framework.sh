@@ -136,6 +136,90 @@ else
     echo -e "  ${YELLOW}⚠${NC} No test pcap found (optional)"
 fi
 
+# Test 10: Map payloads that mix binary data with other bytes
+echo -e "\n${YELLOW}Test 10: Testing binary correlation...${NC}"
+if python3 - <<'PYEOF'
+import random
+from binary_index import BlockIndex
+
+binary = random.Random(1).randbytes(200000)
+index = BlockIndex(binary)
+
+# Binary tail plus a trailer in its own chunk
+ranges = index.correlate_chunk(binary[198000:] + b'FOOTER' * 100, 198000)
+assert [(r.usb_start, r.usb_end, r.binary_start) for r in ranges] == \
+    [(0, 2000, 198000), (2000, 2600, None)], ranges
+
+# Unmodified binary, then a modified region, then binary again
+chunk = bytearray(binary[50000:50000 + 65536])
+chunk[20000:30000] = bytes(b ^ 0x5A for b in chunk[20000:30000])
+ranges = index.correlate_chunk(bytes(chunk), 50000)
+assert [(r.usb_start, r.usb_end, r.binary_start) for r in ranges] == \
+    [(0, 20000, 50000), (20000, 30000, None), (30000, 65536, 80000)], ranges
+PYEOF
+then
+    echo -e "  ${GREEN}✓${NC} Binary tail + trailer and modified chunks map correctly"
+else
+    echo -e "  ${RED}✗${NC} binary_index.py correlation regression"
+    exit 1
+fi
+
+# Test 11: Header/footer overhead and modified regions that don't fit the chunk boundaries
+echo -e "\n${YELLOW}Test 11: Testing write correlation across chunk boundaries...${NC}"
+if python3 - <<'PYEOF'
+import io
+import os
+import random
+import tempfile
+import contextlib
+import transform_detector
+from analyze_usb_capture import USBTransfer
+from analyze_write_with_binary import WriteWithBinaryAnalyzer
+
+CHUNK = 65536
+HEADER = b'H' * 512
+
+# The last 64 KB chunk holds only the binary's last 40 bytes plus the footer
+binary = random.Random(2).randbytes(5 * CHUNK + 40 - len(HEADER))
+
+def correlate(stream):
+    transfers = [USBTransfer(frame, 0.0, 'BULK', 'OUT', 1, stream[offset:offset + CHUNK],
+                             len(stream[offset:offset + CHUNK]))
+                 for frame, offset in enumerate(range(0, len(stream), CHUNK), 1)]
+    with tempfile.NamedTemporaryFile(suffix='.bin', delete=False) as f:
+        f.write(binary)
+    try:
+        analyzer = WriteWithBinaryAnalyzer('synthetic.pcap', f.name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert analyzer.load_binary()
+            assert analyzer.analyze(transfers)
+    finally:
+        os.unlink(f.name)
+    return analyzer.result
+
+result = correlate(HEADER + binary + b'TAIL')
+assert result.match_type == 'overhead', result.match_type
+assert result.binary_offset == len(HEADER), result.binary_offset
+assert result.offset_map.novel_bytes == len(HEADER) + 4, result.offset_map.novel_bytes
+
+# XOR region starting 3.5 KB into a chunk: the clean bytes before it stay mapped
+xored = bytearray(binary)
+start, end = 2 * CHUNK + 3584, 4 * CHUNK
+xored[start:end] = bytes(b ^ 0xA5 for b in xored[start:end])
+result = correlate(bytes(xored))
+assert [(r.usb_start, r.usb_end) for r in result.offset_map.novel()] == [(start, end)], \
+    result.offset_map.novel()
+if transform_detector.available():
+    matches = [m for chunk in result.chunks for m in chunk.transforms.values()]
+    assert matches and all(m.name == 'xor' and m.score == 1.0 for m in matches), matches
+PYEOF
+then
+    echo -e "  ${GREEN}✓${NC} Overhead and XOR regions are found across chunk boundaries"
+else
+    echo -e "  ${RED}✗${NC} analyze_write_with_binary.py correlation regression"
+    exit 1
+fi
+
 # Summary
 echo -e "\n${GREEN}=== Framework Test Complete ===${NC}\n"
 echo "All critical tests passed!"
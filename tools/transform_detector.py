@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Transformation Detector for USB Payloads
+
+When a USB payload does not match the binary, this module tests it against
+candidate transforms of the binary region it most likely corresponds to:
+
+- XOR with a constant byte or a repeating key (periods 2..256)
+- Bit inversion
+- 16-bit and 32-bit byte swaps
+- A fixed header inserted in front of the data
+- zlib/gzip/xz/lzma framing of the data
+
+All byte-wise candidates are scored in bulk with NumPy (one bincount per key
+period, one vectorized compare per swap), so running the detector on every
+unmatched chunk of a full flash costs milliseconds per chunk.
+"""
+
+import lzma
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Minimum fraction of bytes a transform must explain to be reported
+MIN_SCORE = 0.90
+
+# Repeating XOR key periods to try (1 = constant key), and the base periods
+# whose lane histograms are computed; every period must divide a base
+XOR_PERIODS = (1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 32, 64, 128, 256)
+XOR_BASE_PERIODS = (256, 420)
+
+# Largest header searched for when testing header insertion
+MAX_HEADER_SIZE = 4096
+HEADER_PROBE_SIZE = 32
+
+# Compression container signatures
+COMPRESSION_MAGICS = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x5d\x00\x00', 'lzma'),
+)
+
+@dataclass
+class TransformMatch:
+    """A candidate transform and how much of the payload it explains"""
+    name: str
+    score: float
+    key: Optional[bytes] = None
+    binary_offset: Optional[int] = None
+    header_size: int = 0
+
+    def describe(self) -> str:
+        text = f"{self.name} ({self.score * 100:.1f}%)"
+        if self.key is not None:
+            shown = self.key[:16].hex() + ("..." if len(self.key) > 16 else "")
+            text += f" key={shown}"
+        if self.header_size:
+            text += f" header={self.header_size} bytes"
+        if self.binary_offset is not None:
+            text += f" binary[0x{self.binary_offset:08X}]"
+        return text
+
+def available() -> bool:
+    """True if NumPy is installed and bulk scoring can run"""
+    return np is not None
+
+def _lane_counts(xored, base: int):
+    """Histogram of XOR values per lane (position % base), shape (base, 256)"""
+    lanes = np.arange(len(xored), dtype=np.intp) % base
+    return np.bincount(lanes * 256 + xored, minlength=base * 256).reshape(base, 256)
+
+def _score_xor(usb, ref, offset: int) -> List[TransformMatch]:
+    """Score XOR with constant/repeating keys and bit inversion"""
+    n = len(usb)
+    xored = usb ^ ref
+    results = []
+
+    # One bincount per base period; every divisor's histogram is a lane sum
+    base_counts = {base: _lane_counts(xored, base) for base in XOR_BASE_PERIODS}
+
+    for period in XOR_PERIODS:
+        if period > n // 4:
+            break
+        base = next(b for b in XOR_BASE_PERIODS if b % period == 0)
+        counts = base_counts[base].reshape(base // period, period, 256).sum(axis=0)
+        key = counts.argmax(axis=1).astype(np.uint8)
+        score = counts.max(axis=1).sum() / n
+
+        if period == 1:
+            if key[0] == 0:
+                name = "patched"       # Mostly identical, some bytes changed
+            elif key[0] == 0xFF:
+                name = "invert"
+            else:
+                name = "xor"
+            results.append(TransformMatch(name, float(score),
+                                          None if key[0] in (0, 0xFF) else key.tobytes(), offset))
+        elif len(set(key.tobytes())) > 1:
+            # Only report genuinely repeating keys (constant keys are period 1)
+            results.append(TransformMatch("xor_key", float(score), key.tobytes(), offset))
+
+    return results
+
+def _score_swaps(usb, ref, offset: int) -> List[TransformMatch]:
+    """Score 16-bit and 32-bit byte swaps"""
+    results = []
+    for width, name in ((2, "swap16"), (4, "swap32")):
+        n = len(usb) - len(usb) % width
+        if n == 0:
+            continue
+        swapped = ref[:n].reshape(-1, width)[:, ::-1].reshape(-1)
+        score = np.count_nonzero(usb[:n] == swapped) / len(usb)
+        results.append(TransformMatch(name, float(score), None, offset))
+    return results
+
+def _score_header(data: bytes, binary, offset: int) -> Optional[TransformMatch]:
+    """Score a fixed header inserted in front of binary data"""
+    probe = bytes(binary[offset:offset + HEADER_PROBE_SIZE])
+    if len(probe) < HEADER_PROBE_SIZE:
+        return None
+
+    header_size = data.find(probe, 1, MAX_HEADER_SIZE + HEADER_PROBE_SIZE)
+    if header_size <= 0:
+        return None
+
+    body = np.frombuffer(data, dtype=np.uint8)[header_size:]
+    ref = np.frombuffer(binary[offset:offset + len(body)], dtype=np.uint8)
+    n = min(len(body), len(ref))
+    score = (np.count_nonzero(body[:n] == ref[:n]) + header_size) / len(data)
+    return TransformMatch("header", float(score), data[:header_size], offset, header_size)
+
+def _decompress(data: bytes) -> Optional[tuple]:
+    """Try the compression containers whose signature matches; (name, output)"""
+    candidates = []
+    if len(data) >= 2 and (data[0] & 0x0F) == 8 and ((data[0] << 8) | data[1]) % 31 == 0:
+        candidates.append('zlib')
+    for magic, name in COMPRESSION_MAGICS:
+        if data.startswith(magic):
+            candidates.append(name)
+
+    for name in candidates:
+        try:
+            if name == 'zlib':
+                output = zlib.decompressobj().decompress(data)
+            elif name == 'gzip':
+                output = zlib.decompressobj(31).decompress(data)
+            elif name == 'xz':
+                output = lzma.LZMADecompressor(lzma.FORMAT_XZ).decompress(data)
+            else:
+                output = lzma.LZMADecompressor(lzma.FORMAT_ALONE).decompress(data)
+        except (zlib.error, lzma.LZMAError, EOFError):
+            continue
+        if output:
+            return name, output
+    return None
+
+def _score_compression(data: bytes, binary, offset: Optional[int]) -> Optional[TransformMatch]:
+    """Score zlib/gzip/xz/lzma framed binary data"""
+    decoded = _decompress(data)
+    if decoded is None:
+        return None
+    name, output = decoded
+
+    # Expected position first, then anywhere in the binary
+    position = offset
+    if position is None or binary[position:position + len(output)] != output:
+        position = binary.find(output[:64]) if len(output) >= 64 else -1
+        if position < 0:
+            return None
+
+    ref = np.frombuffer(binary[position:position + len(output)], dtype=np.uint8)
+    out = np.frombuffer(output, dtype=np.uint8)[:len(ref)]
+    score = np.count_nonzero(out == ref) / len(output)
+    return TransformMatch(name, float(score), None, position)
+
+def score_transforms(data: bytes, binary, binary_offset: Optional[int]) -> List[TransformMatch]:
+    """
+    Score every candidate transform of binary[binary_offset:] against data.
+
+    Returns all candidates, best first. binary_offset may be None when the
+    corresponding region is unknown; only compression framing is tested then.
+    """
+    if np is None or not data:
+        return []
+
+    results = []
+
+    compressed = _score_compression(data, binary, binary_offset)
+    if compressed is not None:
+        results.append(compressed)
+
+    if binary_offset is not None and 0 <= binary_offset < len(binary):
+        ref = np.frombuffer(binary[binary_offset:binary_offset + len(data)], dtype=np.uint8)
+        usb = np.frombuffer(data, dtype=np.uint8)[:len(ref)]
+
+        if len(usb) >= 16:
+            results.extend(_score_xor(usb, ref, binary_offset))
+            results.extend(_score_swaps(usb, ref, binary_offset))
+            header = _score_header(data, binary, binary_offset)
+            if header is not None:
+                results.append(header)
+
+    results.sort(key=lambda r: r.score, reverse=True)
+    return results
+
+def detect_transform(data: bytes, binary, binary_offset: Optional[int]) -> Optional[TransformMatch]:
+    """Best-scoring transform explaining data, or None below MIN_SCORE"""
+    results = score_transforms(data, binary, binary_offset)
+    if results and results[0].score >= MIN_SCORE:
+        return results[0]
+    return None